@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import InventoryItem, Batch
+from .ledger import delete_batch, save_batch
+from .models import InventoryItem, Batch, ImportJob
 
 @admin.register(InventoryItem)
 class InventoryItemAdmin(admin.ModelAdmin):
@@ -34,3 +35,24 @@ class BatchAdmin(admin.ModelAdmin):
             'fields': ('inventory_item', 'batch_quantity', 'batch_unit_cost', 'expiration_date')
         }),
     )
+
+    # Stock added, changed or removed here is recorded in the ledger like any other movement
+    def save_model(self, request, obj, form, change):
+        save_batch(obj)
+
+    def delete_model(self, request, obj):
+        delete_batch(obj)
+
+    def delete_queryset(self, request, queryset):
+        for batch in queryset:
+            delete_batch(batch)
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'file_name', 'kind', 'status', 'rows_processed', 'inserted', 'updated',
+        'skipped', 'invalid', 'created_by', 'created_at', 'finished_at'
+    )
+    list_filter = ('status', 'kind')
+    search_fields = ('file_name',)
+    readonly_fields = ('created_at', 'started_at', 'finished_at', 'chunk_results')
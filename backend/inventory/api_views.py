@@ -1,17 +1,29 @@
-import csv
-from django.http import HttpResponse
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from inventory_management.exports import stream_csv_response
+from .csv_import import import_inventory_csv
+from .import_jobs import start_import_job
 from .models import InventoryItem
 from .serializers import InventoryItemSerializer
+from .valuation import with_valuation
+from .sync import SyncPosition, catalog_version, changed_items, default_page_size, is_tombstone, max_page_size, sync_etag
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
+API_EXPORT_COLUMNS = [
+    ('Item ID', 'item_id'), ('Name', 'item_name'), ('Cost', 'unit_cost'), ('Price', 'unit_price'),
+    ('Quantity', 'quantity'), ('Barcode', 'barcode'), ('Min Level', 'min_stock_level'),
+    ('Max Level', 'max_stock_level'), ('Category', 'product_category'), ('Status', 'status'),
+]
+
 
 class InventoryItemViewSet (viewsets.ModelViewSet):
-    queryset = InventoryItem.objects.all ( )
+    queryset = with_valuation (InventoryItem.objects.all ( ))
     serializer_class = InventoryItemSerializer
    # authentication_classes = [ TokenAuthentication ]  # ✅ Requires Token Authentication
    # permission_classes = [ IsAuthenticated ]  # 🔒 Restrict access to authenticated users
@@ -19,50 +31,74 @@ class InventoryItemViewSet (viewsets.ModelViewSet):
 
     @action (detail = False, methods = [ 'get' ])
     def download (self, request):
-        # Generate CSV response
-        response = HttpResponse (content_type = 'text/csv')
-        response [ 'Content-Disposition' ] = 'attachment; filename="inventory.csv"'
+        # Stream the CSV straight from the database
+        return stream_csv_response (InventoryItem.objects.order_by ('pk'), API_EXPORT_COLUMNS, 'inventory.csv')
 
-        writer = csv.writer (response)
-        writer.writerow (
-            [ 'Item ID', 'Name', 'Cost', 'Price', 'Quantity', 'Barcode', 'Min Level', 'Max Level', 'Category',
-              'Status' ])
+    @action (detail = False, methods = [ 'get' ])
+    def changes (self, request):
+        """
+        Items changed since `?since=` (a cursor from the previous response, or an ISO
+        timestamp), oldest first; omit it for a full snapshot. Deactivated items come back
+        as tombstones. Page through with `next_cursor` while `has_more` is true. A sync from
+        the last page's cursor re-reads a short overlap (see `inventory.sync`), so an item can
+        come back again: apply items by `item_id`.
+        """
+        since = request.query_params.get ('since')
+        try:
+            position = SyncPosition.parse (since) if since else None
+            limit = int (request.query_params.get ('limit', default_page_size ( )))
+        except ValueError as e:
+            return Response ({'error': str (e)}, status = 400)
+        limit = max (1, min (limit, max_page_size ( )))
 
-        for item in InventoryItem.objects.all ( ):
-            writer.writerow ([
-                item.item_id, item.item_name, item.unit_cost, item.unit_price,
-                item.quantity, item.barcode, item.min_stock_level,
-                item.max_stock_level, item.product_category, item.status
-            ])
+        # Answer conditional requests before touching the changed rows
+        version = catalog_version ( )
+        etag = sync_etag (since, limit, version)
+        not_modified = get_conditional_response (request, etag = quote_etag (etag),
+                                                 last_modified = version and int (version.timestamp ( )))
+        if not_modified is not None:
+            return not_modified
 
+        page, next_position, has_more = changed_items (position, limit)
+        response = Response ({
+            'changed': self.get_serializer ([ item for item in page if not is_tombstone (item) ], many = True).data,
+            'deactivated': [
+                {'item_id': item.item_id, 'last_updated': item.last_updated}
+                for item in page if is_tombstone (item)
+            ],
+            'next_cursor': next_position.encode ( ) if next_position else None,
+            'has_more': has_more,
+        })
+        response [ 'ETag' ] = quote_etag (etag)
+        if version:
+            response [ 'Last-Modified' ] = http_date (version.timestamp ( ))
         return response
 
     @action (detail = False, methods = [ 'post' ])
     def upload (self, request):
-        # Process uploaded CSV file
         file = request.FILES.get ('file')
         if not file:
             return Response ({'error': 'No file uploaded'}, status = 400)
 
-        reader = csv.reader (file.read ( ).decode ('utf-8').splitlines ( ))
-        next (reader)  # Skip header row
+        chunk_size = request.query_params.get ('chunk_size')
+        if chunk_size is not None:
+            if not chunk_size.isdigit ( ) or int (chunk_size) < 1:
+                return Response ({'error': 'chunk_size must be a positive integer'}, status = 400)
+            chunk_size = int (chunk_size)
 
-        for row in reader:
-            # Extract each field assuming CSV order matches model fields
-            item_id, item_name, unit_cost, unit_price, quantity, barcode, min_level, max_level, category, status = row
-            InventoryItem.objects.update_or_create (
-                item_id = item_id,
-                defaults = {
-                    'item_name': item_name,
-                    'unit_cost': unit_cost,
-                    'unit_price': unit_price,
-                    'quantity': quantity,
-                    'barcode': barcode,
-                    'min_stock_level': min_level,
-                    'max_stock_level': max_level,
-                    'product_category': category,
-                    'status': status,
-                }
-            )
+        # ?dry_run=1 validates the file synchronously without writing anything
+        if request.query_params.get ('dry_run') in ('1', 'true', 'True'):
+            results = import_inventory_csv (file, chunk_size = chunk_size, dry_run = True)
+            return Response ({
+                'dry_run': True,
+                'valid': not any (result.invalid for result in results),
+                'chunks': [ result.as_dict ( ) for result in results ],
+            })
 
-        return Response ({'status': 'File processed successfully'})
+        # Spool the uploaded CSV and process it in the background
+        job = start_import_job (file, kind = 'API_CSV', user = request.user, chunk_size = chunk_size)
+        return Response ({
+            'job_id': job.pk,
+            'status': job.status,
+            'status_url': reverse ('import_job_status', kwargs = {'job_id': job.pk}),
+        }, status = 202)
@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def ensure_search_index(sender, using, **kwargs):
+    # Migrations that rebuild the item table on SQLite drop the search index triggers
+    from django.db import connections
+    from .search import ITEM_INDEX
+    ITEM_INDEX.install(connections[using])
 
 
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory'
+
+    def ready(self):
+        import inventory.signals  # noqa: F401
+        post_migrate.connect(ensure_search_index, sender=self)
@@ -0,0 +1,61 @@
+"""
+Backfill one batch for every stocked item that has none, so items created before batches
+existed (or imported without them) carry their on-hand quantity in a batch.
+
+Items are walked in primary-key order, `INVENTORY_BACKFILL_CHUNK_SIZE` at a time. Each chunk
+is one transaction: it locks the chunk's items that still have no batch, bulk-creates their
+batches and rebuilds their rollups (bulk_create skips `Batch.save`). A run that stops part
+way keeps every chunk it committed, and since items that have a batch are never picked
+again, running it again carries on where it stopped and a completed backfill is a no-op.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import Batch, InventoryItem
+from .rollups import rebuild_rollups
+
+
+def default_chunk_size():
+    return getattr(settings, 'INVENTORY_BACKFILL_CHUNK_SIZE', 1000)
+
+
+def items_without_batches():
+    return InventoryItem.objects.filter(quantity__gt=0).exclude(
+        Exists(Batch.objects.filter(inventory_item=OuterRef('pk')))
+    )
+
+
+def backfill_batches(chunk_size=None, expiration_days=180, progress=None):
+    """
+    Give every stocked item without a batch one batch holding its quantity at its unit cost,
+    expiring `expiration_days` from today. `progress(created, total)` is called after each
+    chunk. Returns the number of batches created.
+    """
+    chunk_size = chunk_size or default_chunk_size()
+    expiration_date = timezone.localdate() + timedelta(days=expiration_days)
+    total = items_without_batches().count()
+    created = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            chunk = list(
+                items_without_batches().select_for_update().filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', 'quantity', 'unit_cost')[:chunk_size]
+            )
+            if not chunk:
+                break
+            Batch.objects.bulk_create([
+                Batch(inventory_item_id=pk, batch_quantity=quantity, batch_unit_cost=unit_cost,
+                      expiration_date=expiration_date)
+                for pk, quantity, unit_cost in chunk
+            ])
+            rebuild_rollups(InventoryItem.objects.filter(pk__in=[pk for pk, _, _ in chunk]))
+        created += len(chunk)
+        last_pk = chunk[-1][0]
+        if progress is not None:
+            progress(created, total)
+    return created
@@ -0,0 +1,171 @@
+import math
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .ledger import import_movements
+from .models import InventoryItem, StockMovement
+from .signals import items_bulk_changed
+
+# Fields written from an uploaded row. Anything not listed keeps its current value, and so
+# does a listed field the row leaves out (a column the file did not have).
+UPSERT_FIELDS = [
+    'item_name', 'unit_cost', 'unit_price', 'quantity', 'min_stock_level',
+    'max_stock_level', 'product_category', 'measurement_type', 'status',
+]
+
+
+def row_fields(row):
+    """The `UPSERT_FIELDS` an uploaded row carries."""
+    return tuple(field for field in UPSERT_FIELDS if field in row)
+
+
+def update_fields(fields=UPSERT_FIELDS):
+    """Fields `bulk_update` writes for rows carrying `fields` (the manager adds the derived issue flags)."""
+    return list(fields) + ['last_updated']
+
+
+def default_batch_size():
+    return getattr(settings, 'INVENTORY_UPSERT_BATCH_SIZE', 1000)
+
+
+def clean_barcode(value):
+    """
+    Turn a spreadsheet barcode cell into the string stored on `InventoryItem.barcode`.
+
+    pandas reads numeric barcode columns as floats (123456789.0), and empty cells as NaN;
+    both are mapped back to what the user typed, with blanks becoming None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None
+        if value.is_integer():
+            return str(int(value))
+    value = str(value).strip()
+    return value or None
+
+
+@dataclass
+class UpsertReport:
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def total(self):
+        return self.inserted + self.updated + self.skipped
+
+    @property
+    def rows_per_second(self):
+        if not self.elapsed:
+            return float(self.total)
+        return self.total / self.elapsed
+
+    def as_dict(self):
+        return {
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'skipped': self.skipped,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+        }
+
+    def __str__(self):
+        return (f"{self.inserted} inserted, {self.updated} updated, {self.skipped} skipped "
+                f"({self.rows_per_second:,.0f} rows/s)")
+
+
+class BarcodeUpserter:
+    """
+    Insert or update inventory items keyed by barcode, in batches.
+
+    Existing barcodes are loaded into a map with a single query when the upserter is
+    created, so matching a row costs a dict lookup instead of a SELECT. Rows are buffered
+    and written with `bulk_create`/`bulk_update` every `batch_size` rows.
+
+    Rows without a barcode cannot be matched and are always inserted. When the same
+    barcode appears more than once in an upload, the first row wins and the later ones
+    are counted as skipped. Existing items are updated only in the fields their row carries.
+
+    The caller owns the transaction; see `bulk_upsert_items` for the common case.
+    """
+
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or default_batch_size()
+        self.report = UpsertReport()
+        self._started = time.monotonic()
+        self._existing = dict(
+            InventoryItem.objects.filter(barcode__isnull=False)
+            .exclude(barcode='')
+            .order_by('-item_id')
+            .values_list('barcode', 'item_id')
+        )
+        self._seen = set()
+        self._to_create = []
+        # Items to update, by the fields their rows carry
+        self._to_update = {}
+
+    def add(self, row):
+        barcode = clean_barcode(row.get('barcode'))
+        if barcode is not None:
+            if barcode in self._seen:
+                self.report.skipped += 1
+                return
+            self._seen.add(barcode)
+
+        fields = row_fields(row)
+        item = InventoryItem(barcode=barcode, **{field: row[field] for field in fields})
+
+        item_id = self._existing.get(barcode) if barcode is not None else None
+        if item_id is None:
+            self._to_create.append(item)
+        else:
+            item.item_id = item_id
+            item.last_updated = timezone.now()
+            self._to_update.setdefault(fields, []).append(item)
+
+        if len(self._to_create) + sum(map(len, self._to_update.values())) >= self.batch_size:
+            self.flush()
+
+    def add_all(self, rows):
+        for row in rows:
+            self.add(row)
+
+    def flush(self):
+        if not self._to_create and not self._to_update:
+            return
+        items_bulk_changed.send(sender=InventoryItem)
+        movements = import_movements(self._to_create + [item for items in self._to_update.values() for item in items])
+        if self._to_create:
+            InventoryItem.objects.bulk_create(self._to_create, batch_size=self.batch_size)
+            self.report.inserted += len(self._to_create)
+            self._to_create = []
+        for fields, items in self._to_update.items():
+            InventoryItem.objects.bulk_update(items, update_fields(fields), batch_size=self.batch_size)
+            self.report.updated += len(items)
+        self._to_update = {}
+        StockMovement.objects.bulk_create(movements, batch_size=self.batch_size)
+
+    def finish(self):
+        self.flush()
+        self.report.elapsed = time.monotonic() - self._started
+        return self.report
+
+
+def bulk_upsert_items(rows, batch_size=None):
+    """
+    Upsert an iterable of row dicts (as produced by `clean_data`, without the columns it
+    defaulted) in one transaction.
+
+    Returns an `UpsertReport` with inserted/updated/skipped counts and throughput.
+    """
+    with transaction.atomic():
+        upserter = BarcodeUpserter(batch_size=batch_size)
+        upserter.add_all(rows)
+        return upserter.finish()
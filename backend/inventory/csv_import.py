@@ -0,0 +1,178 @@
+"""
+Bulk import of inventory CSV files sent to the REST API (`InventoryItemViewSet.upload`).
+
+The file is read with the csv module, `chunk_size` records at a time, so memory use does
+not depend on the file size. Each chunk is validated with the upload rules, matched
+against existing items by `item_id` in one query and written with `bulk_create` /
+`bulk_update` inside its own transaction: a failure rolls back the chunk being written and
+leaves the chunks before it committed. A dry run does everything except the writes.
+"""
+import csv
+import io
+from dataclasses import dataclass, field
+from itertools import islice
+
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .bulk_upsert import clean_barcode
+from .ledger import import_movements
+from .models import InventoryItem, StockMovement
+from .signals import items_bulk_changed
+from .validation import RULES, Rule, validate_rows
+
+# Column order of the API CSV; the header line is skipped, not parsed
+API_COLUMNS = [
+    'item_id', 'item_name', 'unit_cost', 'unit_price', 'quantity', 'barcode',
+    'min_stock_level', 'max_stock_level', 'product_category', 'status',
+]
+NUMERIC_COLUMNS = ['unit_cost', 'unit_price', 'quantity', 'min_stock_level', 'max_stock_level']
+
+# Fields written to items that already exist; measurement type is not part of the API CSV
+API_UPDATE_FIELDS = API_COLUMNS[1:] + ['has_issues', 'issue_reasons', 'last_updated']
+
+API_RULES = [
+    Rule('ITEM_ID_REQUIRED', "item_id must be a whole number.", lambda data: data['item_id'].isna()),
+] + [rule for rule in RULES if rule.code not in ('UNKNOWN_MEASUREMENT_TYPE', 'INVALID_DATE')]
+
+# Row errors kept per chunk in the results; the invalid count is always complete
+MAX_ERRORS_PER_CHUNK = 50
+
+
+def default_chunk_size():
+    return getattr(settings, 'INVENTORY_API_CSV_CHUNK_SIZE', 1000)
+
+
+@dataclass
+class ChunkResult:
+    chunk: int
+    first_row: int
+    last_row: int
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    invalid: int = 0
+    errors: list = field(default_factory=list)
+
+    @property
+    def rows(self):
+        return self.inserted + self.updated + self.skipped + self.invalid
+
+    def add_error(self, row_number, reasons):
+        self.invalid += 1
+        if len(self.errors) < MAX_ERRORS_PER_CHUNK:
+            self.errors.append({'row': row_number, 'reasons': reasons})
+
+    def as_dict(self):
+        return {
+            'chunk': self.chunk,
+            'first_row': self.first_row,
+            'last_row': self.last_row,
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'skipped': self.skipped,
+            'invalid': self.invalid,
+            'errors': self.errors,
+        }
+
+
+def iter_csv_chunks(file, chunk_size=None):
+    """
+    Yield ``[(row_number, record), ...]`` lists of at most `chunk_size` records from a
+    binary CSV file, skipping the header and blank lines. Row numbers are file lines, so
+    the first record below the header is row 2.
+    """
+    reader = csv.reader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+    next(reader, None)  # Skip header row
+    records = ((reader.line_num, record) for record in reader if any(value.strip() for value in record))
+    while True:
+        chunk = list(islice(records, chunk_size or default_chunk_size()))
+        if not chunk:
+            return
+        yield chunk
+
+
+def clean_api_rows(records):
+    """Build a cleaned DataFrame (indexed by row number) from raw API CSV records."""
+    data = pd.DataFrame([record for _, record in records], columns=API_COLUMNS,
+                        index=[row_number for row_number, _ in records], dtype=object)
+    item_ids = pd.to_numeric(data['item_id'], errors='coerce')
+    data['item_id'] = item_ids.where((item_ids > 0) & (item_ids % 1 == 0))
+    for column in NUMERIC_COLUMNS:
+        data[column] = pd.to_numeric(data[column], errors='coerce').astype(float)
+    data['item_name'] = data['item_name'].fillna('').str.strip()
+    data['product_category'] = data['product_category'].fillna('').str.strip().str.upper()
+    data['status'] = data['status'].fillna('').str.strip().replace('', 'Active')
+    return data
+
+
+def import_chunk(number, records, dry_run=False):
+    """Validate one chunk of API CSV records and, unless `dry_run`, upsert it atomically."""
+    result = ChunkResult(chunk=number, first_row=records[0][0], last_row=records[-1][0])
+
+    well_formed = []
+    for row_number, record in records:
+        if len(record) == len(API_COLUMNS):
+            well_formed.append((row_number, record))
+        else:
+            result.add_error(row_number, f"Expected {len(API_COLUMNS)} columns, got {len(record)}.")
+    if not well_formed:
+        return result
+
+    data = clean_api_rows(well_formed)
+    invalid, reasons = validate_rows(data, API_RULES)
+    for row_number, row_reasons in reasons[invalid].items():
+        result.add_error(row_number, row_reasons)
+
+    # Like a series of update_or_create calls, the last row for an item_id wins
+    valid = data[~invalid]
+    duplicates = valid.duplicated('item_id', keep='last')
+    result.skipped = int(duplicates.sum())
+    valid = valid[~duplicates]
+
+    existing = set(InventoryItem.objects.filter(item_id__in=valid['item_id'].astype(int).tolist())
+                   .order_by().values_list('item_id', flat=True))
+    now = timezone.now()
+    to_create, to_update = [], []
+    for row in valid.to_dict(orient='records'):
+        row['item_id'] = int(row['item_id'])
+        row['barcode'] = clean_barcode(row['barcode'])
+        item = InventoryItem(**row)
+        if item.item_id in existing:
+            item.last_updated = now
+            to_update.append(item)
+        else:
+            to_create.append(item)
+
+    if not dry_run:
+        with transaction.atomic():
+            movements = import_movements(to_create + to_update, reference='import:csv')
+            InventoryItem.objects.bulk_create(to_create, batch_size=default_chunk_size())
+            InventoryItem.objects.bulk_update(to_update, API_UPDATE_FIELDS, batch_size=default_chunk_size())
+            StockMovement.objects.bulk_create(movements, batch_size=default_chunk_size())
+            items_bulk_changed.send(sender=InventoryItem)
+    result.inserted = len(to_create)
+    result.updated = len(to_update)
+    return result
+
+
+def import_inventory_csv(file, chunk_size=None, dry_run=False, on_chunk=None):
+    """
+    Import an inventory CSV in the API column order, upserting items by `item_id`.
+
+    Expected columns: item_id, item_name, unit_cost, unit_price, quantity, barcode,
+    min_level, max_level, category, status. The first line is a header and is skipped.
+    Rows failing validation are reported and left out; every other row of a chunk is
+    committed together. `on_chunk` is called with each `ChunkResult` as soon as it is done.
+
+    Returns the list of `ChunkResult`s.
+    """
+    results = []
+    for number, records in enumerate(iter_csv_chunks(file, chunk_size), start=1):
+        result = import_chunk(number, records, dry_run=dry_run)
+        results.append(result)
+        if on_chunk:
+            on_chunk(result)
+    return results
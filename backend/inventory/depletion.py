@@ -0,0 +1,135 @@
+"""
+First-expiring-first-out depletion of batches for sales and stock adjustments.
+
+`deplete` takes (item, quantity) lines and draws each quantity from the item's batches
+with stock left, earliest expiration first (batches without a date last, then oldest
+first). The whole basket is handled in a fixed number of statements, however many lines
+it has:
+
+1. lock the basket's items,
+2. lock their batches with stock left (only those rows),
+3. write the drawn-down batch quantities (`bulk_update`),
+4. write the items' quantity and batch rollups (`bulk_update`),
+5. record every draw as a `BatchDepletion` (`bulk_create`),
+6. append the draws to the stock ledger (`bulk_create`, see `inventory.ledger`).
+
+The bulk writes skip `Batch.save`, so the rollups (see `inventory.rollups`) are worked
+out here from the locked batches and written in step 4. Quantity no batch can cover is
+recorded as a shortfall (a depletion without a batch), or refused with
+`InsufficientStock` when `allow_shortfall` is False.
+"""
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Batch, BatchDepletion, InventoryItem, StockMovement
+from .rollups import ZERO, average_cost
+from .signals import items_bulk_changed
+
+
+class InsufficientStock(ValueError):
+    def __init__(self, shortfalls):
+        self.shortfalls = shortfalls  # item_id -> quantity the batches could not cover
+        super().__init__("Not enough stock in batches for item(s): " + ', '.join(
+            f"{item_id} (short {quantity})" for item_id, quantity in shortfalls.items()
+        ))
+
+
+def basket(lines):
+    """
+    Total the quantities of `lines` ((item or item_id, quantity) pairs) per item, in the
+    order items first appear. Raises ValueError for quantities that are not positive.
+    """
+    totals = OrderedDict()
+    for item, quantity in lines:
+        item_id = getattr(item, 'pk', item)
+        quantity = Decimal(str(quantity))
+        if quantity <= 0:
+            raise ValueError(f"Quantity for item {item_id} must be positive, got {quantity}.")
+        totals[item_id] = totals.get(item_id, ZERO) + quantity
+    return totals
+
+
+def deplete(lines, reason='SALE', reference='', allow_shortfall=True):
+    """
+    Draw the quantities of `lines` from their items' batches, first expiring first, and
+    lower the items' quantity to match. Returns the `BatchDepletion`s recorded.
+    """
+    totals = basket(lines)
+    if not totals:
+        return []
+
+    with transaction.atomic():
+        items = {
+            item.pk: item for item in InventoryItem.objects.select_for_update()
+            .filter(pk__in=list(totals)).order_by('pk')
+            .only('quantity', 'on_hand_quantity', 'on_hand_cost')
+        }
+        missing = [item_id for item_id in totals if item_id not in items]
+        if missing:
+            raise InventoryItem.DoesNotExist(f"No inventory item(s) {', '.join(map(str, missing))}.")
+
+        batches = {item_id: [] for item_id in totals}
+        for batch in (
+            Batch.objects.select_for_update()
+            .filter(inventory_item_id__in=list(totals), batch_quantity__gt=0)
+            .order_by('inventory_item_id', F('expiration_date').asc(nulls_last=True), 'pk')
+            .only('inventory_item_id', 'batch_quantity', 'batch_unit_cost', 'expiration_date')
+        ):
+            batches[batch.inventory_item_id].append(batch)
+
+        depletions, changed_batches, shortfalls = [], [], {}
+        for item_id, wanted in totals.items():
+            item = items[item_id]
+            drawn_cost = ZERO
+            for batch in batches[item_id]:
+                if wanted <= 0:
+                    break
+                taken = min(wanted, batch.batch_quantity)
+                batch.batch_quantity -= taken
+                wanted -= taken
+                drawn_cost += taken * batch.batch_unit_cost
+                changed_batches.append(batch)
+                depletions.append(BatchDepletion(
+                    batch=batch, inventory_item_id=item_id, quantity=taken, unit_cost=batch.batch_unit_cost,
+                    reason=reason, reference=reference,
+                ))
+            if wanted > 0:
+                shortfalls[item_id] = wanted
+                depletions.append(BatchDepletion(
+                    inventory_item_id=item_id, quantity=wanted, reason=reason, reference=reference,
+                ))
+
+            drawn = totals[item_id] - wanted
+            item.quantity -= totals[item_id]
+            item.on_hand_quantity -= drawn
+            item.on_hand_cost -= drawn_cost
+            item.average_batch_cost = average_cost(item.on_hand_quantity, item.on_hand_cost)
+            item.nearest_expiration_date = min(
+                (batch.expiration_date for batch in batches[item_id]
+                 if batch.batch_quantity > 0 and batch.expiration_date is not None),
+                default=None,
+            )
+            item.last_updated = timezone.now()
+
+        if shortfalls and not allow_shortfall:
+            raise InsufficientStock(shortfalls)
+
+        Batch.objects.bulk_update(changed_batches, ['batch_quantity'])
+        InventoryItem.objects.bulk_update(items.values(), [
+            'quantity', 'on_hand_quantity', 'on_hand_cost', 'average_batch_cost', 'nearest_expiration_date',
+            'last_updated',
+        ])
+        for batch in changed_batches:
+            batch._rollup_state = batch.rollup_state()
+        items_bulk_changed.send(sender=InventoryItem)
+        depletions = BatchDepletion.objects.bulk_create(depletions)
+        StockMovement.objects.bulk_create([
+            StockMovement(inventory_item_id=depletion.inventory_item_id, batch=depletion.batch, delta=-depletion.quantity,
+                          reason=reason, reference=reference)
+            for depletion in depletions
+        ])
+        return depletions
@@ -0,0 +1,86 @@
+"""
+Expiration alerts: batches with stock left that expire within the next few days.
+
+Both queries range over `inventory_batch_expiry_idx` on (expiration_date, inventory_item)
+between today and the horizon, so they read only the batches about to expire however much
+batch history builds up, and join the item in the same statement.
+
+`expiration_buckets` splits the next `max(INVENTORY_EXPIRATION_HORIZONS)` days at each
+horizon (today, 1-3 days, 4-7 days, 8-30 days by default) in a single grouped query.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Case, Count, DecimalField, ExpressionWrapper, F, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from .models import Batch
+
+MONEY = DecimalField(max_digits=16, decimal_places=2)
+BATCH_FIELDS = (
+    'id', 'expiration_date', 'batch_quantity', 'batch_unit_cost', 'inventory_item_id', 'inventory_item__item_name',
+    'inventory_item__barcode', 'inventory_item__product_category', 'inventory_item__unit_price',
+)
+
+
+def horizons():
+    return sorted(getattr(settings, 'INVENTORY_EXPIRATION_HORIZONS', (0, 3, 7, 30)))
+
+
+def batches_expiring(days, today=None):
+    """Batches with stock left expiring from `today` to `days` days later, soonest first."""
+    today = today or timezone.localdate()
+    return Batch.objects.filter(
+        expiration_date__gte=today, expiration_date__lte=today + timedelta(days=days), batch_quantity__gt=0,
+    )
+
+
+def expiring_batches(days, today=None):
+    """Rows for the batches expiring within `days` days, with their item and value at risk."""
+    return [
+        {**row, 'value_at_risk': row['batch_quantity'] * row['batch_unit_cost'],
+         'retail_at_risk': row['batch_quantity'] * row['inventory_item__unit_price']}
+        # By item id, not by 'inventory_item' (the item's name), so the rows come in index order
+        for row in batches_expiring(days, today).order_by('expiration_date', 'inventory_item_id', 'pk')
+        .values(*BATCH_FIELDS)
+    ]
+
+
+def expiration_buckets(today=None):
+    """
+    Batch and item counts, quantity, and cost and retail value at risk for the batches
+    expiring between each horizon in `INVENTORY_EXPIRATION_HORIZONS` and the one before.
+    """
+    today = today or timezone.localdate()
+    days = horizons()
+    bucket = Case(
+        *[When(expiration_date__lte=today + timedelta(days=horizon), then=Value(horizon)) for horizon in days],
+        output_field=IntegerField(),
+    )
+    groups = {
+        group['horizon']: group for group in
+        batches_expiring(days[-1], today).order_by().annotate(horizon=bucket).values('horizon').annotate(
+            batch_count=Count('pk'),
+            item_count=Count('inventory_item', distinct=True),
+            quantity=Sum('batch_quantity'),
+            value_at_risk=Sum(ExpressionWrapper(F('batch_quantity') * F('batch_unit_cost'), output_field=MONEY)),
+            retail_at_risk=Sum(ExpressionWrapper(
+                F('batch_quantity') * F('inventory_item__unit_price'), output_field=MONEY,
+            )),
+        )
+    }
+
+    buckets, start = [], 0
+    for horizon in days:
+        group = groups.get(horizon, {})
+        buckets.append({
+            'from_days': start,
+            'to_days': horizon,
+            'batch_count': group.get('batch_count', 0),
+            'item_count': group.get('item_count', 0),
+            'quantity': group.get('quantity') or 0,
+            'value_at_risk': group.get('value_at_risk') or 0,
+            'retail_at_risk': group.get('retail_at_risk') or 0,
+        })
+        start = horizon + 1
+    return buckets
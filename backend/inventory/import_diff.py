@@ -0,0 +1,239 @@
+"""
+Diff preview for inventory imports.
+
+A previewed import does not write to the catalog. Each validated chunk is matched
+against existing items in one query, by `item_id` when the file has that column and by
+barcode otherwise. Its values are compared column by column with the matched items, and
+every row is staged as an `ImportRow` that is NEW, CHANGED (with the field-level
+changes), UNCHANGED or a CONFLICT that cannot be applied safely. A row matched by
+`item_id` that carries a barcode no other item uses changes the item's barcode. `apply_preview` then
+writes the NEW and CHANGED rows in one transaction with bulk operations.
+"""
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .bulk_upsert import UPSERT_FIELDS, UpsertReport, clean_barcode, default_batch_size, row_fields, update_fields
+from .ledger import import_movements
+from .models import ImportJob, ImportRow, InventoryItem, StockMovement
+from .normalization import normalize_frame
+from .signals import items_bulk_changed
+from .upload_inventory_file import DEFAULTED_COLUMNS, rows_for_staging
+
+NUMERIC_FIELDS = ['unit_cost', 'unit_price', 'quantity', 'min_stock_level', 'max_stock_level']
+
+
+class PreviewAlreadyApplied(ValueError):
+    def __init__(self, job):
+        super().__init__(f"Import {job.pk} has already been applied.")
+
+
+class ImportDiff:
+    """
+    Compare validated upload chunks with the catalog.
+
+    Like `BarcodeUpserter`, the first row for an item wins: later rows for the same
+    item_id or barcode, in any chunk, are reported as conflicts.
+    """
+
+    def __init__(self):
+        self._seen = set()
+
+    def diff(self, data):
+        """
+        Diff one cleaned, valid chunk (indexed by position in the file).
+
+        Returns ``(row_number, row, change_type, item_id, changes, reasons)`` tuples.
+        """
+        if data.empty:
+            return []
+
+        barcodes = data['barcode'].map(clean_barcode)
+        if 'item_id' in data.columns:
+            item_ids = pd.to_numeric(data['item_id'], errors='coerce')
+        else:
+            item_ids = pd.Series(np.nan, index=data.index)
+
+        existing = self._load_existing(barcodes, item_ids)
+        existing_ids = pd.Index(existing['item_id'])
+
+        # Barcodes shared by several existing items cannot identify one of them
+        barcode_counts = existing['barcode'].dropna().value_counts()
+        unique_barcodes = existing[existing['barcode'].isin(barcode_counts[barcode_counts == 1].index)]
+        by_barcode = barcodes.map(unique_barcodes.set_index('barcode')['item_id'])
+        ambiguous = barcodes.isin(barcode_counts[barcode_counts > 1].index)
+
+        has_id = item_ids.notna()
+        matched = item_ids.where(has_id & item_ids.isin(existing_ids), by_barcode.where(~has_id))
+
+        reasons = pd.Series('', index=data.index)
+        reasons = reasons.mask(has_id & ~item_ids.isin(existing_ids), "No item with this item ID exists.")
+        reasons = reasons.mask(~has_id & ambiguous, "Barcode matches more than one existing item.")
+        reasons = reasons.mask(has_id & by_barcode.notna() & (by_barcode != item_ids),
+                               "Barcode belongs to a different existing item.")
+        reasons = reasons.mask((reasons == '') & self._repeated(matched, barcodes),
+                               "Duplicate of an earlier row for the same item.")
+        conflict = reasons != ''
+
+        # Compare the uploaded values, normalized the way a save would store them, with the
+        # matched items, one column at a time. Columns the file did not have are not written,
+        # so they cannot differ
+        fields = [field for field in UPSERT_FIELDS if field not in data.attrs.get(DEFAULTED_COLUMNS, [])]
+        old = existing.set_index('item_id').reindex(matched.to_numpy())[fields + ['barcode']].set_axis(data.index)
+        new = normalize_frame(data[fields])[fields].assign(barcode=barcodes)
+        changed = pd.DataFrame(index=data.index)
+        for field in fields:
+            if field in NUMERIC_FIELDS:
+                changed[field] = ~np.isclose(new[field].astype(float).round(2), old[field].astype(float))
+            else:
+                changed[field] = new[field] != old[field]
+        # Rows matched by barcode have that barcode already; a blank barcode cell leaves it as it is
+        changed['barcode'] = has_id & barcodes.notna() & (barcodes != old['barcode'])
+        changed = changed[matched.notna() & ~conflict]
+
+        change_types = pd.Series(
+            np.select([conflict, matched.isna(), changed.reindex(data.index, fill_value=False).any(axis=1)],
+                      ['CONFLICT', 'NEW', 'CHANGED'], 'UNCHANGED'),
+            index=data.index,
+        )
+
+        # Only the changed cells are turned into Python objects
+        changes = {}
+        cells = changed.stack()
+        for index, field in cells[cells].index:
+            changes.setdefault(index, {})[field] = {'old': old.at[index, field], 'new': new.at[index, field]}
+
+        rows = rows_for_staging(data, reasons)
+        return [
+            (row_number, row, change_types[index], None if pd.isna(matched[index]) else int(matched[index]),
+             _json_safe(changes.get(index, {})), reasons[index])
+            for index, (row_number, row, _) in zip(data.index, rows)
+        ]
+
+    def _load_existing(self, barcodes, item_ids):
+        lookup = Q(barcode__in=set(barcodes.dropna())) | Q(item_id__in=[int(i) for i in item_ids.dropna()])
+        existing = pd.DataFrame.from_records(
+            InventoryItem.objects.filter(lookup).order_by().values('item_id', 'barcode', *UPSERT_FIELDS),
+            columns=['item_id', 'barcode'] + UPSERT_FIELDS,
+        )
+        for field in NUMERIC_FIELDS:
+            existing[field] = existing[field].astype(float)
+        return existing
+
+    def _repeated(self, matched, barcodes):
+        """Mark rows whose item (or, for unmatched rows, barcode) already appeared in the upload."""
+        keys = [
+            f"id:{int(item_id)}" if pd.notna(item_id) else (f"barcode:{barcode}" if barcode else None)
+            for item_id, barcode in zip(matched, barcodes)
+        ]
+        repeated = []
+        for key in keys:
+            repeated.append(key is not None and key in self._seen)
+            if key is not None:
+                self._seen.add(key)
+        return pd.Series(repeated, index=matched.index)
+
+
+def _json_safe(changes):
+    return {
+        field: {side: value.item() if isinstance(value, np.generic) else value for side, value in change.items()}
+        for field, change in changes.items()
+    }
+
+
+def stage_preview_rows(job, diffed):
+    ImportRow.objects.bulk_create([
+        ImportRow(job=job, status='PREVIEW', row_number=row_number, data=data, change_type=change_type,
+                  item_id=item_id, changes=changes, reasons=reasons)
+        for row_number, data, change_type, item_id, changes, reasons in diffed
+    ], batch_size=default_batch_size())
+
+
+def apply_preview(job, batch_size=None):
+    """
+    Write the NEW and CHANGED rows of a previewed import in a single transaction.
+
+    Items edited since the preview started reading the catalog, and new or changed barcodes
+    another item has taken in the meantime, are not overwritten: those rows are turned into
+    conflicts instead. Returns an `UpsertReport`, with conflicts counted as skipped. The job
+    is claimed by setting `applied_at`, so a preview is applied once: a second call raises
+    `PreviewAlreadyApplied`.
+    """
+    batch_size = batch_size or default_batch_size()
+    report = UpsertReport()
+    prepared_at = job.started_at or job.created_at
+    pending = job.rows.filter(status='PREVIEW', change_type__in=['NEW', 'CHANGED']).order_by('pk')
+
+    with transaction.atomic():
+        job.applied_at = timezone.now()
+        if not ImportJob.objects.filter(pk=job.pk, applied_at__isnull=True).update(applied_at=job.applied_at):
+            raise PreviewAlreadyApplied(job)
+
+        # Keyset batches rather than one open cursor: each batch updates the rows it read
+        last_pk = 0
+        while True:
+            batch = list(pending.filter(pk__gt=last_pk)
+                         .values_list('pk', 'change_type', 'item_id', 'data', 'changes')[:batch_size])
+            if not batch:
+                break
+            _apply_batch(job, batch, prepared_at, report)
+            last_pk = batch[-1][0]
+
+        job.inserted, job.updated, job.skipped = report.inserted, report.updated, report.skipped
+        job.save(update_fields=['inserted', 'updated', 'skipped'])
+    return report
+
+
+def _apply_batch(job, batch, prepared_at, report):
+    update_ids = [item_id for _, change_type, item_id, _, _ in batch if change_type == 'CHANGED']
+    # Barcodes the batch gives to new items, or moves onto existing ones
+    claimed_barcodes = {
+        clean_barcode(data.get('barcode')) for _, change_type, _, data, changes in batch
+        if change_type == 'NEW' or 'barcode' in changes
+    }
+    stale_ids = set(InventoryItem.objects.filter(item_id__in=update_ids, last_updated__gt=prepared_at)
+                    .values_list('item_id', flat=True))
+    taken_barcodes = {}
+    owners = InventoryItem.objects.filter(barcode__in=claimed_barcodes - {None}).values_list('barcode', 'item_id')
+    for barcode, owner in owners:
+        taken_barcodes.setdefault(barcode, set()).add(owner)
+
+    now = timezone.now()
+    to_create, applied, conflicts = [], [], []
+    # Items to update, by the fields their rows carry
+    to_update = {}
+    for pk, change_type, item_id, data, changes in batch:
+        barcode = clean_barcode(data.get('barcode'))
+        moves_barcode = change_type == 'CHANGED' and 'barcode' in changes
+        if (item_id in stale_ids or (change_type == 'NEW' and barcode in taken_barcodes)
+                or (moves_barcode and taken_barcodes.get(barcode, set()) - {item_id})):
+            conflicts.append(pk)
+            continue
+        fields = row_fields(data)
+        item = InventoryItem(barcode=barcode, **{field: data[field] for field in fields})
+        if moves_barcode:
+            fields += ('barcode',)
+        if change_type == 'NEW':
+            to_create.append(item)
+        else:
+            item.item_id = item_id
+            item.last_updated = now
+            to_update.setdefault(fields, []).append(item)
+        applied.append(pk)
+
+    updated = [item for items in to_update.values() for item in items]
+    movements = import_movements(to_create + updated, reference=f'import:{job.pk}')
+    InventoryItem.objects.bulk_create(to_create, batch_size=len(batch))
+    for fields, items in to_update.items():
+        InventoryItem.objects.bulk_update(items, update_fields(fields), batch_size=len(batch))
+    StockMovement.objects.bulk_create(movements, batch_size=len(batch))
+    items_bulk_changed.send(sender=InventoryItem)
+    job.rows.filter(pk__in=applied).update(status='COMMITTED')
+    job.rows.filter(pk__in=conflicts).update(
+        change_type='CONFLICT', reasons="The item changed after this preview was made; upload the file again.",
+    )
+    report.inserted += len(to_create)
+    report.updated += len(updated)
+    report.skipped += len(conflicts)
@@ -0,0 +1,217 @@
+"""
+Background processing of inventory imports.
+
+An upload is spooled to `INVENTORY_IMPORT_SPOOL_DIR`, recorded as an `ImportJob`, and
+handed to a process-local thread pool once the surrounding transaction commits. The
+worker streams the file through the same pipeline as a synchronous upload, writing
+progress back to the job row after every chunk. Nothing outside this process (no broker,
+no separate worker service) is involved.
+
+So queued and running jobs do not survive a restart of the process. Run
+`manage.py recover_import_jobs` whenever the app servers (re)start: jobs left RUNNING are
+marked FAILED (the chunks they committed stay committed), spool files no job needs are
+removed, and PENDING jobs are run to completion by the command.
+"""
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .csv_import import import_inventory_csv
+from .models import ImportJob, ImportRow
+from .import_diff import ImportDiff, stage_preview_rows
+from .upload_inventory_file import iter_validated_chunks, process_inventory_upload, rows_for_staging
+from .upload_reader import estimate_upload_rows
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'INVENTORY_IMPORT_WORKERS', 2),
+                thread_name_prefix='inventory-import',
+            )
+    return _executor
+
+
+def spool_dir():
+    path = getattr(settings, 'INVENTORY_IMPORT_SPOOL_DIR', os.path.join(settings.BASE_DIR, 'import_spool'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def spool_upload(upload):
+    """Copy an uploaded file to the spool directory chunk by chunk and return its path."""
+    file_name = get_valid_filename(os.path.basename(upload.name)) or 'upload'
+    path = os.path.join(spool_dir(), f"{uuid.uuid4().hex}_{file_name}")
+    with open(path, 'wb') as destination:
+        for chunk in upload.chunks():
+            destination.write(chunk)
+    return path
+
+
+def start_import_job(upload, kind='SHEET', user=None, chunk_size=None, preview=False):
+    """
+    Spool `upload`, create its `ImportJob` and queue it for the worker pool.
+
+    The job is submitted on commit, so a worker never sees a job row that the request's
+    transaction might still roll back.
+    """
+    path = spool_upload(upload)
+    job = ImportJob.objects.create(
+        kind=kind,
+        file_name=upload.name,
+        file_path=path,
+        rows_total=estimate_upload_rows(path),
+        chunk_size=chunk_size,
+        preview=preview,
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+    transaction.on_commit(lambda: get_executor().submit(_run_in_worker, job.pk))
+    return job
+
+
+def _run_in_worker(job_id):
+    close_old_connections()
+    try:
+        run_import_job(job_id)
+    finally:
+        connections.close_all()
+
+
+def run_import_job(job_id):
+    """Process a pending job to completion, recording its outcome on the job row."""
+    claimed = ImportJob.objects.filter(pk=job_id, status='PENDING').update(status='RUNNING', started_at=timezone.now())
+    job = ImportJob.objects.get(pk=job_id)
+    if not claimed:
+        return job
+
+    try:
+        if job.kind == 'API_CSV':
+            _process_api_csv(job)
+        elif job.preview:
+            _preview_sheet(job)
+        else:
+            _process_sheet(job)
+    except Exception as e:
+        logger.exception("Inventory import job %s failed", job.pk)
+        ImportJob.objects.filter(pk=job.pk).update(status='FAILED', error=str(e), finished_at=timezone.now())
+    else:
+        ImportJob.objects.filter(pk=job.pk).update(status='SUCCEEDED', finished_at=timezone.now())
+    finally:
+        if os.path.exists(job.file_path):
+            os.remove(job.file_path)
+
+    job.refresh_from_db()
+    return job
+
+
+def recover_import_jobs(before=None):
+    """
+    Clean up after jobs that a stopped process left behind, and return the ids of the
+    PENDING jobs still waiting for a worker.
+
+    Jobs that were RUNNING before `before` (default now) are marked FAILED, and spool files
+    from before then that no PENDING or RUNNING job reads are removed. Work started later
+    belongs to a live process and is left alone.
+    """
+    before = before or timezone.now()
+    interrupted = ImportJob.objects.filter(status='RUNNING', started_at__lt=before)
+    for job in interrupted:
+        logger.warning("Inventory import job %s was interrupted", job.pk)
+    interrupted.update(
+        status='FAILED', error="Interrupted: the server stopped before the import finished.", finished_at=timezone.now(),
+    )
+
+    directory = spool_dir()
+    spooled = [os.path.abspath(os.path.join(directory, name)) for name in os.listdir(directory)]
+    # Read after listing the directory, so a job claimed meanwhile (now RUNNING) keeps its file:
+    # only files no unfinished job reads are removed
+    in_use = {
+        os.path.abspath(path) for path in
+        ImportJob.objects.filter(status__in=['PENDING', 'RUNNING']).values_list('file_path', flat=True)
+    }
+    for path in spooled:
+        try:
+            if path not in in_use and os.path.getmtime(path) < before.timestamp():
+                os.remove(path)
+        except FileNotFoundError:
+            # Its job finished, and removed it, in the meantime
+            pass
+    return list(ImportJob.objects.filter(status='PENDING').order_by('pk').values_list('pk', flat=True))
+
+
+def _process_sheet(job):
+    def progress(report, rows_read, invalid_count):
+        ImportJob.objects.filter(pk=job.pk).update(
+            rows_processed=rows_read,
+            inserted=report.inserted,
+            updated=report.updated,
+            skipped=report.skipped,
+            invalid=invalid_count,
+        )
+
+    def stage_invalid(rows):
+        ImportRow.objects.bulk_create([
+            ImportRow(job=job, row_number=row_number, data=data, reasons=reasons)
+            for row_number, data, reasons in rows
+        ])
+
+    with open(job.file_path, 'rb') as handle:
+        report, invalid_count = process_inventory_upload(
+            handle, progress=progress, commit_every_chunk=True, on_invalid=stage_invalid,
+        )
+
+    ImportJob.objects.filter(pk=job.pk).update(
+        inserted=report.inserted,
+        updated=report.updated,
+        skipped=report.skipped,
+        invalid=invalid_count,
+    )
+
+
+def _preview_sheet(job):
+    differ = ImportDiff()
+    rows_read = invalid_count = 0
+    with open(job.file_path, 'rb') as handle:
+        for data, invalid_mask, reasons in iter_validated_chunks(handle):
+            with transaction.atomic():
+                invalid = rows_for_staging(data[invalid_mask], reasons[invalid_mask])
+                ImportRow.objects.bulk_create([
+                    ImportRow(job=job, row_number=row_number, data=row, reasons=row_reasons)
+                    for row_number, row, row_reasons in invalid
+                ])
+                stage_preview_rows(job, differ.diff(data[~invalid_mask]))
+            rows_read += len(data)
+            invalid_count += len(invalid)
+            ImportJob.objects.filter(pk=job.pk).update(rows_processed=rows_read, invalid=invalid_count)
+
+
+def _process_api_csv(job):
+    results = []
+
+    def record_chunk(result):
+        results.append(result)
+        ImportJob.objects.filter(pk=job.pk).update(
+            rows_processed=sum(r.rows for r in results),
+            inserted=sum(r.inserted for r in results),
+            updated=sum(r.updated for r in results),
+            skipped=sum(r.skipped for r in results),
+            invalid=sum(r.invalid for r in results),
+            chunk_results=[r.as_dict() for r in results],
+        )
+
+    with open(job.file_path, 'rb') as handle:
+        import_inventory_csv(handle, chunk_size=job.chunk_size, on_chunk=record_chunk)
@@ -0,0 +1,157 @@
+"""
+The stock movement ledger: every change to an item's on-hand quantity is appended as a
+`StockMovement`, so past stock levels can be answered and reconciled without rescanning.
+
+Movements are recorded by the code that moves stock:
+
+- PO receiving, through `record_receipt` (RECEIPT, one per batch received),
+- batches entered or edited by hand (the batch form and the admin), through `save_batch`
+  and `delete_batch` (RECEIPT for a new batch, ADJUSTMENT for a change),
+- sales and adjustments drawn from batches, by `inventory.depletion` (SALE/ADJUSTMENT),
+- item saves that change the quantity, by `InventoryItem.save` (ADJUSTMENT),
+- spreadsheet and CSV imports, through `import_movements` (IMPORT).
+
+`take_snapshots` periodically stores each changed item's on-hand quantity as a
+`StockSnapshot`, so `on_hand_at` is the latest snapshot before the moment asked about plus
+the movements since: a bounded range scan on (inventory_item, created_at) instead of a
+replay of the item's whole history. The migration that created the ledger took an opening
+snapshot of every item.
+"""
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Batch, InventoryItem, StockMovement, StockSnapshot
+
+ZERO = Decimal('0')
+# Before any movement, for items that have no snapshot yet
+BEGINNING = datetime(2000, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def snapshot_batch_size():
+    return getattr(settings, 'INVENTORY_SNAPSHOT_BATCH_SIZE', 1000)
+
+
+def record_receipt(item, quantity, unit_cost, expiration_date=None, reference=''):
+    """
+    Receive `quantity` of `item` into a new batch: the batch, the item's quantity and the
+    ledger are written in one transaction. Returns the batch.
+    """
+    batch = save_batch(Batch(inventory_item=item, batch_quantity=quantity, batch_unit_cost=unit_cost,
+                             expiration_date=expiration_date), reference=reference)
+    item.refresh_from_db(fields=['quantity', 'last_updated'])
+    return batch
+
+
+def save_batch(batch, reference=None):
+    """
+    Save `batch` and move its item's quantity and the ledger by the stock it adds, in one
+    transaction: a RECEIPT for a new batch, an ADJUSTMENT for a changed quantity (or a batch
+    moved to another item). `reference` defaults to 'batch:created' or 'batch:edited'.
+    Returns the batch.
+    """
+    with transaction.atomic():
+        stored = None
+        if not batch._state.adding:
+            stored = Batch.objects.select_for_update().filter(pk=batch.pk).values_list(
+                'inventory_item_id', 'batch_quantity').first()
+        batch.save()
+        deltas = {batch.inventory_item_id: Decimal(str(batch.batch_quantity))}
+        if stored is not None:
+            item_id, quantity = stored
+            deltas[item_id] = deltas.get(item_id, ZERO) - quantity
+        if reference is None:
+            reference = 'batch:created' if stored is None else 'batch:edited'
+        _move_stock(deltas, batch, 'RECEIPT' if stored is None else 'ADJUSTMENT', reference)
+    return batch
+
+
+def delete_batch(batch, reference='batch:deleted'):
+    """Delete `batch`, taking the stock it held off its item's quantity and the ledger."""
+    with transaction.atomic():
+        stored = Batch.objects.select_for_update().filter(pk=batch.pk).values_list(
+            'inventory_item_id', 'batch_quantity').first()
+        batch.delete()
+        if stored is not None:
+            item_id, quantity = stored
+            _move_stock({item_id: -quantity}, None, 'ADJUSTMENT', reference)
+
+
+def _move_stock(deltas, batch, reason, reference):
+    now = timezone.now()
+    for item_id, delta in deltas.items():
+        if delta:
+            InventoryItem.objects.filter(pk=item_id).update(quantity=F('quantity') + delta, last_updated=now)
+            StockMovement.objects.create(inventory_item_id=item_id, batch=batch, delta=delta, reason=reason,
+                                         reference=reference)
+
+
+def received(reference):
+    """Whether receipts have been recorded under `reference` (e.g. 'po:PO-0042')."""
+    return StockMovement.objects.filter(reference=reference, reason='RECEIPT').exists()
+
+
+def import_movements(items, reference='import'):
+    """
+    IMPORT movements for `items` an import is about to write: the difference between each
+    item's new quantity and its stored one (all of it, for new items). Call before the
+    write and `bulk_create` the result after it, once new items have their keys.
+    """
+    stored = dict(
+        InventoryItem.objects.filter(pk__in=[item.pk for item in items if item.pk is not None])
+        .order_by().values_list('pk', 'quantity')
+    )
+    movements = []
+    for item in items:
+        delta = Decimal(str(item.quantity or 0)) - stored.get(item.pk, ZERO)
+        if delta:
+            movements.append(StockMovement(inventory_item=item, delta=delta, reason='IMPORT', reference=reference))
+    return movements
+
+
+def on_hand_at(item, when):
+    """The on-hand quantity of `item` (an item or its id) at the moment `when`."""
+    item_id = getattr(item, 'pk', item)
+    snapshot = (
+        StockSnapshot.objects.filter(inventory_item_id=item_id, taken_at__lte=when)
+        .order_by('-taken_at').values('taken_at', 'quantity').first()
+    )
+    movements = StockMovement.objects.filter(inventory_item_id=item_id, created_at__lte=when)
+    if snapshot is not None:
+        movements = movements.filter(created_at__gt=snapshot['taken_at'])
+    moved = movements.aggregate(total=Sum('delta'))['total'] or ZERO
+    return (snapshot['quantity'] if snapshot else ZERO) + moved
+
+
+def take_snapshots(taken_at=None):
+    """
+    Snapshot the on-hand quantity at `taken_at` (now by default) of every item with
+    movements since its latest snapshot. Returns the number of snapshots taken.
+    """
+    taken_at = taken_at or timezone.now()
+    latest = StockSnapshot.objects.filter(inventory_item=OuterRef('pk'), taken_at__lte=taken_at).order_by('-taken_at')
+    items = InventoryItem.objects.order_by().annotate(
+        since=Coalesce(Subquery(latest.values('taken_at')[:1]), Value(BEGINNING)),
+        base=Subquery(latest.values('quantity')[:1]),
+    )
+    moved = (
+        StockMovement.objects.filter(inventory_item=OuterRef('pk'), created_at__gt=OuterRef('since'),
+                                     created_at__lte=taken_at)
+        .order_by().values('inventory_item').annotate(total=Sum('delta')).values('total')
+    )
+    changed = (
+        items.annotate(moved=Subquery(moved, output_field=DecimalField(max_digits=12, decimal_places=2)))
+        .filter(moved__isnull=False).values_list('pk', 'base', 'moved')
+    )
+
+    with transaction.atomic():
+        snapshots = StockSnapshot.objects.bulk_create([
+            StockSnapshot(inventory_item_id=item_id, taken_at=taken_at, quantity=(base or ZERO) + moved)
+            for item_id, base, moved in changed
+        ], batch_size=snapshot_batch_size())
+    return len(snapshots)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from inventory.backfill import backfill_batches
+
+
+class Command(BaseCommand):
+    help = "Create a batch holding the on-hand quantity of every stocked item that has none. Safe to re-run."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, help="Items per transaction (default INVENTORY_BACKFILL_CHUNK_SIZE).")
+        parser.add_argument('--expiration-days', type=int, default=180,
+                            help="Expiration date of the new batches, in days from today (default 180).")
+
+    def handle(self, *args, chunk_size, expiration_days, **options):
+        def progress(created, total):
+            self.stdout.write(f"{created}/{total} item(s) backfilled")
+
+        created = backfill_batches(chunk_size=chunk_size, expiration_days=expiration_days, progress=progress)
+        self.stdout.write(self.style.SUCCESS(f"Created {created} batch(es)."))
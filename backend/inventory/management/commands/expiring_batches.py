@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from inventory.expiration import expiration_buckets, expiring_batches
+
+
+class Command(BaseCommand):
+    help = "List the batches expiring within the next N days and the value at risk per expiration horizon."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help="List batches expiring within this many days (default 7).")
+
+    def handle(self, *args, days, **options):
+        for bucket in expiration_buckets():
+            self.stdout.write(
+                f"{bucket['from_days']:>3}-{bucket['to_days']:<3} days: {bucket['batch_count']} batch(es) of "
+                f"{bucket['item_count']} item(s), cost at risk {bucket['value_at_risk']:.2f}, "
+                f"retail at risk {bucket['retail_at_risk']:.2f}"
+            )
+
+        batches = expiring_batches(days)
+        self.stdout.write(f"\n{len(batches)} batch(es) expiring within {days} day(s):")
+        for batch in batches:
+            self.stdout.write(
+                f"{batch['expiration_date']}  {batch['inventory_item__item_name']} "
+                f"[{batch['inventory_item__product_category']}]  qty {batch['batch_quantity']}  "
+                f"cost at risk {batch['value_at_risk']:.2f}"
+            )
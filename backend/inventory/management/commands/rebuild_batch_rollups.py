@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from inventory.models import InventoryItem
+from inventory.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the batch rollups stored on inventory items (on-hand quantity, cost, nearest expiration)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('item_ids', nargs='*', type=int, help="Only rebuild these items.")
+
+    def handle(self, *args, item_ids, **options):
+        items = InventoryItem.objects.all()
+        if item_ids:
+            items = items.filter(pk__in=item_ids)
+        updated = rebuild_rollups(items)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt batch rollups for {updated} item(s)."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from inventory.import_jobs import recover_import_jobs, run_import_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Recover inventory import jobs after a restart: fail jobs left running, remove orphaned spool files "
+        "and run the pending jobs."
+    )
+
+    def handle(self, *args, **options):
+        pending = recover_import_jobs()
+        for job_id in pending:
+            job = run_import_job(job_id)
+            self.stdout.write(f"Import job {job.pk} ({job.file_name}): {job.status}")
+        self.stdout.write(f"Ran {len(pending)} pending import job(s).")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from inventory.ledger import take_snapshots
+
+
+class Command(BaseCommand):
+    help = "Snapshot the on-hand quantity of every item with stock movements since its last snapshot."
+
+    def handle(self, *args, **options):
+        taken = take_snapshots()
+        self.stdout.write(self.style.SUCCESS(f"Took {taken} stock snapshot(s)."))
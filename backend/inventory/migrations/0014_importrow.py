@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:46
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_importjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_number', models.PositiveIntegerField(help_text='Row number in the uploaded file (the header is row 1).')),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Cleaned column values for the row.')),
+                ('reasons', models.TextField(blank=True, help_text='Why the row cannot be saved as it is.')),
+                ('status', models.CharField(choices=[('INVALID', 'Invalid'), ('CORRECTED', 'Corrected'), ('COMMITTED', 'Committed')], default='INVALID', max_length=10)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='inventory.importjob')),
+            ],
+            options={
+                'verbose_name': 'Import Row',
+                'verbose_name_plural': 'Import Rows',
+                'ordering': ['job', 'row_number'],
+                'indexes': [models.Index(fields=['job', 'status', 'row_number'], name='inventory_i_job_id_6e96fd_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:49
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_importrow'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='chunk_results',
+            field=models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Per-chunk outcome of an API CSV import.'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='chunk_size',
+            field=models.PositiveIntegerField(blank=True, help_text='Rows committed per transaction; blank for the default.', null=True),
+        ),
+    ]
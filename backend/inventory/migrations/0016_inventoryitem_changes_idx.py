@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0015_importjob_chunks'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['last_updated', 'item_id'], name='inventory_item_changes_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:53
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0016_inventoryitem_changes_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='applied_at',
+            field=models.DateTimeField(blank=True, help_text='When a previewed import was applied.', null=True),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='preview',
+            field=models.BooleanField(default=False, help_text='Stage a diff against the catalog instead of writing straight to it.'),
+        ),
+        migrations.AddField(
+            model_name='importrow',
+            name='change_type',
+            field=models.CharField(blank=True, choices=[('NEW', 'New'), ('CHANGED', 'Changed'), ('UNCHANGED', 'Unchanged'), ('CONFLICT', 'Conflict')], help_text='How a previewed row compares with the catalog.', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='importrow',
+            name='changes',
+            field=models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Field-level changes of a previewed row: {field: {old, new}}.'),
+        ),
+        migrations.AddField(
+            model_name='importrow',
+            name='item',
+            field=models.ForeignKey(blank=True, help_text='Existing item a previewed row would update.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.inventoryitem'),
+        ),
+        migrations.AlterField(
+            model_name='importrow',
+            name='status',
+            field=models.CharField(choices=[('INVALID', 'Invalid'), ('CORRECTED', 'Corrected'), ('PREVIEW', 'Awaiting apply'), ('COMMITTED', 'Committed')], default='INVALID', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='importrow',
+            index=models.Index(fields=['job', 'change_type', 'row_number'], name='inventory_i_job_id_0fc408_idx'),
+        ),
+    ]
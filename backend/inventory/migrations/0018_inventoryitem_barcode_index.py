@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0017_import_preview'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='inventoryitem',
+            name='barcode',
+            field=models.CharField(blank=True, db_index=True, help_text='Optional barcode identifier.', max_length=255, null=True),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations
+
+# Frozen copy of the index `inventory.search.ITEM_INDEX` installs: external content keyed on
+# the item table's rowid (item_id is an integer primary key, so the rowid is item_id)
+COLUMNS = 'item_name, barcode'
+INSERT = "INSERT INTO inventory_item_fts(rowid, item_name, barcode) VALUES (new.rowid, new.item_name, new.barcode);"
+DELETE = (
+    "INSERT INTO inventory_item_fts(inventory_item_fts, rowid, item_name, barcode) "
+    "VALUES ('delete', old.rowid, old.item_name, old.barcode);"
+)
+INSTALL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS inventory_item_fts USING fts5("
+    f"{COLUMNS}, content='inventory_inventoryitem', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS inventory_item_fts_ai AFTER INSERT ON inventory_inventoryitem BEGIN {INSERT} END",
+    f"CREATE TRIGGER IF NOT EXISTS inventory_item_fts_ad AFTER DELETE ON inventory_inventoryitem BEGIN {DELETE} END",
+    f"CREATE TRIGGER IF NOT EXISTS inventory_item_fts_au AFTER UPDATE OF {COLUMNS} ON inventory_inventoryitem "
+    f"BEGIN {DELETE} {INSERT} END",
+    "INSERT INTO inventory_item_fts(inventory_item_fts) VALUES ('rebuild')",
+]
+DROP = [
+    "DROP TRIGGER IF EXISTS inventory_item_fts_ai",
+    "DROP TRIGGER IF EXISTS inventory_item_fts_ad",
+    "DROP TRIGGER IF EXISTS inventory_item_fts_au",
+    "DROP TABLE IF EXISTS inventory_item_fts",
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+# Trigram full-text index over item names and barcodes for item search (SQLite only)
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0018_inventoryitem_barcode_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(INSTALL), run(DROP)),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:07
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Case, ExpressionWrapper, F, FloatField, Min, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Round
+
+
+def rebuild_rollups(apps, schema_editor):
+    # Frozen copy of inventory.rollups.rebuild_rollups, on the historical models
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    Batch = apps.get_model('inventory', 'Batch')
+    zero = Decimal('0')
+    decimal = models.DecimalField(max_digits=16, decimal_places=4)
+    batches = Batch.objects.filter(inventory_item=OuterRef('pk')).order_by().values('inventory_item')
+    quantity = Coalesce(Subquery(batches.annotate(total=Sum('batch_quantity')).values('total')), Value(zero),
+                        output_field=decimal)
+    cost = Coalesce(
+        Subquery(batches.annotate(total=Sum(ExpressionWrapper(
+            F('batch_quantity') * F('batch_unit_cost'), output_field=decimal,
+        ))).values('total')),
+        Value(zero), output_field=decimal,
+    )
+    nearest = Subquery(
+        batches.filter(batch_quantity__gt=0).annotate(nearest=Min('expiration_date')).values('nearest')
+    )
+    InventoryItem.objects.update(on_hand_quantity=quantity, on_hand_cost=cost, nearest_expiration_date=nearest)
+    average = Cast('on_hand_cost', FloatField()) / Cast('on_hand_quantity', FloatField())
+    InventoryItem.objects.update(average_batch_cost=Case(
+        When(on_hand_quantity__gt=0, then=Round(average, 2)), default=Value(zero), output_field=decimal,
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0019_inventoryitem_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='average_batch_cost',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text="Quantity-weighted average unit cost of the item's batches.", max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='nearest_expiration_date',
+            field=models.DateField(blank=True, editable=False, help_text='Earliest expiration date among batches with stock left.', null=True),
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='on_hand_cost',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, help_text="Total cost of the item's batches (quantity x unit cost).", max_digits=16),
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='on_hand_quantity',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text="Total quantity of the item's batches.", max_digits=12),
+        ),
+        migrations.RunPython(rebuild_rollups, migrations.RunPython.noop),
+    ]
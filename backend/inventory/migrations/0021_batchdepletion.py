@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0020_inventoryitem_batch_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatchDepletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=2, help_text='Quantity drawn.', max_digits=10)),
+                ('unit_cost', models.DecimalField(decimal_places=2, default=0, help_text='Unit cost of the batch drawn from.', max_digits=10)),
+                ('reason', models.CharField(choices=[('SALE', 'Sale'), ('ADJUSTMENT', 'Adjustment')], default='SALE', max_length=10)),
+                ('reference', models.CharField(blank=True, help_text="What drew the stock, e.g. 'sale:42'.", max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('batch', models.ForeignKey(blank=True, help_text='Batch drawn from; blank for quantity no batch could cover.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='depletions', to='inventory.batch')),
+                ('inventory_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batch_depletions', to='inventory.inventoryitem')),
+            ],
+            options={
+                'verbose_name': 'Batch Depletion',
+                'verbose_name_plural': 'Batch Depletions',
+                'ordering': ['-created_at', 'pk'],
+                'indexes': [models.Index(fields=['reference'], name='inventory_b_referen_e302ad_idx')],
+            },
+        ),
+    ]
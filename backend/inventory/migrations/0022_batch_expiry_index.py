@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0021_batchdepletion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(fields=['expiration_date', 'inventory_item'], name='inventory_batch_expiry_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:19
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def opening_snapshots(apps, schema_editor):
+    # The ledger starts from every item's current quantity
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    StockSnapshot = apps.get_model('inventory', 'StockSnapshot')
+    taken_at = django.utils.timezone.now()
+    StockSnapshot.objects.bulk_create([
+        StockSnapshot(inventory_item_id=item_id, taken_at=taken_at, quantity=quantity)
+        for item_id, quantity in InventoryItem.objects.order_by().values_list('pk', 'quantity').iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0022_batch_expiry_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.DecimalField(decimal_places=2, help_text='Change in quantity; negative for stock out.', max_digits=12)),
+                ('reason', models.CharField(choices=[('RECEIPT', 'Receipt'), ('SALE', 'Sale'), ('ADJUSTMENT', 'Adjustment'), ('IMPORT', 'Import')], max_length=10)),
+                ('reference', models.CharField(blank=True, help_text="What moved the stock, e.g. 'po:PO-0042'.", max_length=100)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('batch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='inventory.batch')),
+                ('inventory_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='inventory.inventoryitem')),
+            ],
+            options={
+                'verbose_name': 'Stock Movement',
+                'verbose_name_plural': 'Stock Movements',
+                'ordering': ['created_at', 'pk'],
+                'indexes': [models.Index(fields=['inventory_item', 'created_at'], name='inventory_movement_item_idx'), models.Index(fields=['reference'], name='inventory_s_referen_16defd_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField()),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('inventory_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='inventory.inventoryitem')),
+            ],
+            options={
+                'verbose_name': 'Stock Snapshot',
+                'verbose_name_plural': 'Stock Snapshots',
+                'ordering': ['-taken_at'],
+                'constraints': [models.UniqueConstraint(fields=('inventory_item', 'taken_at'), name='inventory_snapshot_item_time')],
+            },
+        ),
+        migrations.RunPython(opening_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0023_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(fields=['inventory_item', 'expiration_date'], name='inventory_batch_item_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['item_name'], name='inventory_item_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['status', 'item_id'], name='inventory_item_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['product_category', 'item_id'], name='inventory_item_category_idx'),
+        ),
+    ]
@@ -1,7 +1,12 @@
 from dateutil.utils import today
 from datetime import timedelta
+from decimal import Decimal
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.utils import timezone
+from .normalization import ISSUE_FIELDS, LEVEL_FIELDS, UPPERCASE_FIELDS, issue_expressions, normalize_item, uppercase_expression
 
 # Category choices
 category_choices = [
@@ -31,6 +36,35 @@ category_choices = [
     ('WIRELESS', 'Wireless')
 ]
 
+# Batch rollups on InventoryItem, maintained by inventory.rollups rather than by item saves
+ROLLUP_FIELDS = ['on_hand_quantity', 'on_hand_cost', 'average_batch_cost', 'nearest_expiration_date']
+
+class InventoryItemQuerySet(models.QuerySet):
+    """
+    Bulk writes that keep the rules `InventoryItem.save` applies (see `inventory.normalization`),
+    so fast paths never need to fall back to saving row by row.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = [normalize_item(obj) for obj in objs]
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        fields = list(fields)
+        objs = [normalize_item(obj, fields) for obj in objs]
+        if set(LEVEL_FIELDS).intersection(fields):
+            fields += [field for field in ISSUE_FIELDS if field not in fields]
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs):
+        for field in UPPERCASE_FIELDS:
+            if field in kwargs:
+                kwargs[field] = uppercase_expression(kwargs[field])
+        if set(LEVEL_FIELDS).intersection(kwargs) and not set(ISSUE_FIELDS).intersection(kwargs):
+            kwargs.update(issue_expressions(*(kwargs.get(field) for field in LEVEL_FIELDS)))
+        return super().update(**kwargs)
+
+
 class InventoryItem(models.Model):
     """
     Represents an item in the inventory with properties to track cost, stock levels, and status.
@@ -57,7 +91,7 @@ class InventoryItem(models.Model):
         help_text = "Quantity for this batch."
     )
 
-    barcode = models.CharField(max_length=255, blank=True, null=True, help_text="Optional barcode identifier.")
+    barcode = models.CharField(max_length=255, blank=True, null=True, db_index=True, help_text="Optional barcode identifier.")
     min_stock_level = models.DecimalField(
         max_digits=10,
         decimal_places=2,
@@ -93,36 +127,64 @@ class InventoryItem(models.Model):
     has_issues = models.BooleanField(default=False, help_text="Indicates if the item has issues needing review.")
     issue_reasons = models.TextField(blank=True, null=True, help_text="Reasons for flagging this item as having issues.")
     last_updated = models.DateTimeField(auto_now=True, help_text="Timestamp of the last update.")
+    # Rollups of the item's batches, maintained by inventory.rollups
+    on_hand_quantity = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False,
+                                           help_text="Total quantity of the item's batches.")
+    on_hand_cost = models.DecimalField(max_digits=16, decimal_places=4, default=0, editable=False,
+                                       help_text="Total cost of the item's batches (quantity x unit cost).")
+    average_batch_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False,
+                                             help_text="Quantity-weighted average unit cost of the item's batches.")
+    nearest_expiration_date = models.DateField(null=True, blank=True, editable=False,
+                                               help_text="Earliest expiration date among batches with stock left.")
+
+    objects = InventoryItemQuerySet.as_manager()
 
     class Meta:
         ordering = ['item_name']
+        indexes = [
+            # Serves the incremental sync API, which pages by (last_updated, item_id)
+            models.Index(fields=['last_updated', 'item_id'], name='inventory_item_changes_idx'),
+            # Name-prefix search ranges over item names, read in name order (see inventory.search)
+            models.Index(fields=['item_name'], name='inventory_item_name_idx'),
+            # The list table's status and category filters, newest first
+            models.Index(fields=['status', 'item_id'], name='inventory_item_status_idx'),
+            models.Index(fields=['product_category', 'item_id'], name='inventory_item_category_idx'),
+        ]
         verbose_name = "Inventory Item"
         verbose_name_plural = "Inventory Items"
 
     def save(self, *args, **kwargs):
-        # Convert specific fields to uppercase before saving
-        self.item_name = self.item_name.upper()
-        self.product_category = self.product_category.upper()
-        self.status = self.status.upper()
-
-        # Flag rows with issues
-        issues = []
-
-        # Check for potential issues
-        if self.min_stock_level > self.max_stock_level:
-            issues.append("Minimum stock level is greater than maximum stock level.")
-
-        if self.min_stock_level < 0 or self.max_stock_level < 0:
-            issues.append("Stock levels cannot be negative.")
-
-        # Set has_issues flag based on detected issues
-        self.has_issues = len(issues) > 0
-
-        # Optionally log issues for later use
-        self.issue_reasons = "; ".join(issues) if issues else None
-        super().save(*args, **kwargs)
+        self.normalize_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'quantity' not in update_fields:
+            super().save(*args, **kwargs)
+            return
+        with transaction.atomic():
+            # The quantity and batch rollups as stored, read under lock: the ledger records what
+            # this write does to the quantity, and the rollups are written back unchanged, even
+            # when the instance was loaded before other stock movements or batch writes
+            stored = None
+            if not self._state.adding:
+                row = InventoryItem.objects.select_for_update().filter(pk=self.pk).values(
+                    'quantity', *ROLLUP_FIELDS).first()
+                if row is not None:
+                    stored = row.pop('quantity')
+                    for field, value in row.items():
+                        setattr(self, field, value)
+            super().save(*args, **kwargs)
+            delta = Decimal(self.quantity or 0) - (stored or 0)
+            if delta:
+                StockMovement.objects.create(inventory_item=self, delta=delta, reason='ADJUSTMENT',
+                                             reference='item:created' if stored is None else 'item:edited')
 
+    def normalize_fields(self):
+        """
+        Apply the data rules enforced on every save: uppercase the name, category and
+        status, and flag stock-level problems in `has_issues`/`issue_reasons`.
 
+        The manager's `bulk_create`/`bulk_update`/`update` apply the same rules.
+        """
+        normalize_item(self)
 
     def __str__(self):
         return f"{self.item_name} (ID: {self.item_id}, {self.measurement_type.capitalize()}-based)"
@@ -150,14 +212,277 @@ class Batch(models.Model):
 
     class Meta:
         ordering = ['expiration_date']
+        indexes = [
+            # Serves the expiration alerts, which range over expiration dates (see inventory.expiration)
+            models.Index(fields=['expiration_date', 'inventory_item'], name='inventory_batch_expiry_idx'),
+            # An item's batches in expiration order, for depletion and the rollups
+            models.Index(fields=['inventory_item', 'expiration_date'], name='inventory_batch_item_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        batch = super().from_db(db, field_names, values)
+        # What the item rollups currently include for this batch; see inventory.rollups
+        if not batch.get_deferred_fields().intersection(['inventory_item_id', 'batch_quantity', 'batch_unit_cost', 'expiration_date']):
+            batch._rollup_state = batch.rollup_state()
+        return batch
+
+    def rollup_state(self):
+        """The part of the batch the item rollups depend on: (item_id, quantity, unit cost, expiration date)."""
+        return (
+            self.inventory_item_id, Decimal(self.batch_quantity or 0), Decimal(self.batch_unit_cost or 0),
+            self.expiration_date,
+        )
 
     def save(self, *args, **kwargs):
+        from .rollups import apply_batch_change
 
         if self.expiration_date and self.expiration_date < today().date():
             raise ValueError("Expiration date cannot be in the past.")
 
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            old = getattr(self, '_rollup_state', None)
+            if old is None and not self._state.adding:
+                previous = Batch.objects.filter(pk=self.pk).first()
+                old = previous and previous.rollup_state()
+            super().save(*args, **kwargs)
+            self._rollup_state = self.rollup_state()
+            apply_batch_change(old, self._rollup_state)
 
     def __str__(self):
         return (f"Batch of {self.inventory_item.item_name}(Unit Cost:{self.batch_unit_cost}) "
                 f"(Expires: {self.expiration_date}, Quantity: {self.batch_quantity})")
+
+
+class BatchDepletion(models.Model):
+    """
+    Stock drawn from a batch by a sale or adjustment, written by `inventory.depletion`.
+
+    A line that asks for more than the item's batches hold records the rest as a shortfall:
+    a depletion with no batch.
+    """
+    REASON_CHOICES = [
+        ('SALE', 'Sale'),
+        ('ADJUSTMENT', 'Adjustment'),
+    ]
+
+    batch = models.ForeignKey(Batch, on_delete=models.SET_NULL, null=True, blank=True, related_name='depletions',
+                              help_text="Batch drawn from; blank for quantity no batch could cover.")
+    inventory_item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='batch_depletions')
+    quantity = models.DecimalField(max_digits=10, decimal_places=2, help_text="Quantity drawn.")
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0,
+                                    help_text="Unit cost of the batch drawn from.")
+    reason = models.CharField(max_length=10, choices=REASON_CHOICES, default='SALE')
+    reference = models.CharField(max_length=100, blank=True, help_text="What drew the stock, e.g. 'sale:42'.")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at', 'pk']
+        indexes = [
+            models.Index(fields=['reference']),
+        ]
+        verbose_name = "Batch Depletion"
+        verbose_name_plural = "Batch Depletions"
+
+    def __str__(self):
+        source = f"batch {self.batch_id}" if self.batch_id else "shortfall"
+        return f"{self.quantity} of {self.inventory_item_id} from {source} ({self.get_reason_display()})"
+
+
+class StockMovement(models.Model):
+    """
+    One change to an item's on-hand quantity, in an append-only ledger (see `inventory.ledger`).
+
+    Movements are never edited or deleted: a correction is another movement. Together with
+    `StockSnapshot`s they answer what was on hand at any past moment.
+    """
+    REASON_CHOICES = [
+        ('RECEIPT', 'Receipt'),
+        ('SALE', 'Sale'),
+        ('ADJUSTMENT', 'Adjustment'),
+        ('IMPORT', 'Import'),
+    ]
+
+    inventory_item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='stock_movements')
+    batch = models.ForeignKey(Batch, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_movements')
+    delta = models.DecimalField(max_digits=12, decimal_places=2, help_text="Change in quantity; negative for stock out.")
+    reason = models.CharField(max_length=10, choices=REASON_CHOICES)
+    reference = models.CharField(max_length=100, blank=True, help_text="What moved the stock, e.g. 'po:PO-0042'.")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['created_at', 'pk']
+        indexes = [
+            # Serves on-hand-at-date lookups: one item's movements over a time range
+            models.Index(fields=['inventory_item', 'created_at'], name='inventory_movement_item_idx'),
+            models.Index(fields=['reference']),
+        ]
+        verbose_name = "Stock Movement"
+        verbose_name_plural = "Stock Movements"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Stock movements cannot be changed; record a correcting movement instead.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Stock movements cannot be deleted; record a correcting movement instead.")
+
+    def __str__(self):
+        return f"{self.delta:+} of {self.inventory_item_id} ({self.get_reason_display()} {self.reference})"
+
+
+class StockSnapshot(models.Model):
+    """
+    An item's on-hand quantity at `taken_at`, the sum of its movements up to then. Taken
+    periodically by `manage.py snapshot_stock`, so on-hand lookups only add up the movements
+    since the latest snapshot.
+    """
+    inventory_item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='stock_snapshots')
+    taken_at = models.DateTimeField()
+    quantity = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        ordering = ['-taken_at']
+        constraints = [
+            models.UniqueConstraint(fields=['inventory_item', 'taken_at'], name='inventory_snapshot_item_time'),
+        ]
+        verbose_name = "Stock Snapshot"
+        verbose_name_plural = "Stock Snapshots"
+
+    def __str__(self):
+        return f"{self.inventory_item_id}: {self.quantity} at {self.taken_at:%Y-%m-%d %H:%M}"
+
+
+class ImportJob(models.Model):
+    """
+    An inventory file import processed in the background by `inventory.import_jobs`.
+
+    The upload is spooled to `file_path` and processed by a local worker pool; progress
+    and counts are written back to this row after every chunk so the upload page can poll
+    `import_job_status`. Rows that fail validation are staged as `ImportRow`s.
+    """
+    KIND_CHOICES = [
+        ('SHEET', 'Inventory spreadsheet'),
+        ('API_CSV', 'API CSV upload'),
+    ]
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('SUCCEEDED', 'Succeeded'),
+        ('FAILED', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default='SHEET')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    file_name = models.CharField(max_length=255, help_text="Name of the uploaded file.")
+    file_path = models.CharField(max_length=500, help_text="Location of the spooled upload on disk.")
+    rows_total = models.PositiveIntegerField(null=True, blank=True, help_text="Estimated number of data rows.")
+    rows_processed = models.PositiveIntegerField(default=0)
+    inserted = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    invalid = models.PositiveIntegerField(default=0)
+    preview = models.BooleanField(default=False,
+                                  help_text="Stage a diff against the catalog instead of writing straight to it.")
+    applied_at = models.DateTimeField(null=True, blank=True, help_text="When a previewed import was applied.")
+    chunk_size = models.PositiveIntegerField(null=True, blank=True,
+                                             help_text="Rows committed per transaction; blank for the default.")
+    chunk_results = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder,
+                                     help_text="Per-chunk outcome of an API CSV import.")
+    error = models.TextField(blank=True, help_text="Error that stopped the import, if any.")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='inventory_import_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Import Job"
+        verbose_name_plural = "Import Jobs"
+
+    @property
+    def is_finished(self):
+        return self.status in ('SUCCEEDED', 'FAILED')
+
+    @property
+    def progress(self):
+        """Percentage of rows processed, or None while the total is unknown."""
+        if self.status == 'SUCCEEDED':
+            return 100
+        if not self.rows_total:
+            return None
+        return min(99, int(self.rows_processed * 100 / self.rows_total))
+
+    def as_dict(self):
+        return {
+            'id': self.pk,
+            'kind': self.kind,
+            'status': self.status,
+            'preview': self.preview,
+            'applied_at': self.applied_at,
+            'file_name': self.file_name,
+            'rows_total': self.rows_total,
+            'rows_processed': self.rows_processed,
+            'progress': self.progress,
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'skipped': self.skipped,
+            'invalid': self.invalid,
+            'chunks': self.chunk_results,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+    def __str__(self):
+        return f"Import #{self.pk} ({self.file_name}, {self.get_status_display()})"
+
+
+class ImportRow(models.Model):
+    """
+    A row from an import staged server-side: either one that could not be saved as
+    uploaded, or, for a previewed import, its diff against the catalog.
+
+    The invalid-row editor pages through invalid rows, saves corrections one row at a time
+    and commits corrected rows in bulk, so no upload data is kept in the session. Preview
+    rows wait in PREVIEW until the import is applied.
+    """
+    STATUS_CHOICES = [
+        ('INVALID', 'Invalid'),
+        ('CORRECTED', 'Corrected'),
+        ('PREVIEW', 'Awaiting apply'),
+        ('COMMITTED', 'Committed'),
+    ]
+    CHANGE_TYPE_CHOICES = [
+        ('NEW', 'New'),
+        ('CHANGED', 'Changed'),
+        ('UNCHANGED', 'Unchanged'),
+        ('CONFLICT', 'Conflict'),
+    ]
+
+    job = models.ForeignKey(ImportJob, on_delete=models.CASCADE, related_name='rows')
+    row_number = models.PositiveIntegerField(help_text="Row number in the uploaded file (the header is row 1).")
+    data = models.JSONField(encoder=DjangoJSONEncoder, help_text="Cleaned column values for the row.")
+    reasons = models.TextField(blank=True, help_text="Why the row cannot be saved as it is.")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='INVALID')
+    change_type = models.CharField(max_length=10, choices=CHANGE_TYPE_CHOICES, blank=True,
+                                   help_text="How a previewed row compares with the catalog.")
+    item = models.ForeignKey(InventoryItem, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+                             help_text="Existing item a previewed row would update.")
+    changes = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder,
+                               help_text="Field-level changes of a previewed row: {field: {old, new}}.")
+
+    class Meta:
+        ordering = ['job', 'row_number']
+        indexes = [
+            models.Index(fields=['job', 'status', 'row_number']),
+            models.Index(fields=['job', 'change_type', 'row_number']),
+        ]
+        verbose_name = "Import Row"
+        verbose_name_plural = "Import Rows"
+
+    def __str__(self):
+        return f"Import #{self.job_id}, row {self.row_number} ({self.get_status_display()})"
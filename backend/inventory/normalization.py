@@ -0,0 +1,121 @@
+"""
+The data rules every `InventoryItem` write goes through: the name, category and status are
+stored upper-case, and items whose stock levels are inconsistent are flagged in
+`has_issues`/`issue_reasons`.
+
+The rules are written once per kind of input, so every write path stores the same values:
+
+- `normalize_item` applies them to one item (or a dict of its fields); `InventoryItem.save`
+  and the manager's `bulk_create`/`bulk_update` use it,
+- `normalize_frame` applies them column-wise to a DataFrame of uploaded rows,
+- `issue_expressions` turns them into SQL for `InventoryItem.objects.update`.
+"""
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from django.db.models import BooleanField, Case, CharField, DecimalField, F, Q, Value, When
+from django.db.models.functions import Upper
+from django.db.models.lookups import GreaterThan, LessThan
+
+UPPERCASE_FIELDS = ['item_name', 'product_category', 'status']
+# Fields the issue flags are derived from, and the fields derived
+LEVEL_FIELDS = ['min_stock_level', 'max_stock_level']
+ISSUE_FIELDS = ['has_issues', 'issue_reasons']
+# Model defaults, for rows that leave the stock levels out
+DEFAULT_LEVELS = {'min_stock_level': 1, 'max_stock_level': 100}
+
+INVERTED_LEVELS = "Minimum stock level is greater than maximum stock level."
+NEGATIVE_LEVELS = "Stock levels cannot be negative."
+
+
+def stock_level_issues(min_level, max_level):
+    """The issue reasons for one item's stock levels, in the order they are reported."""
+    issues = []
+    if min_level > max_level:
+        issues.append(INVERTED_LEVELS)
+    if min_level < 0 or max_level < 0:
+        issues.append(NEGATIVE_LEVELS)
+    return issues
+
+
+def normalize_item(item, fields=None):
+    """
+    Apply the rules to an `InventoryItem` or a dict of item fields, in place; returns it.
+    With `fields`, only the rules that touch those fields are applied, so a partial write
+    does not read fields it is not writing.
+    """
+    uppercase = [field for field in UPPERCASE_FIELDS if fields is None or field in fields]
+    levels = fields is None or bool(set(LEVEL_FIELDS).intersection(fields))
+    get = item.get if isinstance(item, dict) else partial(getattr, item)
+    set_ = item.__setitem__ if isinstance(item, dict) else partial(setattr, item)
+
+    for field in uppercase:
+        value = get(field)
+        if isinstance(value, str):
+            set_(field, value.upper())
+    if levels:
+        issues = stock_level_issues(*(get(field, DEFAULT_LEVELS[field]) for field in LEVEL_FIELDS))
+        set_('has_issues', bool(issues))
+        set_('issue_reasons', '; '.join(issues) or None)
+    return item
+
+
+def normalize_frame(data):
+    """
+    Return a copy of `data` (one row per item) with the rules applied column-wise: the
+    upper-case fields upper-cased, and `has_issues`/`issue_reasons` columns added.
+    """
+    data = data.copy()
+    for field in UPPERCASE_FIELDS:
+        if field in data:
+            data[field] = data[field].where(data[field].isna(), data[field].astype(str).str.upper())
+    levels = [
+        pd.to_numeric(data[field], errors='coerce').fillna(DEFAULT_LEVELS[field]) if field in data
+        else pd.Series(DEFAULT_LEVELS[field], index=data.index)
+        for field in LEVEL_FIELDS
+    ]
+    inverted = levels[0] > levels[1]
+    negative = (levels[0] < 0) | (levels[1] < 0)
+    data['has_issues'] = inverted | negative
+    data['issue_reasons'] = pd.Series(
+        np.select([inverted & negative, inverted, negative],
+                  [f"{INVERTED_LEVELS}; {NEGATIVE_LEVELS}", INVERTED_LEVELS, NEGATIVE_LEVELS], default=''),
+        index=data.index,
+    ).replace('', None)
+    return data
+
+
+def uppercase_expression(value):
+    """`value` as an UPDATE would store it: strings upper-cased, expressions wrapped in UPPER()."""
+    if isinstance(value, str):
+        return value.upper()
+    if hasattr(value, 'resolve_expression'):
+        return Upper(value)
+    return value
+
+
+def issue_expressions(min_level=None, max_level=None):
+    """
+    SQL for `has_issues` and `issue_reasons` given the stock levels an UPDATE sets (values or
+    expressions); a level left as None is the row's current one.
+    """
+    levels = []
+    for value, field in ((min_level, 'min_stock_level'), (max_level, 'max_stock_level')):
+        if value is None:
+            value = F(field)
+        elif not hasattr(value, 'resolve_expression'):
+            value = Value(value, output_field=DecimalField(max_digits=10, decimal_places=2))
+        levels.append(value)
+    inverted = Q(GreaterThan(levels[0], levels[1]))
+    negative = Q(LessThan(levels[0], 0)) | Q(LessThan(levels[1], 0))
+    return {
+        'has_issues': Case(When(inverted | negative, then=Value(True)), default=Value(False),
+                           output_field=BooleanField()),
+        'issue_reasons': Case(
+            When(inverted & negative, then=Value(f"{INVERTED_LEVELS}; {NEGATIVE_LEVELS}")),
+            When(inverted, then=Value(INVERTED_LEVELS)),
+            When(negative, then=Value(NEGATIVE_LEVELS)),
+            default=Value(None), output_field=CharField(),
+        ),
+    }
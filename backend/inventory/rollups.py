@@ -0,0 +1,115 @@
+"""
+Per-item rollups of an item's batches, stored on `InventoryItem` so list pages and the API
+read plain columns instead of aggregating over `Batch` on every request:
+
+- `on_hand_quantity`: total quantity of the item's batches,
+- `on_hand_cost`: total cost of that quantity (quantity x unit cost, summed over batches),
+- `average_batch_cost`: the quantity-weighted average unit cost, `on_hand_cost / on_hand_quantity`,
+- `nearest_expiration_date`: the earliest expiration date among batches with stock left.
+
+`Batch.save` and batch deletes apply their change to the rollups in the same transaction
+as the batch write. Quantity and cost are adjusted by the batch's delta; the nearest
+expiration date is only recomputed (one indexed MIN over the item's batches) when the
+change could have moved it later. Writes that bypass the model (`Batch.objects.update`,
+`bulk_create`) do not update the rollups; `manage.py rebuild_batch_rollups` recomputes them.
+Item saves re-read the rollups under lock and write them back as stored, so a stale item
+instance cannot overwrite them.
+
+Rollup writes bump the item's `last_updated`, like any other change to the item, so the
+sync feed (`inventory.sync`) and its ETags pick them up.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db.models import (
+    Case, DecimalField, ExpressionWrapper, F, FloatField, Min, OuterRef, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Cast, Coalesce, Round
+from django.utils import timezone
+
+from .models import ROLLUP_FIELDS, Batch, InventoryItem
+
+ZERO = Decimal('0')
+
+
+def average_cost(quantity, cost):
+    if quantity <= 0:
+        return ZERO
+    return (cost / quantity).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def apply_batch_change(old, new):
+    """
+    Adjust item rollups for a batch going from state `old` to state `new` (tuples from
+    `Batch.rollup_state`; None for a batch being created or deleted). Call inside the batch
+    write's transaction.
+    """
+    if old == new:
+        return
+    if old is not None and new is not None and old[0] != new[0]:
+        # The batch moved to another item: it leaves one and joins the other
+        apply_batch_change(old, None)
+        apply_batch_change(None, new)
+        return
+
+    item_id = (new or old)[0]
+    _, old_quantity, old_cost, old_expiration = old or (item_id, ZERO, ZERO, None)
+    _, new_quantity, new_cost, new_expiration = new or (item_id, ZERO, ZERO, None)
+
+    item = InventoryItem.objects.select_for_update().only(*ROLLUP_FIELDS).filter(pk=item_id).first()
+    if item is None:
+        # The item itself is being deleted
+        return
+    quantity = item.on_hand_quantity + new_quantity - old_quantity
+    cost = item.on_hand_cost + new_quantity * new_cost - old_quantity * old_cost
+    nearest = item.nearest_expiration_date
+
+    old_counts = old_expiration is not None and old_quantity > 0
+    new_counts = new_expiration is not None and new_quantity > 0
+    if old_counts and old_expiration == nearest and (not new_counts or new_expiration > old_expiration):
+        # The batch held the nearest date, and it is leaving: find the next one
+        nearest = nearest_expiration(Batch.objects.filter(inventory_item_id=item_id))
+    elif new_counts and (nearest is None or new_expiration < nearest):
+        nearest = new_expiration
+
+    InventoryItem.objects.filter(pk=item_id).update(
+        on_hand_quantity=quantity,
+        on_hand_cost=cost,
+        average_batch_cost=average_cost(quantity, cost),
+        nearest_expiration_date=nearest,
+        last_updated=timezone.now(),
+    )
+
+
+def nearest_expiration(batches):
+    return batches.filter(batch_quantity__gt=0).aggregate(nearest=Min('expiration_date'))['nearest']
+
+
+def rebuild_rollups(items=None, batches=None):
+    """
+    Recompute the rollups of `items` (all items by default) from `batches` (all of their
+    batches by default) with two UPDATE statements. Returns the number of items updated.
+    """
+    items = InventoryItem.objects.all() if items is None else items
+    batches = Batch.objects.all() if batches is None else batches
+    batches = batches.filter(inventory_item=OuterRef('pk')).order_by().values('inventory_item')
+    decimal = DecimalField(max_digits=16, decimal_places=4)
+    quantity = Coalesce(Subquery(batches.annotate(total=Sum('batch_quantity')).values('total')), Value(ZERO),
+                        output_field=decimal)
+    cost = Coalesce(
+        Subquery(batches.annotate(total=Sum(ExpressionWrapper(
+            F('batch_quantity') * F('batch_unit_cost'), output_field=decimal,
+        ))).values('total')),
+        Value(ZERO), output_field=decimal,
+    )
+    nearest = Subquery(
+        batches.filter(batch_quantity__gt=0).annotate(nearest=Min('expiration_date')).values('nearest')
+    )
+    updated = items.update(on_hand_quantity=quantity, on_hand_cost=cost, nearest_expiration_date=nearest,
+                           last_updated=timezone.now())
+    # A second statement, so the average sees the new totals; REAL division, as SQLite
+    # divides integer-valued decimals as integers
+    average = Cast('on_hand_cost', FloatField()) / Cast('on_hand_quantity', FloatField())
+    items.update(average_batch_cost=Case(
+        When(on_hand_quantity__gt=0, then=Round(average, 2)), default=Value(ZERO), output_field=decimal,
+    ))
+    return updated
@@ -0,0 +1,90 @@
+"""
+In-process cache for register barcode scans.
+
+Maps a barcode to the few fields a register needs to ring an item up. Entries are kept in
+LRU order up to `INVENTORY_SCAN_CACHE_SIZE`, shared by every thread of the process and
+guarded by one lock, so a hit costs a dict lookup. Unknown barcodes are cached too, so a
+lane scanning an unlisted product does not query the database on every retry.
+
+Saves and deletes of `InventoryItem` invalidate entries through `inventory.signals`; bulk
+writes, which send no model signals, send `items_bulk_changed` and clear the cache. Each
+process has its own cache and only sees its own invalidations, so entries also expire
+after `INVENTORY_SCAN_CACHE_TTL` seconds to bound staleness across server processes.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import InventoryItem
+
+SCAN_FIELDS = ('item_id', 'item_name', 'unit_price', 'measurement_type', 'status')
+
+_MISSING = object()
+
+
+class ScanCache:
+    def __init__(self, max_size=None, ttl=None):
+        self.max_size = max_size or getattr(settings, 'INVENTORY_SCAN_CACHE_SIZE', 50000)
+        self.ttl = ttl if ttl is not None else getattr(settings, 'INVENTORY_SCAN_CACHE_TTL', 60)
+        self._entries = OrderedDict()  # barcode -> (expires_at, entry or None)
+        self._barcodes_by_item = {}  # item_id -> barcode, to drop an entry when its barcode changes
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, so a lookup that raced one does not cache what it read
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, barcode):
+        """Return the cached entry (None for a known-unknown barcode), or `_MISSING`."""
+        with self._lock:
+            cached = self._entries.get(barcode)
+            if cached is None or cached[0] < time.monotonic():
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(barcode)
+            self.hits += 1
+            return cached[1]
+
+    def put(self, barcode, entry, generation=None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[barcode] = (time.monotonic() + self.ttl, entry)
+            self._entries.move_to_end(barcode)
+            if entry is not None:
+                self._barcodes_by_item[entry['item_id']] = barcode
+            while len(self._entries) > self.max_size:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                if evicted is not None:
+                    self._barcodes_by_item.pop(evicted['item_id'], None)
+
+    def invalidate(self, barcode=None, item_id=None):
+        """Drop the entry for `barcode` and whatever barcode `item_id` was cached under."""
+        with self._lock:
+            self.generation += 1
+            stale = {barcode, self._barcodes_by_item.pop(item_id, None)} - {None}
+            for key in stale:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._barcodes_by_item.clear()
+
+
+scan_cache = ScanCache()
+
+
+def lookup_barcode(barcode):
+    """Return the scan entry for an exact barcode, or None when no item has it."""
+    entry = scan_cache.get(barcode)
+    if entry is not _MISSING:
+        return entry
+    generation = scan_cache.generation
+    # Barcodes are not unique; the oldest item wins, as when a bulk upload matches barcodes
+    entry = InventoryItem.objects.filter(barcode=barcode).order_by('item_id').values(*SCAN_FIELDS).first()
+    scan_cache.put(barcode, entry, generation)
+    return entry
@@ -0,0 +1,124 @@
+"""
+Ranked item search for the type-ahead boxes (`search_items`).
+
+On SQLite, item names and barcodes are kept in a trigram FTS5 index (`ITEM_INDEX`, see
+`inventory_management.search_index`), which answers substring and prefix queries without
+scanning the item table. Results are ranked:
+
+1. exact barcode (or item ID) matches,
+2. names starting with the query,
+3. any other match, best FTS rank first,
+
+and never exceed a hard limit. Queries the trigram index cannot answer (under three
+characters) and other database backends fall back to an indexed exact match plus a
+name-prefix range over the name index, with the same ranking and limit.
+
+Results go through a prefix-narrowing `TypeaheadCache`, so the keystrokes of one search
+mostly avoid the database.
+"""
+from functools import partial
+from operator import itemgetter
+
+from django.conf import settings
+from django.db.models import Q
+
+from inventory_management.search_index import (
+    SearchIndex, clamp_limit, like_prefix, match_expression, matches_terms, normalize_query, prefix_upper_bound,
+    search_terms,
+)
+from inventory_management.typeahead import TypeaheadCache
+from .models import InventoryItem
+
+SEARCH_FIELDS = (
+    'item_id', 'item_name', 'unit_cost', 'barcode', 'min_stock_level', 'max_stock_level',
+    'product_category', 'status',
+)
+ITEM_INDEX = SearchIndex('inventory_item_fts', InventoryItem, ['item_name', 'barcode'])
+# Cleared by inventory.signals whenever items are written
+search_cache = TypeaheadCache()
+
+
+def default_limit():
+    return getattr(settings, 'INVENTORY_SEARCH_RESULTS', 20)
+
+
+def max_limit():
+    return getattr(settings, 'INVENTORY_SEARCH_MAX_RESULTS', 50)
+
+
+def search_items(query, limit=None):
+    """Return up to `limit` item dicts (`SEARCH_FIELDS`) matching `query`, best first."""
+    query = normalize_query(query)
+    limit = clamp_limit(limit, default_limit(), max_limit())
+    if not query:
+        return []
+    match = match_expression(query)
+    if match is not None and ITEM_INDEX.supported():
+        fetch = partial(_search_fts, query, match)
+    else:
+        fetch = partial(_search_prefix, query)
+    return search_cache.search(query, limit, fetch, partial(_narrow, query=query))
+
+
+def _narrow(prefix, rows, query):
+    """Filter the complete result for `prefix` down to `query`, re-ranked as `_search_fts` would."""
+    # Digit-only queries also match item IDs exactly, which the index does not hold
+    if query.isdigit() or not ITEM_INDEX.supported() or match_expression(prefix) is None:
+        return None
+    terms = search_terms(query)
+    matches = [
+        row for row in rows
+        if row['barcode'] == query or matches_terms([row['item_name'], row['barcode']], terms)
+    ]
+    # A stable sort keeps the index's relevance order within each rank
+    return sorted(matches, key=lambda row: _rank(row, query))
+
+
+def _rank(row, query):
+    if row['barcode'] == query:
+        return 0
+    if row['item_name'].lower().startswith(query.lower()):
+        return 1
+    return 2
+
+
+def _search_fts(query, match, limit):
+    columns = ', '.join(f'i.{field}' for field in SEARCH_FIELDS)
+    sql = f"""
+        SELECT {columns} FROM (
+            SELECT rowid, rank FROM {ITEM_INDEX.name} WHERE {ITEM_INDEX.name} MATCH %s
+            UNION ALL
+            SELECT item_id, 0 FROM {ITEM_INDEX.table} WHERE barcode = %s OR item_id = %s
+        ) AS hits
+        JOIN {ITEM_INDEX.table} AS i ON i.item_id = hits.rowid
+        GROUP BY i.item_id
+        ORDER BY
+            CASE
+                WHEN i.barcode = %s OR i.item_id = %s THEN 0
+                WHEN i.item_name LIKE %s ESCAPE '\\' THEN 1
+                ELSE 2
+            END,
+            min(hits.rank), i.item_name
+        LIMIT %s
+    """
+    item_id = int(query) if query.isdigit() else None
+    # A raw queryset runs values through the model fields, so they match what .values() returns
+    items = InventoryItem.objects.raw(sql, [match, query, item_id, query, item_id, like_prefix(query), limit])
+    return [{field: getattr(item, field) for field in SEARCH_FIELDS} for item in items]
+
+
+def _search_prefix(query, limit):
+    exact = Q(barcode=query)
+    if query.isdigit():
+        exact |= Q(item_id=int(query))
+    matches = sorted(InventoryItem.objects.filter(exact).order_by().values(*SEARCH_FIELDS),
+                     key=itemgetter('item_name'))[:limit]
+    # Names are stored upper-case, so a case-insensitive prefix match is a range over the name
+    # index, which also returns the names in order
+    prefix = query.upper()
+    matches += (
+        InventoryItem.objects.filter(item_name__gte=prefix, item_name__lt=prefix_upper_bound(prefix))
+        .exclude(item_id__in=[row['item_id'] for row in matches])
+        .order_by('item_name').values(*SEARCH_FIELDS)[:limit - len(matches)]
+    )
+    return matches
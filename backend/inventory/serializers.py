@@ -12,5 +12,7 @@ class InventoryItemSerializer(serializers.ModelSerializer):
         fields = [
             'item_id', 'item_name', 'unit_cost', 'unit_price', 'quantity',
             'barcode', 'min_stock_level', 'max_stock_level', 'product_category',
-            'status', 'last_updated', 'inventory_total_cost', 'inventory_total_value'
+            'status', 'last_updated', 'inventory_total_cost', 'inventory_total_value',
+            'on_hand_quantity', 'average_batch_cost', 'nearest_expiration_date',
         ]
+        read_only_fields = ['on_hand_quantity', 'average_batch_cost', 'nearest_expiration_date']
@@ -0,0 +1,57 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from .models import Batch, InventoryItem
+from .rollups import apply_batch_change
+from .scan_cache import scan_cache
+from .search import search_cache
+from .valuation import summary_cache
+
+# Sent by code that writes items with bulk_create/bulk_update/update, which skip post_save
+items_bulk_changed = Signal()
+
+
+def _invalidate(barcode, item_id):
+    scan_cache.invalidate(barcode=barcode, item_id=item_id)
+    search_cache.clear()
+    summary_cache.clear()
+    # Again once the change is visible to other connections, in case a scan or search
+    # re-cached the old row while the transaction was still open
+    transaction.on_commit(lambda: scan_cache.invalidate(barcode=barcode, item_id=item_id))
+    transaction.on_commit(search_cache.clear)
+    transaction.on_commit(summary_cache.clear)
+
+
+@receiver(post_save, sender=InventoryItem)
+def invalidate_scan_cache_on_save(sender, instance, **kwargs):
+    _invalidate(instance.barcode, instance.item_id)
+
+
+@receiver(post_delete, sender=InventoryItem)
+def invalidate_scan_cache_on_delete(sender, instance, **kwargs):
+    _invalidate(instance.barcode, instance.item_id)
+
+
+@receiver(items_bulk_changed)
+def clear_item_caches(sender, **kwargs):
+    scan_cache.clear()
+    search_cache.clear()
+    summary_cache.clear()
+    transaction.on_commit(scan_cache.clear)
+    transaction.on_commit(search_cache.clear)
+    transaction.on_commit(summary_cache.clear)
+
+
+@receiver(post_save, sender=Batch)
+def invalidate_summary_on_batch_save(sender, instance, **kwargs):
+    # Batch.save has just rewritten the item rollups that the valuation totals
+    summary_cache.clear()
+    transaction.on_commit(summary_cache.clear)
+
+
+@receiver(post_delete, sender=Batch)
+def remove_batch_from_rollups(sender, instance, **kwargs):
+    # Runs inside the delete's transaction, for single and queryset deletes alike
+    apply_batch_change(getattr(instance, '_rollup_state', None) or instance.rollup_state(), None)
+    summary_cache.clear()
+    transaction.on_commit(summary_cache.clear)
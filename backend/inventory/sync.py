@@ -0,0 +1,129 @@
+"""
+Incremental inventory sync for register terminals and the web frontend.
+
+Clients keep the `next_cursor` of their last sync and ask only for items whose
+`last_updated` is later. The cursor is the ``(last_updated, item_id)`` position of the last
+item a client has seen, so items sharing a timestamp are neither skipped nor repeated
+across pages, and every page is an index range scan on ``(last_updated, item_id)``:
+a sync costs in proportion to what changed, not to the size of the catalog.
+
+`last_updated` is stamped when a row is written, not when its transaction commits, so a
+slow transaction (an import chunk, say) can commit rows stamped before a cursor a client
+already holds. The cursor ending a sync is therefore marked caught up, and the next sync
+from it re-reads the `INVENTORY_SYNC_OVERLAP` seconds before its position. Every change
+committed within that long of being stamped reaches clients, some of them twice: clients
+apply items by `item_id`, so a repeat is harmless. Cursors between the pages of a sync are
+exact, so paging always moves forward.
+
+Deactivated items come back as tombstones (id and timestamp only) so clients can drop them.
+"""
+import base64
+import binascii
+import hashlib
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import InventoryItem
+
+
+def default_page_size():
+    return getattr(settings, 'INVENTORY_SYNC_PAGE_SIZE', 500)
+
+
+def max_page_size():
+    return getattr(settings, 'INVENTORY_SYNC_MAX_PAGE_SIZE', 5000)
+
+
+def sync_overlap():
+    return timedelta(seconds=getattr(settings, 'INVENTORY_SYNC_OVERLAP', 60))
+
+
+@dataclass(frozen=True)
+class SyncPosition:
+    last_updated: object
+    item_id: int = 0
+    caught_up: bool = False
+
+    def encode(self):
+        raw = f"{self.last_updated.isoformat()}|{self.item_id}|{int(self.caught_up)}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def resume_from(self):
+        """The position to read after: `sync_overlap()` earlier for a caught-up cursor."""
+        overlap = sync_overlap()
+        if not self.caught_up or not overlap:
+            return self
+        return SyncPosition(self.last_updated - overlap)
+
+    def key(self):
+        return self.last_updated, self.item_id
+
+    @classmethod
+    def parse(cls, value):
+        """
+        Read a `since` value: a cursor returned by a previous sync, or an ISO 8601 timestamp.
+
+        Raises ValueError when it is neither.
+        """
+        timestamp = parse_datetime(value)
+        if timestamp is not None:
+            return cls(cls._aware(timestamp))
+        try:
+            raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode()
+            timestamp, item_id, *caught_up = raw.split('|')
+            return cls(cls._aware(parse_datetime(timestamp)), int(item_id), caught_up == ['1'])
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+            raise ValueError(f"'{value}' is neither a sync cursor nor an ISO 8601 timestamp.")
+
+    @staticmethod
+    def _aware(timestamp):
+        if timestamp is None:
+            raise ValueError("Missing timestamp.")
+        return timezone.make_aware(timestamp) if timezone.is_naive(timestamp) else timestamp
+
+
+def catalog_version():
+    """Latest `last_updated` in the catalog (a single index lookup), or None when it is empty."""
+    return InventoryItem.objects.order_by().aggregate(latest=Max('last_updated'))['latest']
+
+
+def sync_etag(since, limit, version):
+    """ETag for a sync page: the same request against an unchanged catalog gives the same page."""
+    key = f"{since or ''}:{limit}:{version.isoformat() if version else ''}"
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def changed_items(position=None, limit=None):
+    """
+    Return one page of items changed after `position` (less the overlap, when it is caught
+    up), oldest change first, and the cursor to resume from. Fetches one extra row to tell
+    whether more pages follow; the cursor after the last page is caught up.
+    """
+    limit = limit or default_page_size()
+    items = InventoryItem.objects.order_by('last_updated', 'item_id')
+    if position is not None:
+        start = position.resume_from()
+        items = items.filter(
+            Q(last_updated__gt=start.last_updated)
+            | Q(last_updated=start.last_updated, item_id__gt=start.item_id)
+        )
+    page = list(items[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+    last = SyncPosition(page[-1].last_updated, page[-1].item_id) if page else None
+    if has_more:
+        return page, last, has_more
+    # Re-reading the overlap must never move a caught-up cursor backwards
+    if position is not None and (last is None or position.key() > last.key()):
+        last = position
+    next_position = SyncPosition(last.last_updated, last.item_id, caught_up=True) if last else None
+    return page, next_position, has_more
+
+
+def is_tombstone(item):
+    return item.status.upper() == 'INACTIVE'
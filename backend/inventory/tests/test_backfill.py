@@ -0,0 +1,47 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase
+from ..backfill import backfill_batches
+from ..models import Batch, InventoryItem
+
+
+class BatchBackfillTests(TestCase):
+    def setUp(self):
+        self.items = [
+            InventoryItem.objects.create(item_name=f'Item {n}', unit_cost=Decimal('1.25'), unit_price=2, quantity=n)
+            for n in range(6)
+        ]
+        # Already has a batch, and item 0 has no stock: neither is backfilled
+        Batch.objects.create(inventory_item=self.items[1], batch_quantity=7, batch_unit_cost=1,
+                             expiration_date=date(2030, 1, 1))
+
+    def test_backfills_in_chunks_and_updates_rollups(self):
+        progress = []
+        created = backfill_batches(chunk_size=2, progress=lambda done, total: progress.append((done, total)))
+
+        self.assertEqual(created, 4)
+        self.assertEqual(progress, [(2, 4), (4, 4)])
+        item = InventoryItem.objects.get(pk=self.items[5].pk)
+        self.assertEqual((item.on_hand_quantity, item.average_batch_cost), (5, Decimal('1.25')))
+        self.assertEqual(Batch.objects.filter(inventory_item=self.items[1]).count(), 1)
+        self.assertFalse(Batch.objects.filter(inventory_item=self.items[0]).exists())
+
+    def test_resumes_after_an_interrupted_run(self):
+        # The second chunk fails: the first stays committed, and a re-run only does the rest
+        with mock.patch('inventory.backfill.rebuild_rollups', side_effect=[1, RuntimeError('lost connection')]):
+            with self.assertRaises(RuntimeError):
+                backfill_batches(chunk_size=2)
+        self.assertEqual(Batch.objects.count(), 3)
+
+        self.assertEqual(backfill_batches(chunk_size=2), 2)
+        self.assertEqual(backfill_batches(chunk_size=2), 0)
+        self.assertEqual(Batch.objects.count(), 5)
+
+    def test_command_reports_progress(self):
+        out = StringIO()
+        call_command('backfill_batches', chunk_size=3, stdout=out)
+        self.assertIn('3/4 item(s) backfilled', out.getvalue())
+        self.assertIn('Created 4 batch(es).', out.getvalue())
@@ -0,0 +1,62 @@
+from django.test import TestCase
+from ..bulk_upsert import bulk_upsert_items, clean_barcode
+from ..models import InventoryItem
+
+
+def make_row(**overrides):
+    row = {
+        'item_name': 'Cola', 'unit_cost': 1.0, 'unit_price': 2.0, 'quantity': 10.0,
+        'barcode': '111', 'min_stock_level': 1.0, 'max_stock_level': 100.0,
+        'product_category': 'Beverage', 'measurement_type': 'count', 'status': 'Active',
+    }
+    row.update(overrides)
+    return row
+
+
+class BulkUpsertTests(TestCase):
+    def test_inserts_updates_and_skips_duplicates(self):
+        existing = InventoryItem.objects.create(item_name="Old Cola", unit_cost=1, unit_price=1, barcode="111")
+
+        report = bulk_upsert_items([
+            make_row(item_name='New Cola', unit_price=2.5),
+            make_row(barcode='222', item_name='Chips'),
+            make_row(barcode='111', item_name='Duplicate Cola'),
+            make_row(barcode=None, item_name='Loose Candy'),
+        ])
+
+        self.assertEqual((report.inserted, report.updated, report.skipped), (2, 1, 1))
+        existing.refresh_from_db()
+        self.assertEqual(existing.item_name, 'NEW COLA')
+        self.assertEqual(float(existing.unit_price), 2.5)
+        self.assertEqual(InventoryItem.objects.count(), 3)
+        self.assertEqual(InventoryItem.objects.get(barcode='222').product_category, 'BEVERAGE')
+
+    def test_flags_issues_like_save(self):
+        bulk_upsert_items([make_row(min_stock_level=50.0, max_stock_level=5.0)])
+        item = InventoryItem.objects.get(barcode='111')
+        self.assertTrue(item.has_issues)
+        self.assertIn("Minimum stock level", item.issue_reasons)
+
+    def test_updates_leave_fields_the_row_does_not_carry(self):
+        existing = InventoryItem.objects.create(item_name='Cheese', unit_cost=1, unit_price=1, barcode='555',
+                                                measurement_type='weight', status='INACTIVE')
+        row = make_row(barcode='555', item_name='Cheddar')
+        del row['measurement_type'], row['status']
+
+        bulk_upsert_items([row])
+
+        existing.refresh_from_db()
+        self.assertEqual((existing.item_name, existing.measurement_type, existing.status), ('CHEDDAR', 'weight', 'INACTIVE'))
+
+    def test_query_count_does_not_grow_with_rows(self):
+        rows = [make_row(barcode=str(n), item_name=f'Item {n}') for n in range(200)]
+        # savepoint + barcode map + per batch one INSERT and one stock ledger INSERT + release
+        with self.assertNumQueries(11):
+            bulk_upsert_items(rows, batch_size=50)
+        self.assertEqual(InventoryItem.objects.count(), 200)
+
+    def test_clean_barcode(self):
+        self.assertEqual(clean_barcode(123456789.0), '123456789')
+        self.assertIsNone(clean_barcode(float('nan')))
+        self.assertIsNone(clean_barcode('  '))
+        self.assertEqual(clean_barcode(' 0042 '), '0042')
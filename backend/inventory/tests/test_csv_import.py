@@ -0,0 +1,77 @@
+import tempfile
+from io import BytesIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from ..csv_import import import_inventory_csv
+from ..import_jobs import run_import_job, start_import_job
+from ..models import InventoryItem
+
+HEADER = 'item_id,item_name,unit_cost,unit_price,quantity,barcode,min_level,max_level,category,status'
+
+
+def api_csv(lines):
+    return '\n'.join([HEADER] + lines).encode('utf-8') + b'\n'
+
+
+class ApiCsvImportTests(TestCase):
+    def setUp(self):
+        self.existing = InventoryItem.objects.create(item_name='Cola', unit_cost=1, unit_price=2, quantity=3)
+
+    def test_upserts_by_item_id_in_chunks(self):
+        content = api_csv([
+            f'{self.existing.item_id},Cola Zero,1,2.5,7,111,1,10,Beverage,Active',
+            '900,Chips,1,2,5,222,1,10,Snacks,',
+            '901,,1,2,5,,1,10,Snacks,Active',
+            '900,Chips XL,1,3,5,222,1,10,Snacks,Active',
+        ])
+
+        # Per chunk: one lookup, a savepoint pair, one INSERT and/or UPDATE, and the stock
+        # ledger's read of the stored quantities plus its INSERT when any quantity changed
+        with self.assertNumQueries(12):
+            results = import_inventory_csv(BytesIO(content), chunk_size=2)
+
+        self.assertEqual(
+            [(r.first_row, r.last_row, r.inserted, r.updated, r.invalid) for r in results],
+            [(2, 3, 1, 1, 0), (4, 5, 0, 1, 1)],
+        )
+        self.assertEqual(results[1].errors, [{'row': 4, 'reasons': 'Item name is required.'}])
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.item_name, self.existing.quantity), ('COLA ZERO', 7))
+        chips = InventoryItem.objects.get(item_id=900)
+        self.assertEqual((chips.item_name, chips.unit_price, chips.status), ('CHIPS XL', 3, 'ACTIVE'))
+
+    def test_last_row_for_an_item_id_wins_within_a_chunk(self):
+        content = api_csv(['900,Chips,1,2,5,,1,10,Snacks,Active', '900,Chips XL,1,3,5,,1,10,Snacks,Active'])
+        [result] = import_inventory_csv(BytesIO(content))
+        self.assertEqual((result.inserted, result.skipped), (1, 1))
+        self.assertEqual(InventoryItem.objects.get(item_id=900).item_name, 'CHIPS XL')
+
+    def test_dry_run_writes_nothing(self):
+        content = api_csv(['900,Chips,1,2,5,,1,10,Snacks,Active', 'x,Gum,1,2', '901,Gum,1,2,5,,1,10,Furniture,Active'])
+        response = self.client.post(
+            reverse('inventoryitem-upload') + '?dry_run=1', {'file': SimpleUploadedFile('items.csv', content)},
+        )
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(body['valid'])
+        self.assertEqual(body['chunks'][0]['inserted'], 1)
+        self.assertEqual([error['row'] for error in body['chunks'][0]['errors']], [3, 4])
+        self.assertFalse(InventoryItem.objects.filter(item_id=900).exists())
+
+    def test_rejects_bad_chunk_size(self):
+        response = self.client.post(
+            reverse('inventoryitem-upload') + '?chunk_size=0', {'file': SimpleUploadedFile('items.csv', b'')},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_background_job_records_chunk_results(self):
+        with tempfile.TemporaryDirectory() as spool, override_settings(INVENTORY_IMPORT_SPOOL_DIR=spool):
+            upload = SimpleUploadedFile('items.csv', api_csv([
+                '900,Chips,1,2,5,,1,10,Snacks,Active', '901,Gum,1,2,5,,1,10,Candy,Active',
+            ]))
+            job = run_import_job(start_import_job(upload, kind='API_CSV', chunk_size=1).pk)
+
+        self.assertEqual(job.status, 'SUCCEEDED')
+        self.assertEqual((job.rows_processed, job.inserted), (2, 2))
+        self.assertEqual([chunk['first_row'] for chunk in job.chunk_results], [2, 3])
@@ -0,0 +1,71 @@
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase
+from ..depletion import InsufficientStock, deplete
+from ..models import Batch, BatchDepletion, InventoryItem
+
+
+class DepletionTests(TestCase):
+    def setUp(self):
+        self.item = InventoryItem.objects.create(item_name='Milk', unit_cost=1, unit_price=2, quantity=20)
+        self.late = self.add_batch(self.item, 10, 3, date(2030, 3, 1))
+        self.undated = self.add_batch(self.item, 5, 4, None)
+        self.early = self.add_batch(self.item, 5, 1, date(2030, 2, 1))
+
+    def add_batch(self, item, quantity, cost, expires):
+        return Batch.objects.create(inventory_item=item, batch_quantity=quantity, batch_unit_cost=cost,
+                                    expiration_date=expires)
+
+    def quantities(self):
+        return [Batch.objects.get(pk=batch.pk).batch_quantity for batch in (self.early, self.late, self.undated)]
+
+    def test_draws_first_expiring_batches_first(self):
+        records = deplete([(self.item.pk, 8)], reference='sale:1')
+
+        self.assertEqual(self.quantities(), [0, 7, 5])
+        self.assertEqual([(record.batch_id, record.quantity) for record in records],
+                         [(self.early.pk, 5), (self.late.pk, 3)])
+        self.assertEqual(BatchDepletion.objects.filter(reference='sale:1', reason='SALE').count(), 2)
+
+    def test_updates_item_quantity_and_rollups(self):
+        deplete([(self.item, 3), (self.item, 4)], reason='ADJUSTMENT')
+
+        self.item.refresh_from_db()
+        # 8 left at 3.00, 5 undated at 4.00
+        self.assertEqual(self.item.quantity, 13)
+        self.assertEqual(self.item.on_hand_quantity, 13)
+        self.assertEqual(self.item.average_batch_cost, Decimal('3.38'))
+        self.assertEqual(self.item.nearest_expiration_date, date(2030, 3, 1))
+
+    def test_shortfall_is_recorded_or_refused(self):
+        with self.assertRaises(InsufficientStock) as raised:
+            deplete([(self.item.pk, 25)], allow_shortfall=False)
+        self.assertEqual(raised.exception.shortfalls, {self.item.pk: 5})
+        self.assertEqual(self.quantities(), [5, 10, 5])
+
+        records = deplete([(self.item.pk, 25)])
+        self.assertEqual([record.batch_id for record in records][-1], None)
+        self.assertEqual(self.quantities(), [0, 0, 0])
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.quantity, self.item.on_hand_quantity, self.item.nearest_expiration_date),
+                         (-5, 0, None))
+
+    def test_rejects_non_positive_quantities(self):
+        with self.assertRaises(ValueError):
+            deplete([(self.item.pk, 0)])
+
+    def test_basket_size_does_not_change_query_count(self):
+        items = [
+            InventoryItem.objects.create(item_name=f'Item {n}', unit_cost=1, unit_price=2, quantity=10)
+            for n in range(30)
+        ]
+        for item in items:
+            self.add_batch(item, 4, 1, date(2030, 2, 1))
+            self.add_batch(item, 6, 1, date(2030, 4, 1))
+
+        # Savepoint and release, two locking reads, four bulk writes
+        with self.assertNumQueries(8):
+            deplete([(self.item.pk, 1)])
+        with self.assertNumQueries(8):
+            deplete([(item.pk, 5) for item in items])
+        self.assertEqual(BatchDepletion.objects.filter(inventory_item__in=items).count(), 60)
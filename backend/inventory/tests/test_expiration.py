@@ -0,0 +1,62 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from ..expiration import batches_expiring, expiration_buckets, expiring_batches
+from ..models import Batch, InventoryItem
+
+
+class ExpirationAlertTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.bread = InventoryItem.objects.create(item_name='Bread', unit_cost=1, unit_price=3, quantity=0,
+                                                  product_category='BAKERY')
+        self.ham = InventoryItem.objects.create(item_name='Ham', unit_cost=4, unit_price=6, quantity=0,
+                                                product_category='DELI')
+        self.add_batch(self.bread, 10, 1, 0)
+        self.add_batch(self.bread, 5, 1, 2)
+        self.add_batch(self.ham, 2, 4, 2)
+        self.add_batch(self.ham, 3, 4, 20)
+        self.add_batch(self.ham, 7, 4, 60)
+        self.add_batch(self.bread, 0, 1, 1)
+
+    def add_batch(self, item, quantity, cost, days):
+        return Batch.objects.create(inventory_item=item, batch_quantity=quantity, batch_unit_cost=cost,
+                                    expiration_date=self.today + timedelta(days=days))
+
+    def test_buckets_in_one_grouped_query(self):
+        with self.assertNumQueries(1):
+            buckets = expiration_buckets()
+
+        self.assertEqual(
+            [(b['from_days'], b['to_days'], b['batch_count'], b['item_count']) for b in buckets],
+            [(0, 0, 1, 1), (1, 3, 2, 2), (4, 7, 0, 0), (8, 30, 1, 1)],
+        )
+        self.assertEqual(buckets[1]['value_at_risk'], Decimal('13.00'))
+        self.assertEqual(buckets[1]['retail_at_risk'], Decimal('27.00'))
+
+    def test_batches_come_with_their_item_in_one_query(self):
+        with self.assertNumQueries(1):
+            rows = expiring_batches(7)
+        self.assertEqual([row['inventory_item__item_name'] for row in rows], ['BREAD', 'BREAD', 'HAM'])
+        self.assertEqual(rows[-1]['value_at_risk'], 8)
+
+    def test_query_ranges_over_the_expiry_index(self):
+        with connection.cursor() as cursor:
+            sql, params = batches_expiring(7).order_by().values('pk').query.sql_with_params()
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('inventory_batch_expiry_idx', plan)
+
+    def test_api_and_command(self):
+        data = self.client.get(reverse('expiring_batches'), {'days': 30}).json()
+        self.assertEqual((data['days'], len(data['batches']), len(data['buckets'])), (30, 4, 4))
+        self.assertEqual(self.client.get(reverse('expiring_batches'), {'days': 'soon'}).status_code, 400)
+
+        out = StringIO()
+        call_command('expiring_batches', days=3, stdout=out)
+        self.assertIn('3 batch(es) expiring within 3 day(s)', out.getvalue())
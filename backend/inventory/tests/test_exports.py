@@ -0,0 +1,60 @@
+import csv
+from io import BytesIO
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from openpyxl import load_workbook
+from inventory_management.exports import iter_csv_rows
+from ..models import InventoryItem
+
+
+def read_csv(response):
+    return list(csv.reader(b''.join(response.streaming_content).decode('utf-8').splitlines()))
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        for name in ('Cola', 'Chips', 'Gum'):
+            InventoryItem.objects.create(item_name=name, unit_cost=1, unit_price=2, quantity=3, barcode=f'{name}-1')
+
+    def test_rows_are_fetched_in_chunks(self):
+        lines = iter_csv_rows(InventoryItem.objects.order_by('pk'), [('Name', 'item_name')], chunk_size=2)
+        with self.assertNumQueries(0):
+            self.assertEqual(next(lines), 'Name\r\n')
+        with self.assertNumQueries(1):
+            self.assertEqual(list(lines), ['COLA\r\n', 'CHIPS\r\n', 'GUM\r\n'])
+
+    def test_download_inventory_streams(self):
+        self.client.force_login(User.objects.create_user('clerk', password='x'))
+        response = self.client.get(reverse('download_inventory'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="inventory.csv"')
+        rows = read_csv(response)
+        self.assertEqual(rows[0][:3], ['Item ID', 'Name', 'Barcode'])
+        self.assertEqual([row[1] for row in rows[1:]], ['COLA', 'CHIPS', 'GUM'])
+
+    def test_api_download_streams(self):
+        response = self.client.get(reverse('inventoryitem-download'))
+        rows = read_csv(response)
+        self.assertEqual(rows[0], ['Item ID', 'Name', 'Cost', 'Price', 'Quantity', 'Barcode', 'Min Level',
+                                   'Max Level', 'Category', 'Status'])
+        self.assertEqual(rows[1][1:6], ['COLA', '1.00', '2.00', '3.00', 'Cola-1'])
+
+    def test_download_inventory_xlsx_round_trips_template_layout(self):
+        InventoryItem.objects.create(item_name='Bread', unit_cost=1, unit_price=2, quantity=3, barcode='00042')
+        self.client.force_login(User.objects.create_user('clerk', password='x'))
+
+        response = self.client.get(reverse('download_inventory_xlsx'))
+
+        self.assertTrue(response.streaming)
+        ws = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+        rows = list(ws.iter_rows(values_only=True))
+        self.assertEqual(rows[0][0], 'Item Name (Required)')
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[4][:5], ('BREAD', 1, 2, 3, '00042'))
+        self.assertEqual(ws['E5'].number_format, '@')
+
+    def test_download_template(self):
+        response = self.client.get(reverse('download_template'))
+        ws = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+        self.assertEqual(ws['E2'].value, '00123456')
@@ -0,0 +1,119 @@
+from datetime import timedelta
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from ..import_diff import PreviewAlreadyApplied, apply_preview
+from ..import_jobs import run_import_job, start_import_job
+from ..models import ImportJob, InventoryItem
+from .test_upload_reader import HEADERS, use_temporary_spool, xlsx_upload
+
+
+class ImportPreviewTests(TestCase):
+    def setUp(self):
+        use_temporary_spool(self)
+        self.cola = InventoryItem.objects.create(item_name='Cola', unit_cost=1, unit_price=2, quantity=10, barcode='001')
+        self.chips = InventoryItem.objects.create(item_name='Chips', unit_cost=1, unit_price=2, quantity=5, barcode='002')
+
+    def preview(self, rows):
+        return run_import_job(start_import_job(xlsx_upload(rows), preview=True).pk)
+
+    def test_preview_classifies_rows_without_writing(self):
+        # One catalog lookup for the whole chunk, whatever its size
+        with self.assertNumQueries(11):
+            job = self.preview([
+                ['Cola', 1, 2.5, 10, '001'],
+                ['Chips', 1, 2, 5, '002'],
+                ['Gum', 1, 2, 3, '003'],
+                ['Cola again', 1, 3, 10, '001'],
+                ['Broken', 0, 2, 3, '004'],
+            ])
+
+        self.assertEqual(job.status, 'SUCCEEDED')
+        rows = {row.row_number: row for row in job.rows.all()}
+        self.assertEqual(
+            [(number, row.change_type or row.status) for number, row in sorted(rows.items())],
+            [(2, 'CHANGED'), (3, 'UNCHANGED'), (4, 'NEW'), (5, 'CONFLICT'), (6, 'INVALID')],
+        )
+        self.assertEqual(rows[2].changes, {'unit_price': {'old': 2.0, 'new': 2.5}})
+        self.assertEqual(rows[2].item_id, self.cola.item_id)
+        self.cola.refresh_from_db()
+        self.assertEqual(self.cola.unit_price, 2)
+        self.assertFalse(InventoryItem.objects.filter(barcode='003').exists())
+
+    def test_apply_writes_new_and_changed_rows(self):
+        job = self.preview([['Cola', 1, 2.5, 10, '001'], ['Gum', 1, 2, 3, '003']])
+
+        response = self.client.post(reverse('apply_import_preview', args=[job.pk]))
+
+        self.assertRedirects(response, reverse('import_job_preview', args=[job.pk]))
+        self.cola.refresh_from_db()
+        self.assertEqual(self.cola.unit_price, 2.5)
+        self.assertTrue(InventoryItem.objects.filter(barcode='003', item_name='GUM').exists())
+        job.refresh_from_db()
+        self.assertIsNotNone(job.applied_at)
+        self.assertEqual((job.inserted, job.updated), (1, 1))
+        self.assertEqual(job.rows.filter(status='COMMITTED').count(), 2)
+
+    def test_items_edited_after_preview_become_conflicts(self):
+        job = self.preview([['Cola', 1, 2.5, 10, '001']])
+        self.cola.quantity = 99
+        self.cola.save()
+
+        self.client.post(reverse('apply_import_preview', args=[job.pk]))
+
+        self.cola.refresh_from_db()
+        self.assertEqual((self.cola.unit_price, self.cola.quantity), (2, 99))
+        self.assertEqual(job.rows.get().change_type, 'CONFLICT')
+
+    def test_rows_matched_by_item_id_change_the_barcode(self):
+        gum = InventoryItem.objects.create(item_name='Gum', unit_cost=1, unit_price=2, quantity=3, barcode='003')
+        lines = [
+            ','.join(f'"{column}"' for column in ['Item ID (Optional)'] + HEADERS),
+            f'{self.cola.item_id},Cola,1,2,10,X9',
+            f'{self.chips.item_id},Chips,1,2,5,',
+            f'{gum.item_id},Gum,1,2,3,X10',
+        ]
+        upload = SimpleUploadedFile('inventory.csv', '\n'.join(lines).encode())
+        job = run_import_job(start_import_job(upload, preview=True).pk)
+
+        rows = {row.item_id: row for row in job.rows.all()}
+        self.assertEqual(rows[self.cola.item_id].change_type, 'CHANGED')
+        self.assertEqual(rows[self.cola.item_id].changes, {'barcode': {'old': '001', 'new': 'X9'}})
+        # A blank barcode cell leaves the item's barcode alone
+        self.assertEqual(rows[self.chips.item_id].change_type, 'UNCHANGED')
+
+        InventoryItem.objects.create(item_name='Mints', unit_cost=1, unit_price=2, quantity=3, barcode='X10')
+        self.client.post(reverse('apply_import_preview', args=[job.pk]))
+
+        self.cola.refresh_from_db()
+        gum.refresh_from_db()
+        self.assertEqual((self.cola.barcode, gum.barcode), ('X9', '003'))
+        self.assertEqual(job.rows.get(item_id=gum.item_id).change_type, 'CONFLICT')
+
+    def test_items_edited_while_the_preview_ran_become_conflicts(self):
+        job = self.preview([['Cola', 1, 2.5, 10, '001']])
+        # Edited after its chunk was diffed, before the job finished
+        edited_at = job.started_at + timedelta(milliseconds=1)
+        InventoryItem.objects.filter(pk=self.cola.pk).update(quantity=99, last_updated=edited_at)
+        ImportJob.objects.filter(pk=job.pk).update(finished_at=edited_at + timedelta(seconds=1))
+        job.refresh_from_db()
+
+        self.assertEqual(apply_preview(job).skipped, 1)
+        self.cola.refresh_from_db()
+        self.assertEqual((self.cola.unit_price, self.cola.quantity), (2, 99))
+
+    def test_a_preview_is_applied_once(self):
+        job = self.preview([['Gum', 1, 2, 3, '003']])
+        stale = ImportJob.objects.get(pk=job.pk)
+        apply_preview(job)
+
+        with self.assertRaises(PreviewAlreadyApplied):
+            apply_preview(stale)
+        self.client.post(reverse('apply_import_preview', args=[job.pk]))
+        self.assertEqual(InventoryItem.objects.filter(barcode='003').count(), 1)
+
+    def test_preview_page_filters_by_change_type(self):
+        job = self.preview([['Cola', 1, 2.5, 10, '001'], ['Gum', 1, 2, 3, '003']])
+        response = self.client.get(reverse('import_job_preview', args=[job.pk]), {'type': 'NEW'})
+        self.assertEqual([row.data['item_name'] for row in response.context['page_obj']], ['Gum'])
+        self.assertEqual(response.context['pending_count'], 2)
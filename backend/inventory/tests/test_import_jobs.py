@@ -0,0 +1,101 @@
+import os
+from io import StringIO
+from datetime import timedelta
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from ..import_jobs import recover_import_jobs, run_import_job, start_import_job
+from ..models import ImportJob, InventoryItem
+from .test_upload_reader import use_temporary_spool, xlsx_upload
+
+
+class ImportJobTests(TestCase):
+    def setUp(self):
+        self.spool = use_temporary_spool(self)
+
+    def test_upload_view_queues_job(self):
+        upload = xlsx_upload([['Cola', 1, 2, 10, '001']])
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post(reverse('upload_inventory'), {'file': upload})
+
+        job = ImportJob.objects.get()
+        self.assertRedirects(response, reverse('import_job_detail', args=[job.pk]))
+        self.assertEqual(job.status, 'PENDING')
+        self.assertEqual(job.rows_total, 1)
+        self.assertTrue(os.path.exists(job.file_path))
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(InventoryItem.objects.exists())
+
+    def test_columns_missing_from_the_file_keep_their_values(self):
+        cheese = InventoryItem.objects.create(item_name='Cheese', unit_cost=1, unit_price=1, barcode='555',
+                                              measurement_type='weight', min_stock_level=2, max_stock_level=8)
+
+        run_import_job(start_import_job(xlsx_upload([['Cheddar', 1, 3, 4, '555'], ['Gum', 1, 2, 3, '556']])).pk)
+
+        cheese.refresh_from_db()
+        self.assertEqual((cheese.item_name, cheese.unit_price, cheese.measurement_type), ('CHEDDAR', 3, 'weight'))
+        self.assertEqual((cheese.min_stock_level, cheese.max_stock_level), (2, 8))
+        # New items get the defaults
+        gum = InventoryItem.objects.get(barcode='556')
+        self.assertEqual((gum.measurement_type, gum.status, gum.max_stock_level), ('count', 'ACTIVE', 100))
+
+    def test_recovery_after_a_restart(self):
+        pending = start_import_job(xlsx_upload([['Cola', 1, 2, 10, '001']]))
+        running = start_import_job(xlsx_upload([['Gum', 1, 2, 10, '002']]))
+        ImportJob.objects.filter(pk=running.pk).update(status='RUNNING', started_at=running.created_at)
+        orphan = os.path.join(self.spool, 'orphan.xlsx')
+        open(orphan, 'wb').close()
+        os.utime(orphan, (0, 0))
+
+        # Claimed by a live worker after recovery started: it keeps its (older) spool file
+        claimed = start_import_job(xlsx_upload([['Mints', 1, 2, 10, '003']]))
+        os.utime(claimed.file_path, (0, 0))
+        before = timezone.now()
+        ImportJob.objects.filter(pk=claimed.pk).update(status='RUNNING', started_at=before + timedelta(seconds=1))
+
+        self.assertEqual(recover_import_jobs(before), [pending.pk])
+        running.refresh_from_db()
+        self.assertEqual(running.status, 'FAILED')
+        self.assertIn('Interrupted', running.error)
+        self.assertEqual(sorted(os.listdir(self.spool)),
+                         sorted(os.path.basename(job.file_path) for job in (pending, claimed)))
+
+        call_command('recover_import_jobs', stdout=StringIO())
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, 'SUCCEEDED')
+        self.assertTrue(InventoryItem.objects.filter(barcode='001').exists())
+        self.assertEqual(os.listdir(self.spool), [os.path.basename(claimed.file_path)])
+
+    def test_run_job_records_counts(self):
+        job = start_import_job(xlsx_upload([
+            ['Cola', 1, 2, 10, '001'],
+            ['Broken', 0, 2, 10, '002'],
+        ]))
+
+        job = run_import_job(job.pk)
+
+        self.assertEqual(job.status, 'SUCCEEDED')
+        self.assertEqual((job.rows_processed, job.inserted, job.invalid), (2, 1, 1))
+        staged = job.rows.get()
+        self.assertEqual(staged.data['item_name'], 'Broken')
+        self.assertEqual(staged.reasons, 'Unit cost must be a number greater than zero.')
+        self.assertFalse(os.path.exists(job.file_path))
+
+        status = self.client.get(reverse('import_job_status', args=[job.pk])).json()
+        self.assertEqual(status['status'], 'SUCCEEDED')
+        self.assertEqual(status['progress'], 100)
+
+    def test_failed_job_keeps_error(self):
+        job = start_import_job(SimpleUploadedFile('broken.xlsx', b'not a workbook'))
+        job = run_import_job(job.pk)
+        self.assertEqual(job.status, 'FAILED')
+        self.assertTrue(job.error)
+
+    def test_api_upload_returns_job(self):
+        csv_file = SimpleUploadedFile('items.csv', b'item_id,item_name\n')
+        with self.captureOnCommitCallbacks(execute=False):
+            response = self.client.post(reverse('inventoryitem-upload'), {'file': csv_file})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status_url'], reverse('import_job_status', args=[response.json()['job_id']]))
@@ -0,0 +1,58 @@
+import json
+from django.test import TestCase
+from django.urls import reverse
+from ..models import ImportJob, ImportRow, InventoryItem
+
+
+def staged_row(job, row_number, **data):
+    row = {
+        'item_name': 'Broken', 'unit_cost': 0.0, 'unit_price': 2.0, 'quantity': 5.0, 'barcode': '',
+        'min_stock_level': 1.0, 'max_stock_level': 100.0, 'product_category': 'SYSTEM',
+        'measurement_type': 'count', 'status': 'Active', 'expiration_date': '01/01/2030',
+    }
+    row.update(data)
+    return ImportRow.objects.create(job=job, row_number=row_number, data=row, reasons='Invalid')
+
+
+class ImportRowEditorTests(TestCase):
+    def setUp(self):
+        self.job = ImportJob.objects.create(file_name='items.xlsx', status='SUCCEEDED', invalid=2)
+
+    def save(self, row, **changes):
+        return self.client.post(
+            reverse('save_import_row', args=[row.pk]), json.dumps(changes), content_type='application/json',
+        )
+
+    def test_save_row_revalidates(self):
+        row = staged_row(self.job, 2)
+
+        response = self.save(row, unit_cost='1.5')
+        self.assertEqual(response.json()['status'], 'CORRECTED')
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.reasons, row.data['unit_cost']), ('CORRECTED', '', 1.5))
+
+        response = self.save(row, item_name='  ')
+        self.assertEqual(response.json()['status'], 'INVALID')
+        self.assertTrue(response.json()['reasons'])
+
+    def test_invalid_rows_page_is_paged(self):
+        for number in range(2, 62):
+            staged_row(self.job, number)
+        response = self.client.get(reverse('import_job_invalid_rows', args=[self.job.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page_obj']), 50)
+
+    def test_commit_corrected_rows(self):
+        fixed = staged_row(self.job, 2, unit_cost=1.0, barcode='111')
+        fixed.status = 'CORRECTED'
+        fixed.save()
+        staged_row(self.job, 3)
+
+        response = self.client.post(reverse('commit_corrected_rows', args=[self.job.pk]))
+
+        self.assertRedirects(response, reverse('import_job_invalid_rows', args=[self.job.pk]))
+        self.assertEqual(list(InventoryItem.objects.values_list('barcode', flat=True)), ['111'])
+        fixed.refresh_from_db()
+        self.assertEqual(fixed.status, 'COMMITTED')
+        self.assertEqual(self.save(fixed, unit_cost='2').status_code, 409)
+        self.assertEqual(self.job.rows.filter(status='INVALID').count(), 1)
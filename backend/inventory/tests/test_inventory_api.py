@@ -4,11 +4,13 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 from ..models import InventoryItem
+from .test_upload_reader import use_temporary_spool
 import logging
 logger = logging.getLogger(__name__)
 
 class InventoryAPITests(TestCase):
     def setUp(self):
+        use_temporary_spool(self)
         self.client = APIClient()
         self.item_data = {
             "item_name": "Test Item",
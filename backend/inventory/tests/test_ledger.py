@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from ..bulk_upsert import bulk_upsert_items
+from ..depletion import deplete
+from ..ledger import on_hand_at, record_receipt, take_snapshots
+from ..models import InventoryItem, StockMovement, StockSnapshot
+
+
+def at(day):
+    return datetime(2030, 1, day, 12, tzinfo=timezone.utc)
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.item = InventoryItem.objects.create(item_name='Milk', unit_cost=1, unit_price=2, barcode='111')
+
+    def move(self, delta, day):
+        StockMovement.objects.create(inventory_item=self.item, delta=delta, reason='ADJUSTMENT', created_at=at(day))
+
+    def test_item_saves_record_quantity_changes(self):
+        item = InventoryItem.objects.create(item_name='Eggs', unit_cost=1, unit_price=2, quantity=12)
+        item.quantity = 10
+        item.save()
+        item.item_name = 'Brown eggs'
+        item.save()
+
+        self.assertEqual(list(item.stock_movements.values_list('delta', 'reference')),
+                         [(12, 'item:created'), (-2, 'item:edited')])
+
+    def test_saving_a_stale_instance_keeps_the_ledger_in_step(self):
+        item = InventoryItem.objects.create(item_name='Eggs', unit_cost=1, unit_price=2, quantity=5)
+        stale = InventoryItem.objects.get(pk=item.pk)
+        deplete([(item, 2)])
+
+        stale.item_name = 'Brown eggs'
+        stale.save()
+
+        stale.refresh_from_db()
+        self.assertEqual(stale.quantity, 5)
+        self.assertEqual(sum(stale.stock_movements.values_list('delta', flat=True)), stale.quantity)
+        self.assertEqual(on_hand_at(stale, datetime.now(timezone.utc)), 5)
+
+    def test_on_hand_at_uses_the_latest_snapshot_and_later_movements(self):
+        self.move(10, 1)
+        self.move(-3, 3)
+        self.assertEqual(take_snapshots(at(4)), 1)
+        self.move(5, 6)
+        self.move(-1, 8)
+
+        self.assertEqual([on_hand_at(self.item, at(day)) for day in (2, 4, 7, 9)], [10, 7, 12, 11])
+        # A snapshot read and a bounded range sum, whatever the history before the snapshot
+        with self.assertNumQueries(2):
+            on_hand_at(self.item.pk, at(9))
+
+        # Only items that moved since their last snapshot get a new one
+        self.assertEqual(take_snapshots(at(10)), 1)
+        self.assertEqual(take_snapshots(at(11)), 0)
+        self.assertEqual(StockSnapshot.objects.get(taken_at=at(10)).quantity, 11)
+
+    def test_receipts_and_imports_are_recorded(self):
+        record_receipt(self.item, 6, Decimal('1.50'), reference='po:PO-0001')
+        self.assertEqual(self.item.quantity, 6)
+
+        bulk_upsert_items([{'item_name': 'Milk', 'barcode': '111', 'quantity': 4.5},
+                           {'item_name': 'Bread', 'barcode': '222', 'quantity': 3}])
+
+        moves = StockMovement.objects.values_list('inventory_item__item_name', 'delta', 'reason')
+        self.assertEqual(sorted(moves), [('BREAD', 3, 'IMPORT'), ('MILK', Decimal('-1.5'), 'IMPORT'), ('MILK', 6, 'RECEIPT')])
+        self.assertEqual(on_hand_at(self.item, datetime.now(timezone.utc) + timedelta(seconds=1)), Decimal('4.5'))
+
+    def test_batches_entered_by_hand_are_recorded(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+        form = {'batch_quantity': 8, 'batch_unit_cost': 1, 'expiration_date': ''}
+        self.client.post(reverse('batch_create_view', args=[self.item.pk]), form)
+        batch = self.item.batches.get()
+        self.client.post(reverse('batch_update_view', args=[batch.pk]), dict(form, batch_quantity=5))
+        self.client.post(reverse('admin:inventory_batch_add'), dict(form, inventory_item=self.item.pk))
+        self.client.post(reverse('admin:inventory_batch_delete', args=[batch.pk]), {'post': 'yes'})
+
+        self.assertEqual(list(self.item.stock_movements.values_list('delta', 'reason', 'reference')), [
+            (8, 'RECEIPT', 'batch:created'), (-3, 'ADJUSTMENT', 'batch:edited'),
+            (8, 'RECEIPT', 'batch:created'), (-5, 'ADJUSTMENT', 'batch:deleted'),
+        ])
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.quantity, self.item.on_hand_quantity), (8, 8))
+        self.assertEqual(on_hand_at(self.item, datetime.now(timezone.utc) + timedelta(seconds=1)), 8)
+
+    def test_movements_are_append_only(self):
+        self.move(1, 1)
+        movement = StockMovement.objects.get()
+        with self.assertRaises(ValueError):
+            movement.save()
+        with self.assertRaises(ValueError):
+            movement.delete()
+
+    def test_snapshot_command(self):
+        StockMovement.objects.create(inventory_item=self.item, delta=2, reason='ADJUSTMENT',
+                                     created_at=datetime.now(timezone.utc) - timedelta(days=1))
+        out = StringIO()
+        call_command('snapshot_stock', stdout=out)
+        self.assertIn('Took 1 stock snapshot(s).', out.getvalue())
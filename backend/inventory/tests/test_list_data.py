@@ -0,0 +1,44 @@
+from datetime import date
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from ..models import Batch, InventoryItem
+
+
+class InventoryListDataTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('clerk', password='x'))
+        for index, name in enumerate(['Cola', 'Chips', 'Gum', 'Candy']):
+            InventoryItem.objects.create(item_name=name, unit_cost=1, unit_price=index + 1, quantity=1)
+        self.cola = InventoryItem.objects.get(item_name='COLA')
+        self.cola.status = 'INACTIVE'
+        self.cola.save()
+        Batch.objects.create(inventory_item=self.cola, batch_quantity=1, batch_unit_cost=1, expiration_date=date(2030, 1, 2))
+
+    def fetch(self, **params):
+        query = {'draw': 1, 'start': 0, 'length': 2, **params}
+        return self.client.get(reverse('inventory_list_data'), query).json()
+
+    def test_returns_one_window_newest_first(self):
+        response = self.fetch()
+        self.assertEqual((response['recordsTotal'], response['recordsFiltered']), (4, 4))
+        self.assertEqual([row[1] for row in response['data']], ['CANDY', 'GUM'])
+        self.assertIn('Add Batch', response['data'][0][10])
+
+    def test_sorts_searches_and_filters_in_sql(self):
+        response = self.fetch(**{'order[0][column]': 4, 'order[0][dir]': 'desc'})
+        self.assertEqual([row[4] for row in response['data']], ['$4.00', '$3.00'])
+
+        response = self.fetch(**{'search[value]': 'c'})
+        self.assertEqual(response['recordsFiltered'], 3)
+
+        response = self.fetch(**{'columns[6][search][value]': 'inactive'})
+        self.assertEqual([(row[1], row[9]) for row in response['data']], [('COLA', '2030-01-02')])
+
+    def test_actions_column_cannot_be_sorted(self):
+        response = self.fetch(**{'order[0][column]': 10, 'order[0][dir]': 'asc'})
+        self.assertEqual(len(response['data']), 2)
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('inventory_list_data')).status_code, 302)
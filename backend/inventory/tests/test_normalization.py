@@ -0,0 +1,52 @@
+from decimal import Decimal
+import pandas as pd
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+from django.test import TestCase
+from ..models import InventoryItem
+from ..normalization import INVERTED_LEVELS, NEGATIVE_LEVELS, normalize_frame, normalize_item
+
+
+class NormalizationTests(TestCase):
+    def test_frame_rules_match_single_item_rules(self):
+        rows = [
+            {'item_name': 'milk', 'product_category': 'dairy', 'status': 'active', 'min_stock_level': 5, 'max_stock_level': 1},
+            {'item_name': 'eggs', 'product_category': None, 'status': 'active', 'min_stock_level': -1, 'max_stock_level': -2},
+            {'item_name': 'salt', 'product_category': 'spice', 'status': 'inactive', 'min_stock_level': 1, 'max_stock_level': 9},
+        ]
+        frame = normalize_frame(pd.DataFrame(rows))
+
+        for row, (_, normalized) in zip(rows, frame.iterrows()):
+            expected = normalize_item(dict(row))
+            self.assertEqual(normalized['item_name'], expected['item_name'])
+            self.assertEqual(bool(normalized['has_issues']), expected['has_issues'])
+            self.assertEqual(normalized['issue_reasons'], expected['issue_reasons'])
+        self.assertEqual(frame.at[1, 'issue_reasons'], f"{INVERTED_LEVELS}; {NEGATIVE_LEVELS}")
+        self.assertIsNone(frame.at[1, 'product_category'])
+
+    def test_bulk_writes_apply_the_save_rules(self):
+        InventoryItem.objects.bulk_create([
+            InventoryItem(item_name='milk', product_category='dairy', status='active', min_stock_level=5, max_stock_level=1),
+        ])
+        item = InventoryItem.objects.get()
+        self.assertEqual((item.item_name, item.product_category, item.status), ('MILK', 'DAIRY', 'ACTIVE'))
+        self.assertEqual((item.has_issues, item.issue_reasons), (True, INVERTED_LEVELS))
+
+        item.max_stock_level = 10
+        item.item_name = 'whole milk'
+        InventoryItem.objects.bulk_update([item], ['item_name', 'max_stock_level'])
+        item.refresh_from_db()
+        self.assertEqual((item.item_name, item.has_issues, item.issue_reasons), ('WHOLE MILK', False, None))
+
+    def test_queryset_update_applies_the_save_rules_in_sql(self):
+        item = InventoryItem.objects.create(item_name='milk', unit_cost=1, unit_price=2)
+
+        InventoryItem.objects.update(status='inactive', item_name=Concat(F('item_name'), Value(' 2l')),
+                                     min_stock_level=Decimal('500'))
+        item.refresh_from_db()
+        self.assertEqual((item.status, item.item_name), ('INACTIVE', 'MILK 2L'))
+        self.assertEqual((item.has_issues, item.issue_reasons), (True, INVERTED_LEVELS))
+
+        InventoryItem.objects.update(max_stock_level=F('min_stock_level') * 2)
+        item.refresh_from_db()
+        self.assertEqual((item.has_issues, item.issue_reasons), (False, None))
@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from inventory_management.query_plans import captured_plans, explain, plan_problems
+from ..depletion import deplete
+from ..expiration import expiring_batches
+from ..models import Batch, InventoryItem, category_choices
+from ..rollups import nearest_expiration, rebuild_rollups
+from ..search import search_cache, search_items
+
+ITEM_TABLE = 'inventory_inventoryitem'
+BATCH_TABLE = 'inventory_batch'
+
+
+class HotQueryPlanTests(TestCase):
+    """The hot item and batch queries read through their indexes: no table scans, no sorts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        categories = [value for value, _ in category_choices]
+        InventoryItem.objects.bulk_create([
+            InventoryItem(item_name=f'Item {n:04d}', barcode=f'{n:08d}', unit_cost=1, unit_price=2, quantity=10,
+                          product_category=categories[n % len(categories)],
+                          status='INACTIVE' if n % 10 == 0 else 'ACTIVE')
+            for n in range(400)
+        ])
+        soon = date.today() + timedelta(days=1)
+        Batch.objects.bulk_create([
+            Batch(inventory_item=item, batch_quantity=5, batch_unit_cost=1, expiration_date=soon + timedelta(days=n))
+            for item in InventoryItem.objects.all() for n in range(3)
+        ])
+        rebuild_rollups()
+        cls.item = InventoryItem.objects.get(item_name='ITEM 0042')
+
+    def setUp(self):
+        search_cache.clear()
+
+    def assertIndexed(self, plans, sorts=True):
+        self.assertTrue(plans)
+        for sql, plan in plans:
+            self.assertEqual(plan_problems(plan, sorts), [], sql)
+
+    def plans(self, run, tables):
+        with CaptureQueriesContext(connection) as captured:
+            run()
+        return captured_plans(captured, tables)
+
+    def test_item_search(self):
+        # Short queries: an exact barcode/id lookup, then a range over the name index in name order
+        self.assertIndexed(self.plans(lambda: search_items('it'), [ITEM_TABLE]))
+        self.assertIndexed(self.plans(lambda: search_items('42'), [ITEM_TABLE]))
+        # Full-text queries rank their hits, so they sort those, but never scan the item table
+        self.assertIndexed(self.plans(lambda: search_items('item 004'), [ITEM_TABLE]), sorts=False)
+
+    def test_list_table_filters(self):
+        self.client.force_login(User.objects.create_user('clerk', password='x'))
+        for column, value in [(6, 'inactive'), (2, 'deli cold')]:
+            params = {'draw': 1, 'start': 0, 'length': 10, f'columns[{column}][search][value]': value}
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.get(reverse('inventory_list_data'), params)
+            self.assertEqual(len(response.json()['data']), 10)
+            # recordsTotal counts the whole table by design; the filtered count and window must not
+            filtered = [(sql, plan) for sql, plan in captured_plans(captured, [ITEM_TABLE]) if 'WHERE' in sql]
+            self.assertEqual(len(filtered), 2)
+            self.assertIndexed(filtered)
+
+    def test_batches_by_item_and_expiration(self):
+        self.assertIndexed([('batches', explain(self.item.batches.all()))])
+        self.assertIndexed(self.plans(lambda: nearest_expiration(self.item.batches), [BATCH_TABLE]))
+        self.assertIndexed(self.plans(lambda: deplete([(self.item, 7), (self.item.pk + 1, 2)]), [BATCH_TABLE]))
+        self.assertIndexed(self.plans(lambda: expiring_batches(7), [BATCH_TABLE]))
@@ -0,0 +1,66 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from ..models import Batch, InventoryItem
+
+
+class BatchRollupTests(TestCase):
+    def setUp(self):
+        self.item = InventoryItem.objects.create(item_name='Milk', unit_cost=1, unit_price=2, quantity=0)
+
+    def add_batch(self, quantity, cost, expires, item=None):
+        return Batch.objects.create(inventory_item=item or self.item, batch_quantity=quantity,
+                                    batch_unit_cost=cost, expiration_date=expires)
+
+    def rollups(self):
+        self.item.refresh_from_db()
+        return (self.item.on_hand_quantity, self.item.average_batch_cost, self.item.nearest_expiration_date)
+
+    def test_creates_update_weighted_average_and_nearest_date(self):
+        self.add_batch(10, 1, date(2030, 3, 1))
+        self.add_batch(30, 2, date(2030, 2, 1))
+        self.assertEqual(self.rollups(), (40, Decimal('1.75'), date(2030, 2, 1)))
+
+    def test_updates_and_deletes_adjust_the_rollups(self):
+        first = self.add_batch(10, 1, date(2030, 2, 1))
+        second = self.add_batch(10, 3, date(2030, 3, 1))
+
+        # Emptying the nearest batch moves the nearest date to the next batch with stock
+        first.batch_quantity = 0
+        first.save()
+        self.assertEqual(self.rollups(), (10, Decimal('3.00'), date(2030, 3, 1)))
+
+        second.delete()
+        self.assertEqual(self.rollups(), (0, 0, None))
+
+    def test_saving_a_stale_item_keeps_the_rollups(self):
+        stale = InventoryItem.objects.get(pk=self.item.pk)
+        self.add_batch(10, 3, date(2030, 2, 1))
+
+        stale.item_name = 'Whole Milk'
+        stale.save()
+
+        self.assertEqual(self.rollups(), (10, Decimal('3.00'), date(2030, 2, 1)))
+        self.assertEqual((self.item.item_name, self.item.on_hand_cost), ('WHOLE MILK', 30))
+
+    def test_moving_a_batch_between_items(self):
+        other = InventoryItem.objects.create(item_name='Cream', unit_cost=1, unit_price=2, quantity=0)
+        batch = self.add_batch(5, 2, date(2030, 2, 1))
+        batch.inventory_item = other
+        batch.save()
+        other.refresh_from_db()
+        self.assertEqual(self.rollups(), (0, 0, None))
+        self.assertEqual((other.on_hand_quantity, other.average_batch_cost), (5, 2))
+
+    def test_rebuild_command_repairs_drift(self):
+        self.add_batch(10, 1, date(2030, 3, 1))
+        self.add_batch(5, 4, date(2030, 2, 1))
+        InventoryItem.objects.update(on_hand_quantity=0, average_batch_cost=0, nearest_expiration_date=None)
+
+        out = StringIO()
+        call_command('rebuild_batch_rollups', stdout=out)
+
+        self.assertIn('1 item(s)', out.getvalue())
+        self.assertEqual(self.rollups(), (15, Decimal('2.00'), date(2030, 2, 1)))
@@ -0,0 +1,60 @@
+from django.db.models.signals import post_delete
+from django.test import TestCase
+from django.urls import reverse
+from ..bulk_upsert import bulk_upsert_items
+from ..models import InventoryItem
+from ..scan_cache import ScanCache, lookup_barcode, scan_cache
+
+
+class BarcodeScanTests(TestCase):
+    def setUp(self):
+        scan_cache.clear()
+        self.item = InventoryItem.objects.create(item_name='Cola', unit_cost=1, unit_price=2, quantity=3, barcode='0001')
+
+    def scan(self, barcode):
+        return self.client.get(reverse('scan_barcode', args=[barcode]))
+
+    def test_scan_returns_register_fields(self):
+        response = self.scan('0001')
+        self.assertEqual(response.json(), {
+            'item_id': self.item.item_id, 'item_name': 'COLA', 'unit_price': '2.00',
+            'measurement_type': 'count', 'status': 'ACTIVE',
+        })
+        self.assertEqual(self.scan('9999').status_code, 404)
+
+    def test_repeat_scans_are_served_from_cache(self):
+        lookup_barcode('0001')
+        lookup_barcode('9999')
+        with self.assertNumQueries(0):
+            self.assertEqual(lookup_barcode('0001')['item_name'], 'COLA')
+            self.assertIsNone(lookup_barcode('9999'))
+
+    def test_save_and_delete_invalidate(self):
+        lookup_barcode('0001')
+        self.item.unit_price = 5
+        self.item.save()
+        self.assertEqual(lookup_barcode('0001')['unit_price'], 5)
+
+        # Moving the item to a new barcode drops the entry under the old one
+        self.item.barcode = '0002'
+        self.item.save()
+        self.assertIsNone(lookup_barcode('0001'))
+        self.assertEqual(lookup_barcode('0002')['item_id'], self.item.item_id)
+
+        # The sales app has no migrations, so a real delete cannot cascade in tests
+        InventoryItem.objects.filter(pk=self.item.pk).update(barcode='')
+        post_delete.send(sender=InventoryItem, instance=self.item)
+        self.assertIsNone(lookup_barcode('0002'))
+
+    def test_bulk_writes_clear_cache(self):
+        self.assertIsNone(lookup_barcode('0003'))
+        bulk_upsert_items([{'item_name': 'Gum', 'unit_cost': 1, 'unit_price': 2, 'quantity': 3, 'barcode': '0003'}])
+        self.assertEqual(lookup_barcode('0003')['item_name'], 'GUM')
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ScanCache(max_size=2, ttl=60)
+        cache.put('a', None)
+        cache.put('b', None)
+        cache.get('a')
+        cache.put('c', None)
+        self.assertEqual(list(cache._entries), ['a', 'c'])
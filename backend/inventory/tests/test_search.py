@@ -0,0 +1,92 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from ..bulk_upsert import bulk_upsert_items
+from ..models import InventoryItem
+from inventory_management.typeahead import TypeaheadCache
+from ..search import ITEM_INDEX, search_cache, search_items
+
+
+class ItemSearchTests(TestCase):
+    def setUp(self):
+        search_cache.clear()
+        make = InventoryItem.objects.create
+        self.diet_cola = make(item_name='Diet Cola', unit_cost=1, unit_price=2, quantity=1, barcode='111')
+        self.cola = make(item_name='Cola', unit_cost=1, unit_price=2, quantity=1, barcode='222')
+        self.chips = make(item_name='Chips', unit_cost=1, unit_price=2, quantity=1, barcode='12345')
+        self.mix = make(item_name='12345 Mix', unit_cost=1, unit_price=2, quantity=1, barcode='333')
+        self.pack = make(item_name='Pack of 12345', unit_cost=1, unit_price=2, quantity=1, barcode='444')
+
+    def names(self, query, limit=None):
+        return [item['item_name'] for item in search_items(query, limit)]
+
+    def test_exact_barcode_then_name_prefix_then_substring(self):
+        self.assertEqual(self.names('12345'), ['CHIPS', '12345 MIX', 'PACK OF 12345'])
+        self.assertEqual(self.names('cola'), ['COLA', 'DIET COLA'])
+        self.assertEqual(self.names('diet cola'), ['DIET COLA'])
+        self.assertEqual(self.names('xyz'), [])
+
+    def test_results_are_limited(self):
+        self.assertEqual(len(search_items('12345', 2)), 2)
+        with override_settings(INVENTORY_SEARCH_MAX_RESULTS=1):
+            self.assertEqual(len(search_items('12345', 10)), 1)
+
+    def test_short_queries_match_barcode_and_name_prefix(self):
+        self.assertEqual(self.names('co'), ['COLA'])
+        self.assertEqual(self.names('222'), ['COLA'])
+        self.assertEqual(self.names(str(self.chips.item_id)), ['CHIPS'])
+
+    def test_index_follows_saves_and_bulk_writes(self):
+        self.cola.item_name = 'Root Beer'
+        self.cola.save()
+        self.assertEqual(self.names('beer'), ['ROOT BEER'])
+        self.assertNotIn('COLA', self.names('cola'))
+
+        InventoryItem.objects.filter(pk=self.chips.pk).update(item_name='PRETZELS')
+        bulk_upsert_items([{'item_name': 'Ginger Beer', 'unit_cost': 1, 'unit_price': 2, 'quantity': 1, 'barcode': '555'}])
+        self.assertCountEqual(self.names('beer'), ['GINGER BEER', 'ROOT BEER'])
+        self.assertEqual(self.names('pretz'), ['PRETZELS'])
+
+    def test_install_is_idempotent(self):
+        self.assertFalse(ITEM_INDEX.install())
+
+    def test_view_keeps_item_fields(self):
+        response = self.client.get(reverse('search_items'), {'q': '12345', 'limit': 1})
+        self.assertEqual(response.json(), [{
+            'item_id': self.chips.item_id, 'item_name': 'CHIPS', 'unit_cost': '1.00', 'barcode': '12345',
+            'min_stock_level': '1.00', 'max_stock_level': '100.00', 'product_category': 'SYSTEM', 'status': 'ACTIVE',
+        }])
+
+
+class TypeaheadCacheTests(TestCase):
+    def setUp(self):
+        search_cache.clear()
+        for name in ['Cola', 'Diet Cola', 'Cocoa', 'Coconut Water']:
+            InventoryItem.objects.create(item_name=name, unit_cost=1, unit_price=2, quantity=1)
+
+    def test_longer_queries_are_narrowed_from_a_complete_prefix(self):
+        self.assertEqual(len(search_items('coc')), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual([item['item_name'] for item in search_items('coco')], ['COCOA', 'COCONUT WATER'])
+            self.assertEqual([item['item_name'] for item in search_items('coconut')], ['COCONUT WATER'])
+            self.assertEqual(search_items('coconut water'), search_items('coconut  water '))
+
+    def test_writes_clear_the_cache(self):
+        search_items('cola')
+        InventoryItem.objects.create(item_name='Cola Zero', unit_cost=1, unit_price=2, quantity=1)
+        self.assertEqual(len(search_items('cola')), 3)
+
+    def test_incomplete_results_are_not_narrowed(self):
+        cache = TypeaheadCache(rows=2)
+        fetched = []
+
+        def fetch(size):
+            fetched.append(size)
+            return ['a', 'b', 'c'][:size]
+
+        def narrow(prefix, rows):
+            return rows
+
+        # Three matches do not fit in two cached rows, so 'ab' cannot answer 'abc'
+        cache.search('ab', 2, fetch, narrow)
+        cache.search('abc', 2, fetch, narrow)
+        self.assertEqual(fetched, [3, 3])
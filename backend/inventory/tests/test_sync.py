@@ -0,0 +1,112 @@
+import base64
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from ..models import Batch, InventoryItem
+from ..rollups import rebuild_rollups
+from ..sync import SyncPosition, catalog_version, changed_items
+
+
+# Exact keyset paging; the overlap re-read is covered by SyncOverlapTests
+@override_settings(INVENTORY_SYNC_OVERLAP=0)
+class InventorySyncTests(TestCase):
+    def setUp(self):
+        self.url = reverse('inventoryitem-changes')
+        self.items = [
+            InventoryItem.objects.create(item_name=name, unit_cost=1, unit_price=2, quantity=3)
+            for name in ('Cola', 'Chips', 'Gum')
+        ]
+
+    def test_full_snapshot_pages_with_cursor(self):
+        first = self.client.get(self.url, {'limit': 2}).json()
+        self.assertEqual([item['item_name'] for item in first['changed']], ['COLA', 'CHIPS'])
+        self.assertTrue(first['has_more'])
+
+        second = self.client.get(self.url, {'limit': 2, 'since': first['next_cursor']}).json()
+        self.assertEqual([item['item_name'] for item in second['changed']], ['GUM'])
+        self.assertFalse(second['has_more'])
+
+        empty = self.client.get(self.url, {'since': second['next_cursor']}).json()
+        self.assertEqual((empty['changed'], empty['next_cursor']), ([], second['next_cursor']))
+
+    def test_only_changes_and_tombstones_after_cursor(self):
+        cursor = self.client.get(self.url).json()['next_cursor']
+        cola, chips, _ = self.items
+        cola.quantity = 10
+        cola.save()
+        chips.status = 'INACTIVE'
+        chips.save()
+
+        with self.assertNumQueries(2):
+            body = self.client.get(self.url, {'since': cursor}).json()
+
+        self.assertEqual([item['item_id'] for item in body['changed']], [cola.item_id])
+        self.assertEqual([item['item_id'] for item in body['deactivated']], [chips.item_id])
+
+    def test_since_accepts_timestamp(self):
+        later = timezone.now() + timedelta(minutes=1)
+        body = self.client.get(self.url, {'since': later.isoformat()}).json()
+        self.assertEqual(body['changed'], [])
+        self.assertEqual(SyncPosition.parse(body['next_cursor']).last_updated, later)
+
+    def test_bad_since_is_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'since': 'yesterday'}).status_code, 400)
+
+    def test_conditional_requests(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertTrue(response['Last-Modified'])
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.items[0].save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_rollup_changes_are_synced(self):
+        _, cursor, _ = changed_items()
+        version = catalog_version()
+        cola = self.items[0]
+        Batch.objects.create(inventory_item=cola, batch_quantity=10, batch_unit_cost=1)
+
+        page, cursor, _ = changed_items(cursor)
+        self.assertEqual([(item.item_id, item.on_hand_quantity) for item in page], [(cola.item_id, 10)])
+        self.assertGreater(catalog_version(), version)
+
+        rebuild_rollups(InventoryItem.objects.filter(pk=self.items[1].pk))
+        self.assertEqual([item.item_id for item in changed_items(cursor)[0]], [self.items[1].item_id])
+
+
+class SyncOverlapTests(TestCase):
+    def setUp(self):
+        self.items = [
+            InventoryItem.objects.create(item_name=name, unit_cost=1, unit_price=2, quantity=3)
+            for name in ('Cola', 'Chips', 'Gum')
+        ]
+
+    def test_changes_committed_behind_the_cursor_are_picked_up(self):
+        page, cursor, has_more = changed_items()
+        self.assertEqual((len(page), has_more, cursor.caught_up), (3, False, True))
+        # A slow transaction commits a row stamped before the cursor the client already holds
+        late = InventoryItem.objects.create(item_name='Mints', unit_cost=1, unit_price=2, quantity=3)
+        InventoryItem.objects.filter(pk=late.pk).update(last_updated=cursor.last_updated - timedelta(seconds=5))
+
+        page, next_cursor, _ = changed_items(SyncPosition.parse(cursor.encode()))
+        self.assertIn(late.item_id, [item.item_id for item in page])
+        # Re-reading the overlap never moves the cursor backwards
+        self.assertEqual(next_cursor, cursor)
+
+    def test_paging_through_the_overlap_moves_forward(self):
+        _, cursor, _ = changed_items()
+        seen = []
+        while True:
+            page, cursor, has_more = changed_items(cursor, limit=1)
+            seen += [item.item_id for item in page]
+            if not has_more:
+                break
+        self.assertEqual(sorted(seen), sorted(item.item_id for item in self.items))
+
+    def test_cursors_from_before_the_overlap_still_parse(self):
+        position = SyncPosition(timezone.now(), 7)
+        legacy = base64.urlsafe_b64encode(f"{position.last_updated.isoformat()}|7".encode()).decode()
+        self.assertEqual(SyncPosition.parse(legacy), position)
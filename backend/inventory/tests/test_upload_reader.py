@@ -0,0 +1,63 @@
+import tempfile
+from io import BytesIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from openpyxl import Workbook
+from ..models import InventoryItem
+from ..upload_inventory_file import process_inventory_upload
+from ..upload_reader import iter_upload_chunks
+
+HEADERS = ['Item Name (Required)', 'Unit Cost (Required, Numeric)', 'Unit Price (Required, Numeric)',
+           'Quantity (Required, Numeric)', 'Barcode (Optional)']
+
+
+def xlsx_upload(rows, name='inventory.xlsx'):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(HEADERS)
+    for row in rows:
+        ws.append(row)
+    buffer = BytesIO()
+    wb.save(buffer)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+def use_temporary_spool(test):
+    """Spool the uploads of `test` to a directory of its own, removed when the test ends."""
+    spool = tempfile.TemporaryDirectory()
+    test.addCleanup(spool.cleanup)
+    override = override_settings(INVENTORY_IMPORT_SPOOL_DIR=spool.name)
+    override.enable()
+    test.addCleanup(override.disable)
+    return spool.name
+
+
+def csv_upload(lines, name='inventory.csv'):
+    content = '\n'.join([','.join(f'"{col}"' for col in HEADERS)] + lines) + '\n'
+    return SimpleUploadedFile(name, content.encode('utf-8'))
+
+
+class UploadReaderTests(TestCase):
+    def test_xlsx_is_read_in_chunks(self):
+        upload = xlsx_upload([[f'Item {n}', 1, 2, 3, f'{n:05d}'] for n in range(5)])
+        chunks = list(iter_upload_chunks(upload, chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(list(chunks[0].columns), HEADERS)
+
+    def test_csv_keeps_leading_zeros(self):
+        upload = csv_upload(['Cola,1,2,3,00042', 'Chips,1,2,3,00043', 'Gum,1,2,3,00044'])
+        chunks = list(iter_upload_chunks(upload, chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+        self.assertEqual(chunks[0].iloc[0]['Barcode (Optional)'], '00042')
+
+    def test_process_upload_across_chunks(self):
+        upload = xlsx_upload([
+            ['Cola', 1, 2, 10, '001'],
+            ['Broken', 0, 2, 10, '002'],
+            ['Chips', 1, 2, 10, '003'],
+        ])
+        staged = []
+        report, invalid_count = process_inventory_upload(upload, chunk_size=1, on_invalid=staged.extend)
+        self.assertEqual((report.inserted, invalid_count), (2, 1))
+        self.assertEqual([(number, row['item_name']) for number, row, _ in staged], [(3, 'Broken')])
+        self.assertTrue(InventoryItem.objects.filter(barcode='003', item_name='CHIPS').exists())
@@ -0,0 +1,56 @@
+import pandas as pd
+from django.test import SimpleTestCase
+from ..upload_inventory_file import clean_data
+from ..validation import rule_violations, validate_rows
+
+
+def cleaned(rows):
+    return clean_data(pd.DataFrame(rows))
+
+
+VALID = {
+    'item_name': 'Cola', 'unit_cost': '1.25', 'unit_price': '2', 'quantity': '10',
+    'product_category': 'beverage', 'measurement_type': 'Count', 'expiration_date': '2030-01-31',
+}
+
+
+class ValidationRuleTests(SimpleTestCase):
+    def test_valid_row_passes(self):
+        data = cleaned([VALID])
+        invalid, reasons = validate_rows(data)
+        self.assertFalse(invalid.any())
+        self.assertEqual(reasons.tolist(), [''])
+        self.assertEqual(data.loc[0, 'product_category'], 'BEVERAGE')
+        self.assertEqual(data.loc[0, 'measurement_type'], 'count')
+        self.assertEqual(data.loc[0, 'expiration_date'], '01/31/2030')
+
+    def test_blank_optional_cells_get_defaults(self):
+        data = cleaned([dict(VALID, product_category=None, measurement_type='', expiration_date=None)])
+        self.assertFalse(validate_rows(data)[0].any())
+        self.assertEqual(data.loc[0, 'product_category'], 'SYSTEM')
+
+    def test_each_rule_reports_its_row(self):
+        data = cleaned([
+            dict(VALID, item_name='  '),
+            dict(VALID, unit_cost='abc'),
+            dict(VALID, unit_price='0'),
+            dict(VALID, quantity='ten'),
+            dict(VALID, min_stock_level='50', max_stock_level='5'),
+            dict(VALID, product_category='Furniture'),
+            dict(VALID, measurement_type='litre'),
+            dict(VALID, expiration_date='someday'),
+        ])
+        violations = rule_violations(data)
+        self.assertEqual(
+            [violations.columns[row].tolist() for row in violations.values],
+            [['NAME_REQUIRED'], ['COST_NOT_POSITIVE'], ['PRICE_NOT_POSITIVE'], ['QUANTITY_NOT_NUMERIC'],
+             ['MIN_ABOVE_MAX'], ['UNKNOWN_CATEGORY'], ['UNKNOWN_MEASUREMENT_TYPE'], ['INVALID_DATE']],
+        )
+        self.assertEqual(data.loc[7, 'expiration_date'], 'someday')
+
+    def test_reasons_join_every_broken_rule(self):
+        invalid, reasons = validate_rows(cleaned([dict(VALID, item_name='', unit_cost='0')]))
+        self.assertTrue(invalid.iloc[0])
+        self.assertEqual(
+            reasons.iloc[0], "Item name is required. Unit cost must be a number greater than zero."
+        )
@@ -0,0 +1,55 @@
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase
+from django.urls import reverse
+from ..models import Batch, InventoryItem
+from ..valuation import summary_cache
+
+
+class InventorySummaryTests(TestCase):
+    def setUp(self):
+        summary_cache.clear()
+        self.milk = InventoryItem.objects.create(item_name='Milk', unit_cost=10, unit_price=20, quantity=5,
+                                                 min_stock_level=1, max_stock_level=100, product_category='DAIRY')
+        InventoryItem.objects.create(item_name='Cola', unit_cost=15, unit_price=30, quantity=10, min_stock_level=1,
+                                     max_stock_level=100, product_category='BEVERAGE')
+        InventoryItem.objects.create(item_name='Cream', unit_cost=2, unit_price=3, quantity=0, min_stock_level=1,
+                                     max_stock_level=100, product_category='DAIRY', status='INACTIVE')
+
+    def summary(self):
+        response = self.client.get(reverse('inventory_summary'))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_totals_and_breakdowns(self):
+        data = self.summary()
+
+        self.assertEqual(data['item_count'], 3)
+        self.assertEqual(data['total_inventory_cost'], 10 * 5 + 15 * 10)
+        self.assertEqual(data['total_inventory_value'], 20 * 5 + 30 * 10)
+        self.assertEqual(data['total_margin'], 200)
+        self.assertEqual(data['margin_percent'], 50)
+        self.assertEqual(data['low_stock_count'], 1)
+        dairy = next(row for row in data['by_category'] if row['product_category'] == 'DAIRY')
+        self.assertEqual((dairy['item_count'], dairy['total_inventory_cost']), (2, 50))
+        self.assertEqual([(row['status'], row['item_count']) for row in data['by_status']],
+                         [('ACTIVE', 2), ('INACTIVE', 1)])
+
+    def test_summary_is_cached_until_items_or_batches_change(self):
+        self.summary()
+        with self.assertNumQueries(0):
+            self.summary()
+
+        # Queryset updates send no signals, so the cached totals stand
+        InventoryItem.objects.update(unit_cost=0)
+        self.assertEqual(self.summary()['total_inventory_cost'], 200)
+
+        Batch.objects.create(inventory_item=self.milk, batch_quantity=4, batch_unit_cost=Decimal('2.50'),
+                             expiration_date=date(2030, 1, 1))
+        data = self.summary()
+        self.assertEqual((data['total_inventory_cost'], data['batch_cost']), (0, 10))
+
+    def test_api_items_carry_their_valuation(self):
+        response = self.client.get(reverse('inventoryitem-detail', kwargs={'pk': self.milk.pk}))
+        self.assertEqual(response.json()['inventory_total_cost'], '50.00')
+        self.assertEqual(response.json()['inventory_total_value'], '100.00')
@@ -1,12 +1,26 @@
-import csv
+import json
+from contextlib import nullcontext
 from datetime import date, timedelta
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.db import transaction
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
 import pandas as pd
-from .models import InventoryItem
+from .models import ImportJob, ImportRow
+from .bulk_upsert import UPSERT_FIELDS, BarcodeUpserter, bulk_upsert_items
+from .upload_reader import iter_upload_chunks
+from .validation import DATE_FORMAT, validate_rows
+
+# `clean_data` lists the item fields it filled in because the file had no such column; they
+# are validated with their defaults, but left out of the rows written, so updates keep the
+# item's current values
+DEFAULTED_COLUMNS = 'defaulted_columns'
+
 
 def normalize_columns(data):
     column_mapping = {
+        'Item ID (Optional)': 'item_id',
         'Item Name (Required)': 'item_name',
         'Unit Cost (Required, Numeric)': 'unit_cost',
         'Unit Price (Required, Numeric)': 'unit_price',
@@ -45,115 +59,195 @@ def clean_data(data):
     if missing_required:
         raise ValueError(f"Missing required columns: {', '.join(missing_required)}")
 
-    # Add missing optional columns with default values
+    # Add missing optional columns with default values. The stock levels are written together,
+    # since the issue flags are derived from both
+    levels_missing = not {'min_stock_level', 'max_stock_level'}.intersection(data.columns)
+    data.attrs[DEFAULTED_COLUMNS] = [
+        col for col in optional_columns_with_defaults
+        if col not in data.columns and col in UPSERT_FIELDS
+        and (levels_missing or col not in ('min_stock_level', 'max_stock_level'))
+    ]
     for col, default in optional_columns_with_defaults.items():
         if col not in data.columns:
             data[col] = default
 
-    # Ensure numeric columns have appropriate types and fill NaN with 0
+    # Convert numeric columns; blanks become 0 and anything unparseable becomes NaN,
+    # which the validation rules report instead of failing the whole upload
     numeric_fields = ['unit_cost', 'unit_price', 'quantity', 'min_stock_level', 'max_stock_level']
-    data[numeric_fields] = data[numeric_fields].fillna(0).astype(float)
+    for field in numeric_fields:
+        data[field] = pd.to_numeric(data[field], errors='coerce').where(~is_blank(data[field]), 0).astype(float)
 
     # Ensure non-numeric fields are filled with appropriate defaults
     non_numeric_fields = ['barcode', 'product_category', 'measurement_type', 'status']
     for field in non_numeric_fields:
-        data[field] = data[field].fillna(optional_columns_with_defaults[field])
+        data[field] = data[field].where(~is_blank(data[field]), optional_columns_with_defaults[field])
 
     # Remove tailing and leading whitespaces
-    data [ 'item_name' ] = data [ 'item_name' ].astype (str).str.strip ( )
-
-    # Parse expiration_date to ensure it's in MM/DD/YYYY format
-    data['expiration_date'] = pd.to_datetime(data['expiration_date'], errors='coerce').fillna(
-        pd.to_datetime(optional_columns_with_defaults['expiration_date'])
-    ).dt.strftime('%m/%d/%Y')
+    data['item_name'] = data['item_name'].fillna('').astype(str).str.strip()
+    data['product_category'] = data['product_category'].astype(str).str.strip().str.upper()
+    data['measurement_type'] = data['measurement_type'].astype(str).str.strip().str.lower()
+
+    # Format expiration_date as MM/DD/YYYY. Blank dates get the default; dates that cannot
+    # be parsed are kept as typed so validation can flag them
+    blank_dates = is_blank(data['expiration_date'])
+    parsed_dates = pd.to_datetime(data['expiration_date'].where(~blank_dates), errors='coerce', format='mixed')
+    data['expiration_date'] = parsed_dates.dt.strftime(DATE_FORMAT).where(
+        parsed_dates.notna(), data['expiration_date'].astype(str)
+    ).where(~blank_dates, optional_columns_with_defaults['expiration_date'])
 
     return data
 
+def is_blank(column):
+    """Boolean Series marking missing or whitespace-only cells."""
+    return column.isna() | (column.astype(str).str.strip() == '')
+
+
+def rows_for_staging(data, reasons):
+    """
+    Turn cleaned rows into JSON-safe ``(row_number, row, reasons)`` triples for `ImportRow`.
+
+    `data` is indexed by position in the file (0 for the first data row); row numbers are
+    spreadsheet rows, so the first data row below the header is row 2. Columns `clean_data`
+    defaulted are left out, as they are when the rows are written.
+    """
+    values = data.drop(columns=data.attrs.get(DEFAULTED_COLUMNS, [])).astype(object)
+    rows = values.where(values.notna(), None).to_dict(orient='records')
+    return [(int(index) + 2, row, reason) for index, row, reason in zip(data.index, rows, reasons)]
+
+
+def upload_records(data):
+    """The rows of a cleaned chunk as dicts for `BarcodeUpserter`, without the defaulted columns."""
+    return data.drop(columns=data.attrs.get(DEFAULTED_COLUMNS, [])).to_dict(orient='records')
+
+
+def iter_validated_chunks(file, chunk_size=None):
+    """
+    Yield each chunk of an upload as ``(data, invalid_mask, reasons)``, cleaned and checked
+    against the rules in `validation`. `data` is indexed by position in the file.
+    """
+    rows_read = 0
+    for data in iter_upload_chunks(file, chunk_size):
+        # Apply the column mapping to normalize column names
+        normalize_columns(data)
+        data = clean_data(data)
+        data.index = range(rows_read, rows_read + len(data))
+        rows_read += len(data)
+        invalid_mask, reasons = validate_rows(data)
+        yield data, invalid_mask, reasons
+
+
+def process_inventory_upload(file, chunk_size=None, progress=None, commit_every_chunk=False, on_invalid=None):
+    """
+    Stream an uploaded inventory file into the database chunk by chunk.
+
+    Valid rows of each chunk go to a single `BarcodeUpserter` and invalid rows are passed
+    to `on_invalid` as ``(row_number, row, reasons)`` triples, one chunk at a time. Nothing
+    is accumulated across chunks, so peak memory is bounded by the chunk size rather than
+    the file size.
+
+    By default the whole upload runs in one transaction. Background jobs pass
+    `commit_every_chunk=True` so each chunk is committed on its own and `progress` -
+    called as ``progress(report, rows_read, invalid_count)`` after every chunk - reports
+    work other connections can already see.
+
+    Returns the `UpsertReport` and the number of invalid rows.
+    """
+    whole_upload = nullcontext() if commit_every_chunk else transaction.atomic()
+    per_chunk = transaction.atomic if commit_every_chunk else nullcontext
+    invalid_count = 0
+    rows_read = 0
+    with whole_upload:
+        upserter = BarcodeUpserter()
+        for data, invalid_mask, reasons in iter_validated_chunks(file, chunk_size):
+            with per_chunk():
+                # Split valid and invalid data
+                upserter.add_all(upload_records(data[~invalid_mask]))
+                if invalid_mask.any():
+                    invalid = data[invalid_mask]
+                    invalid_count += len(invalid)
+                    if on_invalid:
+                        on_invalid(rows_for_staging(invalid, reasons[invalid_mask]))
+                if commit_every_chunk:
+                    upserter.flush()
+            rows_read += len(data)
+            if progress:
+                progress(upserter.report, rows_read, invalid_count)
+        report = upserter.finish()
+    return report, invalid_count
+
+
 def upload_inventory(request):
     if request.method == 'POST' and request.FILES.get('file'):
-        file = request.FILES['file']
+        # Imported here: import_jobs builds on process_inventory_upload above
+        from .import_jobs import start_import_job
 
         try:
-            # Read the uploaded Excel file
-            data = pd.read_excel(file)
-            data.columns = [col.strip() for col in data.columns]  # Normalize column names
-            print(data.head(5))
-            print(data.columns)
-            # Apply the column mapping to normalize column names
-            normalize_columns (data)
-
-            data = clean_data(data)
-
-            # Split valid and invalid data
-            valid_data = []
-            invalid_data = []
-            for _, row in data.iterrows():
-                if row['unit_cost'] <= 0 or row['unit_price'] <= 0 or row['item_name']=='':
-                    invalid_data.append(row)
-                else:
-                    valid_data.append(row)
-
-            # Save valid data
-            valid_df = pd.DataFrame(valid_data)
-            for _, row in valid_df.iterrows():
-                InventoryItem.objects.update_or_create(
-                    barcode=row['barcode'],
-                    defaults={
-                        'item_name': row['item_name'],
-                        'unit_cost': row['unit_cost'],
-                        'unit_price': row['unit_price'],
-                        'quantity': row['quantity'],
-                        'min_stock_level': row['min_stock_level'],
-                        'max_stock_level': row['max_stock_level'],
-                        'product_category': row['product_category'],
-                        'status': row['status'],
-                    }
-                )
-
-            # Handle invalid data
-            invalid_df = pd.DataFrame(invalid_data)
-            request.session['invalid_data'] = invalid_df.to_dict(orient='records')
-            messages.success(request, f"Successfully processed {len(valid_df)} valid records.")
-            if not invalid_df.empty:
-                messages.warning(request, f"{len(invalid_df)} records have issues. Please correct them.")
-                return render(request, 'inventory/edit_invalid_data.html', {'invalid_data': invalid_df.to_dict(orient='records')})
-
+            job = start_import_job(request.FILES['file'], kind='SHEET', user=request.user,
+                                   preview=bool(request.POST.get('preview')))
         except Exception as e:
             messages.error(request, f"Error processing file: {e}")
             return render(request, 'inventory/upload_inventory.html')
 
-    return render(request, 'inventory/upload_inventory.html')
+        messages.info(request, f"{job.file_name} was queued for import.")
+        return redirect('import_job_detail', job_id=job.pk)
 
-def process_corrected_data(request):
-    if request.method == 'POST':
-        corrected_data = []
-        for key, value in request.POST.items():
-            if '_' in key:  # Skip non-field keys like CSRF token
-                row_index, column = key.split('_', 1)
-                if len(corrected_data) <= int(row_index):
-                    corrected_data.append({})
-                corrected_data[int(row_index)][column] = value
-
-        # Save corrected data
-        try:
-            for row in corrected_data:
-                InventoryItem.objects.update_or_create(
-                    item_name=row['item_name'],
-                    defaults={
-                        'item_name': row['item_name'],
-                        'unit_cost': float(row['unit_cost']),
-                        'unit_price': float(row['unit_price']),
-                        'quantity': int(row['quantity']),
-                        'min_stock_level': int(row['min_stock_level']),
-                        'max_stock_level': int(row['max_stock_level']),
-                        'product_category': row['product_category'],
-                        'status': row['status'],
-                    }
-                )
-            messages.success(request, "Corrected data successfully processed.")
-        except Exception as e:
-            messages.error(request, f"Error processing corrected data: {e}")
-
-        return redirect('upload_inventory')
+    return render(request, 'inventory/upload_inventory.html')
 
-    return redirect('upload_inventory')
+# Columns the invalid-row editor lets users change
+EDITABLE_COLUMNS = [
+    'item_name', 'unit_cost', 'unit_price', 'quantity', 'barcode', 'min_stock_level',
+    'max_stock_level', 'product_category', 'measurement_type', 'status', 'expiration_date',
+]
+
+def revalidate_row(data):
+    """
+    Clean a single staged row the way an upload would and report whether it can be saved.
+
+    Returns the cleaned row dict and the reasons it is still invalid (empty when valid).
+    """
+    frame = clean_data(pd.DataFrame([data]))
+    _, reasons = validate_rows(frame)
+    _, row, reason = rows_for_staging(frame, reasons)[0]
+    return row, reason
+
+
+@require_POST
+def save_import_row(request, row_id):
+    """Save one corrected row from the invalid-row editor (AJAX, JSON body)."""
+    row = get_object_or_404(ImportRow, pk=row_id)
+    if row.status == 'COMMITTED':
+        return JsonResponse({'error': 'This row has already been committed.'}, status=409)
+
+    try:
+        changes = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON.'}, status=400)
+
+    data = dict(row.data)
+    data.update({column: changes[column] for column in EDITABLE_COLUMNS if column in changes})
+    try:
+        data, reasons = revalidate_row(data)
+    except (TypeError, ValueError) as e:
+        reasons = str(e)
+
+    row.data = data
+    row.reasons = reasons
+    row.status = 'INVALID' if reasons else 'CORRECTED'
+    row.save(update_fields=['data', 'reasons', 'status'])
+    return JsonResponse({'id': row.pk, 'status': row.status, 'reasons': row.reasons, 'data': row.data})
+
+
+@require_POST
+def commit_corrected_rows(request, job_id):
+    """Upsert every corrected row of an import in one bulk operation."""
+    job = get_object_or_404(ImportJob, pk=job_id)
+    corrected = job.rows.filter(status='CORRECTED')
+    try:
+        with transaction.atomic():
+            report = bulk_upsert_items(corrected.values_list('data', flat=True).iterator(chunk_size=2000))
+            corrected.update(status='COMMITTED')
+    except Exception as e:
+        messages.error(request, f"Error processing corrected data: {e}")
+    else:
+        messages.success(request, f"Corrected data successfully processed: {report}.")
+    return redirect('import_job_invalid_rows', job_id=job.pk)
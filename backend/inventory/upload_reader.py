@@ -0,0 +1,106 @@
+import os
+from zipfile import BadZipFile
+
+import pandas as pd
+from django.conf import settings
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+
+def default_chunk_size():
+    return getattr(settings, 'INVENTORY_UPLOAD_CHUNK_SIZE', 5000)
+
+
+def iter_upload_chunks(file, chunk_size=None):
+    """
+    Yield an uploaded inventory file as DataFrames of at most `chunk_size` rows.
+
+    Only one chunk is held in memory at a time, whatever the size of the file:
+    .csv files are read with pandas' chunked reader and .xlsx files row by row
+    through openpyxl's read-only mode. Legacy .xls files cannot be streamed and
+    are read whole, then sliced.
+
+    Column headers are stripped of surrounding whitespace; mapping them to model
+    fields is left to `normalize_columns`.
+    """
+    chunk_size = chunk_size or default_chunk_size()
+    extension = os.path.splitext(getattr(file, 'name', '') or '')[1].lower()
+
+    if extension == '.csv':
+        chunks = _iter_csv_chunks(file, chunk_size)
+    elif extension in ('.xlsx', '.xlsm'):
+        chunks = _iter_xlsx_chunks(file, chunk_size)
+    else:
+        chunks = _iter_frame_chunks(pd.read_excel(file), chunk_size)
+
+    for chunk in chunks:
+        chunk.columns = [str(col).strip() for col in chunk.columns]
+        yield chunk
+
+
+def _iter_csv_chunks(file, chunk_size):
+    # Read every column as text so barcodes keep their leading zeros; clean_data
+    # does the numeric conversion.
+    yield from pd.read_csv(file, chunksize=chunk_size, dtype=str, encoding='utf-8-sig', skip_blank_lines=True)
+
+
+def _iter_xlsx_chunks(file, chunk_size):
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = ['' if col is None else col for col in header]
+
+        buffer = []
+        for row in rows:
+            # Read-only sheets often report trailing formatted-but-empty rows
+            if all(value is None or value == '' for value in row):
+                continue
+            buffer.append(row[:len(header)])
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame(buffer, columns=header)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=header)
+    finally:
+        workbook.close()
+
+
+def _iter_frame_chunks(data, chunk_size):
+    for start in range(0, len(data), chunk_size):
+        yield data.iloc[start:start + chunk_size].copy()
+
+
+def estimate_upload_rows(path):
+    """
+    Cheaply estimate the number of data rows in a spooled upload, for progress reporting.
+
+    CSV files are scanned for newlines in fixed-size blocks; .xlsx files report the
+    dimension stored in the sheet metadata. Returns None when no estimate is available
+    or the file cannot be opened.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        lines = 0
+        last_block = b''
+        with open(path, 'rb') as handle:
+            for block in iter(lambda: handle.read(1024 * 1024), b''):
+                lines += block.count(b'\n')
+                last_block = block
+        if last_block and not last_block.endswith(b'\n'):
+            lines += 1
+        return max(lines - 1, 0)
+    if extension in ('.xlsx', '.xlsm'):
+        try:
+            workbook = load_workbook(path, read_only=True)
+        except (BadZipFile, InvalidFileException, KeyError):
+            # Not a readable workbook; the import itself will report the error
+            return None
+        try:
+            max_row = workbook.active.max_row
+        finally:
+            workbook.close()
+        return max(max_row - 1, 0) if max_row else None
+    return None
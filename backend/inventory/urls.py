@@ -11,20 +11,31 @@ urlpatterns = [
     path('', include(router.urls)),
    # path('', include(router.urls)),
     path('items/', views.inventory_list_view, name='inventory_list_view'),  # List all items
-    path ('items/batches/update/<int:batch_id>/', views.batch_create_view, name ='batch_update_view'),
+    path('items/data/', views.InventoryListData.as_view(), name='inventory_list_data'),  # Server-side rows for the list table
+    path ('items/batches/update/<int:batch_id>/', views.batch_update_view, name ='batch_update_view'),
     path('items/create/', views.inventory_create_view, name='inventory_create_view'),  # Add individual items manually
     path ('items/update/<int:item_id>/', views.inventory_update_view, name ='inventory_update_view'),    # Update individual items manually, with item_id for reference
     path('items/deactivate/<int:item_id>/', views.inventory_delete_view, name='inventory_delete_view'),  # Deactivate individual items manually
     path('items/activate/<int:item_id>/', views.inventory_activate_view, name='inventory_activate_view'),  # New activate URL
     path('items/download/', views.download_inventory, name='download_inventory'),  # Download inventory list
+    path('items/download/xlsx/', views.download_inventory_xlsx, name='download_inventory_xlsx'),  # Download inventory as a re-uploadable sheet
     path('items/download-template/', views.download_template, name='download_template'),
     path('items/upload/', views.upload_inventory, name='upload_inventory'),  # Bulk update inventory using CSV file
-    path('items/process-corrected-data/', views.process_corrected_data, name='process_corrected_data'),
-    path('items/download_invalid_records/', views.download_invalid_records, name='download_invalid_records'),
+    path('items/import-jobs/<int:job_id>/', views.import_job_detail, name='import_job_detail'),
+    path('items/import-jobs/<int:job_id>/status/', views.import_job_status, name='import_job_status'),
+    path('items/import-jobs/<int:job_id>/invalid/', views.import_job_invalid_rows, name='import_job_invalid_rows'),
+    path('items/import-jobs/<int:job_id>/invalid/download/', views.download_invalid_records, name='download_invalid_records'),
+    path('items/import-jobs/<int:job_id>/invalid/commit/', views.commit_corrected_rows, name='commit_corrected_rows'),
+    path('items/import-jobs/<int:job_id>/preview/', views.import_job_preview, name='import_job_preview'),
+    path('items/import-jobs/<int:job_id>/preview/apply/', views.apply_import_preview, name='apply_import_preview'),
+    path('items/import-rows/<int:row_id>/', views.save_import_row, name='save_import_row'),
     path ('items/search/', views.search_items, name ='search_items'), # search items
+    path('items/summary/', views.inventory_summary, name='inventory_summary'),  # Cached valuation totals
+    path('items/scan/<str:barcode>/', views.scan_barcode, name='scan_barcode'),  # Exact barcode lookup for registers
 
 # Batch-related URL patterns
     path('batch/create/<int:item_id>/', views.batch_create_view, name='batch_create_view'),
+    path('batch/expiring/', views.expiring_batches, name='expiring_batches'),  # Expiration alerts
 #    path('batch/update/<int:batch_id>/', views.batch_update_view, name='batch_update_view'),
  #   path('batch/delete/<int:batch_id>/', views.batch_delete_view, name='batch_delete_view'),
 
@@ -1,4 +1,5 @@
 import csv
+from inventory_management.exports import stream_csv_response
 from .models import InventoryItem
 
 def fetch_item(item_id):
@@ -26,17 +27,8 @@ def parse_csv(file):
 
 
 def download_inventory(request):
-    # Generate CSV data here
-    import csv
-    from django.http import HttpResponse
-
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="inventory.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(['item_id', 'item_name', 'unit_cost', 'unit_price', 'quantity', 'barcode', 'status'])
-
-    for item in InventoryItem.objects.all():
-        writer.writerow([item.item_id, item.item_name, item.unit_cost, item.unit_price, item.quantity, item.barcode, item.status])
-
-    return response
\ No newline at end of file
+    columns = [
+        ('item_id', 'item_id'), ('item_name', 'item_name'), ('unit_cost', 'unit_cost'),
+        ('unit_price', 'unit_price'), ('quantity', 'quantity'), ('barcode', 'barcode'), ('status', 'status'),
+    ]
+    return stream_csv_response(InventoryItem.objects.order_by('pk'), columns, 'inventory.csv')
@@ -0,0 +1,70 @@
+"""
+Validation rules for uploaded inventory rows.
+
+Every rule is a vectorized check over a cleaned upload chunk (see `clean_data`): it
+returns a boolean Series that is True for the rows breaking the rule. Rules never
+loop over rows in Python, so validating a chunk costs a handful of column operations
+whatever its size.
+"""
+from dataclasses import dataclass
+from typing import Callable
+
+import pandas as pd
+
+from .models import InventoryItem, category_choices
+
+CATEGORY_CODES = [code for code, _ in category_choices]
+MEASUREMENT_TYPE_CODES = [code for code, _ in InventoryItem.MEASUREMENT_TYPES]
+DATE_FORMAT = '%m/%d/%Y'
+
+
+@dataclass(frozen=True)
+class Rule:
+    code: str
+    message: str
+    check: Callable[[pd.DataFrame], pd.Series]
+
+
+RULES = [
+    Rule('NAME_REQUIRED', "Item name is required.",
+         lambda data: data['item_name'] == ''),
+    Rule('COST_NOT_POSITIVE', "Unit cost must be a number greater than zero.",
+         lambda data: ~(data['unit_cost'] > 0)),
+    Rule('PRICE_NOT_POSITIVE', "Unit price must be a number greater than zero.",
+         lambda data: ~(data['unit_price'] > 0)),
+    Rule('QUANTITY_NOT_NUMERIC', "Quantity must be a number.",
+         lambda data: data['quantity'].isna()),
+    Rule('STOCK_LEVEL_NOT_NUMERIC', "Min and max stock levels must be numbers.",
+         lambda data: data['min_stock_level'].isna() | data['max_stock_level'].isna()),
+    Rule('MIN_ABOVE_MAX', "Min stock level cannot be greater than max stock level.",
+         lambda data: data['min_stock_level'] > data['max_stock_level']),
+    Rule('UNKNOWN_CATEGORY', f"Product category must be one of: {', '.join(CATEGORY_CODES)}.",
+         lambda data: ~data['product_category'].isin(CATEGORY_CODES)),
+    Rule('UNKNOWN_MEASUREMENT_TYPE', f"Measurement type must be one of: {', '.join(MEASUREMENT_TYPE_CODES)}.",
+         lambda data: ~data['measurement_type'].isin(MEASUREMENT_TYPE_CODES)),
+    Rule('INVALID_DATE', "Expiration date must be a date in MM/DD/YYYY format.",
+         lambda data: pd.to_datetime(data['expiration_date'], format=DATE_FORMAT, errors='coerce').isna()),
+]
+
+
+def rule_violations(data, rules=RULES):
+    """Return a boolean DataFrame with one column per rule code, True where a row breaks it."""
+    return pd.DataFrame(
+        {rule.code: rule.check(data).fillna(False).astype(bool) for rule in rules},
+        index=data.index,
+    )
+
+
+def validate_rows(data, rules=RULES):
+    """
+    Validate a cleaned chunk in bulk.
+
+    Returns a boolean Series marking the invalid rows and a Series with the messages for
+    every rule each row breaks, as sentences separated by a space (empty for valid rows).
+    """
+    violations = rule_violations(data, rules)
+    messages = pd.Series([f"{rule.message} " for rule in rules], index=violations.columns)
+    # A boolean matrix dotted with a vector of strings concatenates the messages of
+    # every True cell row by row, without a Python-level loop
+    reasons = violations.dot(messages).str.rstrip(' ') if len(violations) else pd.Series('', index=data.index)
+    return violations.any(axis=1), reasons
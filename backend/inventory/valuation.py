@@ -0,0 +1,123 @@
+"""
+Inventory valuation: what the stock on hand cost and what it sells for, in total and broken
+down by product category and by status.
+
+Cost and retail value are `quantity x unit_cost` and `quantity x unit_price` per item;
+`batch_cost` totals the batch rollups (`on_hand_cost`, see `inventory.rollups`), i.e. what
+the received batches actually cost. Everything comes from one grouped aggregate query
+over (product_category, status); the per-category, per-status and overall figures are
+summed from its rows.
+
+The summary is cached per process for `INVENTORY_SUMMARY_CACHE_TTL` seconds and cleared by
+`inventory.signals` whenever items or batches are written.
+"""
+import threading
+import time
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import InventoryItem
+
+ZERO = Decimal('0')
+CENT = Decimal('0.01')
+MONEY = DecimalField(max_digits=16, decimal_places=2)
+TOTALS = ('item_count', 'low_stock_count', 'total_quantity', 'total_inventory_cost', 'total_inventory_value',
+          'batch_cost')
+
+
+def item_cost():
+    return ExpressionWrapper(F('quantity') * F('unit_cost'), output_field=MONEY)
+
+
+def item_value():
+    return ExpressionWrapper(F('quantity') * F('unit_price'), output_field=MONEY)
+
+
+def with_valuation(items):
+    """Annotate `items` with the `inventory_total_cost`/`inventory_total_value` the serializer returns."""
+    return items.annotate(inventory_total_cost=item_cost(), inventory_total_value=item_value())
+
+
+class SummaryCache:
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else getattr(settings, 'INVENTORY_SUMMARY_CACHE_TTL', 300)
+        self._summary = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+        # Bumped by every clear, so a computation that raced one does not cache what it read
+        self.generation = 0
+
+    def get(self, compute):
+        with self._lock:
+            if self._summary is not None and self._expires_at >= time.monotonic():
+                return self._summary
+            generation = self.generation
+        summary = compute()
+        with self._lock:
+            if generation == self.generation:
+                self._summary = summary
+                self._expires_at = time.monotonic() + self.ttl
+        return summary
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._summary = None
+
+
+summary_cache = SummaryCache()
+
+
+def inventory_summary():
+    """The valuation summary, from the cache when it is fresh."""
+    return summary_cache.get(compute_summary)
+
+
+def compute_summary():
+    groups = (
+        InventoryItem.objects.order_by()
+        .values('product_category', 'status')
+        .annotate(
+            item_count=Count('pk'),
+            low_stock_count=Count('pk', filter=Q(quantity__lte=F('min_stock_level'))),
+            total_quantity=Coalesce(Sum('quantity'), ZERO, output_field=MONEY),
+            total_inventory_cost=Coalesce(Sum(item_cost()), ZERO, output_field=MONEY),
+            total_inventory_value=Coalesce(Sum(item_value()), ZERO, output_field=MONEY),
+            batch_cost=Coalesce(Sum('on_hand_cost'), ZERO, output_field=MONEY),
+        )
+    )
+    overall = _new_totals()
+    categories, statuses = {}, {}
+    for group in groups:
+        for totals in (overall, categories.setdefault(group['product_category'], _new_totals()),
+                       statuses.setdefault(group['status'], _new_totals())):
+            for key in TOTALS:
+                totals[key] += group[key]
+
+    return {
+        **_finish(overall),
+        'by_category': [{'product_category': key, **_finish(totals)} for key, totals in sorted(categories.items())],
+        'by_status': [{'status': key, **_finish(totals)} for key, totals in sorted(statuses.items())],
+        'computed_at': timezone.now(),
+    }
+
+
+def _new_totals():
+    return dict.fromkeys(TOTALS, 0)
+
+
+def _finish(totals):
+    """Round the money totals and add the margin figures."""
+    summary = {key: Decimal(totals[key]).quantize(CENT, rounding=ROUND_HALF_UP) for key in TOTALS[2:]}
+    summary['item_count'] = totals['item_count']
+    summary['low_stock_count'] = totals['low_stock_count']
+    summary['total_margin'] = summary['total_inventory_value'] - summary['total_inventory_cost']
+    summary['margin_percent'] = (
+        (summary['total_margin'] * 100 / summary['total_inventory_value']).quantize(CENT, rounding=ROUND_HALF_UP)
+        if summary['total_inventory_value'] else None
+    )
+    return summary
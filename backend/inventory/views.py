@@ -1,23 +1,31 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponse, JsonResponse
+from django.http import JsonResponse
 from django.contrib import messages
-from django.contrib.auth.decorators import login_required
-from django.db.models import Q
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.core.paginator import Paginator
 from django.forms import modelformset_factory
-from openpyxl import Workbook
-from openpyxl.styles import NamedStyle
 from datetime import datetime
-import csv
-import pandas as pd
-from .models import InventoryItem, Batch, category_choices
+from inventory_management.datatables import ServerSideDatatableView
+from inventory_management.exports import default_chunk_size, iter_queryset_rows, stream_csv_response, xlsx_response
+from .models import InventoryItem, Batch, ImportJob, ImportRow, category_choices
+from .normalization import UPPERCASE_FIELDS
+from .import_diff import PreviewAlreadyApplied, apply_preview
+from .ledger import save_batch
+from .scan_cache import lookup_barcode
+from .search import search_items as search_inventory
+from .backfill import backfill_batches
+from .expiration import expiration_buckets, expiring_batches as batches_expiring_within
+from .valuation import inventory_summary as valuation_summary, with_valuation
 from .forms import InventoryItemForm, BatchForm
-from .upload_inventory_file import upload_inventory, process_corrected_data
-from django.db.models import Sum, Min, Avg
+from .upload_inventory_file import upload_inventory, save_import_row, commit_corrected_rows
+from django.db.models import Count
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.views.decorators.http import require_POST
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.response import Response
-from inventory.models import InventoryItem
 from inventory.serializers import InventoryItemSerializer
 
 @api_view(['GET'])
@@ -25,36 +33,70 @@ from inventory.serializers import InventoryItemSerializer
 @permission_classes([IsAuthenticated])  # 🔒 Restrict access to authenticated users
 def get_inventory_items(request):
     """Return a list of inventory items as JSON"""
-    items = InventoryItem.objects.all()
+    items = with_valuation(InventoryItem.objects.all())
     serializer = InventoryItemSerializer(items, many=True)
     return Response(serializer.data)
 
 
+@api_view(['GET'])
+def inventory_summary(request):
+    """Inventory cost, retail value and margin, overall and by category and status (cached)."""
+    return Response(valuation_summary())
+
+
+@api_view(['GET'])
+def expiring_batches(request):
+    """Value at risk per expiration horizon, and the batches expiring within `?days=` (default 7)."""
+    try:
+        days = int(request.GET.get('days', 7))
+    except ValueError:
+        return Response({'error': 'days must be a whole number.'}, status=400)
+    days = max(0, min(days, 365))
+    return Response({
+        'as_of': timezone.localdate(),
+        'buckets': expiration_buckets(),
+        'days': days,
+        'batches': batches_expiring_within(days),
+    })
+
+
 def inventory_list_view(request):
-    items = InventoryItem.objects.all ( ).annotate (
-        closest_expiration_date = Min ('batches__expiration_date'),
-        avg_batch_unit_cost = Avg ('batches__batch_unit_cost')
-    )
-    return render(request, 'inventory/inventory_list.html', {'items': items})
-from django.utils.timezone import now
-from datetime import timedelta
-from django.contrib.auth.decorators import user_passes_test
+    # Rows are loaded by the table from InventoryListData
+    return render(request, 'inventory/inventory_list.html')
+
+
+class InventoryListData(ServerSideDatatableView):
+    """Server-side rows for the inventory list table."""
+    model = InventoryItem
+    columns = [
+        'item_id', 'item_name', 'product_category', 'average_batch_cost', 'unit_price', 'quantity', 'status',
+        'min_stock_level', 'max_stock_level', 'nearest_expiration_date', '',
+    ]
+    order_columns = columns
+    search_columns = ['item_name', 'barcode', 'product_category']
+    column_filters = {'status': 'exact', 'product_category': 'exact'}
+    default_order = ['-item_id']
+
+    def column_filter_value(self, column, value):
+        # Stored upper-case, so an exact match on the upper-cased value ignores case and can
+        # use the (status, item_id) and (product_category, item_id) indexes
+        return value.upper() if column in UPPERCASE_FIELDS else value
+
+    def render_column(self, row, column):
+        if column in ('average_batch_cost', 'unit_price'):
+            return f"${getattr(row, column):.2f}"
+        if column == 'nearest_expiration_date':
+            return row.nearest_expiration_date.strftime('%Y-%m-%d') if row.nearest_expiration_date else 'N/A'
+        if column == '':
+            return render_to_string('inventory/inventory_list_actions.html', {'item': row})
+        return super().render_column(row, column)
+
 
 @login_required
 @user_passes_test(lambda u: u.is_superuser)  # Optional: restrict to superusers/admins
 def migrate_items_to_batches(request):
-    items_without_batches = InventoryItem.objects.annotate(batch_count=models.Count('batches')).filter(batch_count=0, quantity__gt=0)
-
-    created_batches = 0
-    for item in items_without_batches:
-        expiration_date = now().date() + timedelta(days=180)  # 6 months from now
-        Batch.objects.create(
-            inventory_item=item,
-            batch_quantity=item.quantity,
-            batch_unit_cost=item.unit_cost,
-            expiration_date=expiration_date
-        )
-        created_batches += 1
+    # Chunked and resumable; large catalogs should run `manage.py backfill_batches` instead
+    created_batches = backfill_batches()
 
     messages.success(request, f"✅ Created {created_batches} batch(es) for inventory items.")
     return redirect('inventory_list_view')
@@ -126,7 +168,7 @@ def batch_create_view(request, item_id):
         if form.is_valid():
             batch = form.save(commit=False)
             batch.inventory_item = inventory_item
-            batch.save()
+            save_batch(batch)
             messages.success(request, f"Batch for {inventory_item.item_name} created successfully.")
             return redirect('inventory_list_view')
     else:
@@ -136,73 +178,87 @@ def batch_create_view(request, item_id):
 
 
 @login_required
-def download_inventory(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="inventory.csv"'
+def batch_update_view(request, batch_id):
+    batch = get_object_or_404(Batch, pk=batch_id)
+    if request.method == 'POST':
+        form = BatchForm(request.POST, instance=batch)
+        if form.is_valid():
+            # Quantity changes go through the ledger like any other stock movement
+            save_batch(form.save(commit=False))
+            messages.success(request, f"Batch for {batch.inventory_item.item_name} updated successfully.")
+            return redirect('inventory_list_view')
+    else:
+        form = BatchForm(instance=batch)
+
+    return render(request, 'inventory/batch_form.html', {'form': form, 'inventory_item': batch.inventory_item})
 
-    writer = csv.writer(response)
-    writer.writerow([
-        'Item ID', 'Name', 'Barcode', 'Min Level', 'Max Level',
-        'Category', 'Status', 'Last Updated'
-    ])
 
-    for item in InventoryItem.objects.all():
-        writer.writerow([
-            item.item_id, item.item_name, item.barcode,
-            item.min_stock_level, item.max_stock_level,
-            item.product_category, item.status, item.last_updated
-        ])
+INVENTORY_EXPORT_COLUMNS = [
+    ('Item ID', 'item_id'), ('Name', 'item_name'), ('Barcode', 'barcode'),
+    ('Min Level', 'min_stock_level'), ('Max Level', 'max_stock_level'),
+    ('Category', 'product_category'), ('Status', 'status'), ('Last Updated', 'last_updated'),
+]
 
-    return response
+
+@login_required
+def download_inventory(request):
+    # Primary-key order lets the database stream rows without sorting the table first
+    return stream_csv_response(InventoryItem.objects.order_by('pk'), INVENTORY_EXPORT_COLUMNS, 'inventory.csv')
+
+
+def scan_barcode(request, barcode):
+    """Exact barcode lookup for register scans, served from the in-process scan cache."""
+    entry = lookup_barcode(barcode)
+    if entry is None:
+        return JsonResponse({'error': 'No item with this barcode.'}, status=404)
+    return JsonResponse(entry)
 
 
 def search_items(request):
-    query = request.GET.get('q', '').strip()
-    if not query:
-        return JsonResponse([], safe=False)
-    items = InventoryItem.objects.filter(
-        Q(item_id__icontains=query) |
-        Q(item_name__icontains=query) |
-        Q(barcode__icontains=query)
-    ).values('item_id', 'item_name', 'unit_cost', 'barcode', 'min_stock_level', 'max_stock_level', 'product_category', 'status')
-    return JsonResponse(list(items), safe=False)
+    """Type-ahead item search: exact barcode first, then name prefix, then other matches."""
+    try:
+        limit = int(request.GET.get('limit', ''))
+    except ValueError:
+        limit = None
+    return JsonResponse(search_inventory(request.GET.get('q', ''), limit), safe=False)
 
 
-def download_excel_file(data, title, fileName):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = title
-
-    headers = [
-        'Item Name (Required)', 'Unit Cost (Required, Numeric)',
-        'Unit Price (Required, Numeric)', 'Quantity (Required, Numeric)',
-        'Barcode (Optional)', 'Min Stock Level (Optional, Default: 1)',
-        'Max Stock Level (Optional, Default: 100)', 'Product Category (Optional, Default: SYSTEM)',
-        'Measurement Type (Optional, Default: count)', 'Status (Optional, Default: Active)',
-        'Expiration Date (Optional, Format: MM/DD/YYYY)'
-    ]
-    ws.append(headers)
-
-    barcode_style = NamedStyle(name="barcode_style", number_format="@")
-    wb.add_named_style(barcode_style)
-
-    for row in data:
-        if isinstance(row, dict):
-            ws.append([
-                row.get('item_name', ''), row.get('unit_cost', 0), row.get('unit_price', 0), row.get('quantity', 0),
-                row.get('barcode', ''), row.get('min_stock_level', 1), row.get('max_stock_level', 100),
-                row.get('product_category', 'SYSTEM'), row.get('measurement_type', 'count'),
-                row.get('status', 'Active'), row.get('expiration_date', ''),
-            ])
-        else:
-            ws.append(row)
+TEMPLATE_HEADERS = [
+    'Item Name (Required)', 'Unit Cost (Required, Numeric)',
+    'Unit Price (Required, Numeric)', 'Quantity (Required, Numeric)',
+    'Barcode (Optional)', 'Min Stock Level (Optional, Default: 1)',
+    'Max Stock Level (Optional, Default: 100)', 'Product Category (Optional, Default: SYSTEM)',
+    'Measurement Type (Optional, Default: count)', 'Status (Optional, Default: Active)',
+    'Expiration Date (Optional, Format: MM/DD/YYYY)'
+]
+BARCODE_COLUMN = TEMPLATE_HEADERS.index('Barcode (Optional)')
+
 
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+def download_excel_file(data, title, fileName):
+    """Stream `data` (lists in template column order, or row dicts) as an upload-template sheet."""
+    rows = (
+        [
+            row.get('item_name', ''), row.get('unit_cost', 0), row.get('unit_price', 0), row.get('quantity', 0),
+            row.get('barcode', ''), row.get('min_stock_level', 1), row.get('max_stock_level', 100),
+            row.get('product_category', 'SYSTEM'), row.get('measurement_type', 'count'),
+            row.get('status', 'Active'), row.get('expiration_date', ''),
+        ] if isinstance(row, dict) else row
+        for row in data
     )
-    response['Content-Disposition'] = f'attachment; filename="{fileName}.xlsx"'
-    wb.save(response)
-    return response
+    return xlsx_response(rows, TEMPLATE_HEADERS, f"{fileName}.xlsx", title=title, text_columns={BARCODE_COLUMN})
+
+
+@login_required
+def download_inventory_xlsx(request):
+    """The whole catalog in the upload-template layout, so it can be edited and re-uploaded."""
+    fields = [
+        'item_name', 'unit_cost', 'unit_price', 'quantity', 'barcode', 'min_stock_level',
+        'max_stock_level', 'product_category', 'measurement_type', 'status',
+    ]
+    # Items carry no expiration date of their own; that column is left blank
+    rows = (row + ('',) for row in iter_queryset_rows(InventoryItem.objects.order_by('pk'), fields))
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return download_excel_file(rows, "Inventory", f"inventory_{timestamp}")
 
 
 def download_template(request):
@@ -215,12 +271,71 @@ def download_template(request):
     return download_excel_file(sample_data, "Inventory Template", fileName)
 
 
-def download_invalid_records(request):
-    invalid_data = request.session.get('invalid_data', [])
-    if not invalid_data:
+def import_job_detail(request, job_id):
+    job = get_object_or_404(ImportJob, pk=job_id)
+    return render(request, 'inventory/import_job.html', {'job': job})
+
+
+def import_job_status(request, job_id):
+    """JSON progress for an import job, polled by the upload page."""
+    job = get_object_or_404(ImportJob, pk=job_id)
+    return JsonResponse(job.as_dict())
+
+
+def import_job_invalid_rows(request, job_id):
+    """Page through the staged rows of an import that still need correcting."""
+    job = get_object_or_404(ImportJob, pk=job_id)
+    rows = job.rows.filter(status__in=['INVALID', 'CORRECTED']).order_by('row_number')
+    page_obj = Paginator(rows, 50).get_page(request.GET.get('page'))
+    return render(request, 'inventory/edit_invalid_data.html', {
+        'job': job,
+        'page_obj': page_obj,
+        'corrected_count': job.rows.filter(status='CORRECTED').count(),
+    })
+
+
+def import_job_preview(request, job_id):
+    """Page through the staged diff of a previewed import, optionally filtered by change type."""
+    job = get_object_or_404(ImportJob, pk=job_id, preview=True)
+    change_type = request.GET.get('type', '')
+    rows = job.rows.exclude(change_type='').order_by('row_number')
+    if change_type:
+        rows = rows.filter(change_type=change_type)
+    counts = dict(job.rows.exclude(change_type='').order_by().values_list('change_type').annotate(total=Count('pk')))
+    page_obj = Paginator(rows.select_related('item'), 50).get_page(request.GET.get('page'))
+    return render(request, 'inventory/import_preview.html', {
+        'job': job,
+        'page_obj': page_obj,
+        'change_type': change_type,
+        'change_types': [(value, label, counts.get(value, 0)) for value, label in ImportRow.CHANGE_TYPE_CHOICES],
+        'pending_count': job.rows.filter(status='PREVIEW', change_type__in=['NEW', 'CHANGED']).count(),
+    })
+
+
+@require_POST
+def apply_import_preview(request, job_id):
+    """Write the new and changed rows of a previewed import in one bulk operation."""
+    job = get_object_or_404(ImportJob, pk=job_id, preview=True)
+    if job.status != 'SUCCEEDED':
+        messages.error(request, "This import has not finished processing yet.")
+    else:
+        try:
+            report = apply_preview(job)
+        except PreviewAlreadyApplied:
+            messages.error(request, "This import has already been applied.")
+        else:
+            messages.success(request, f"Import applied: {report}.")
+    return redirect('import_job_preview', job_id=job.pk)
+
+
+def download_invalid_records(request, job_id):
+    job = get_object_or_404(ImportJob, pk=job_id)
+    rows = job.rows.filter(status__in=['INVALID', 'CORRECTED']).order_by('row_number')
+    if not rows.exists():
         messages.error(request, "No invalid data to download.")
         return redirect('upload_inventory')
 
+    invalid_data = rows.values_list('data', flat=True).iterator(chunk_size=default_chunk_size())
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     fileName = f"invalid_records_{timestamp}"
     return download_excel_file(invalid_data, "Invalid Records", fileName)
@@ -0,0 +1,88 @@
+"""
+Streaming CSV and Excel downloads shared by the inventory and vendor apps.
+
+Rows are read with `values_list(...).iterator()` and written out as they are produced,
+so the queryset is never held in memory. CSV goes straight to the client; Excel files
+are built with openpyxl's write-only mode into a temporary file, which is then streamed.
+"""
+import csv
+import tempfile
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def default_chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+class Echo:
+    """File-like object whose `write` hands back the value, so csv.writer yields lines."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv_rows(queryset, columns, chunk_size=None):
+    """
+    Yield encoded CSV lines: the header, then one line per row of `queryset`.
+
+    `columns` is a list of ``(header, field)`` pairs; fields are anything `values_list`
+    accepts, including lookups across relations.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow([header for header, _ in columns])
+    for row in iter_queryset_rows(queryset, [field for _, field in columns], chunk_size):
+        yield writer.writerow(row)
+
+
+def stream_csv_response(queryset, columns, filename, chunk_size=None):
+    """Return a `StreamingHttpResponse` downloading `queryset` as `filename`."""
+    response = StreamingHttpResponse(iter_csv_rows(queryset, columns, chunk_size), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def iter_queryset_rows(queryset, fields, chunk_size=None):
+    """Yield `values_list` tuples for `fields`, fetching `chunk_size` rows per round trip."""
+    return queryset.values_list(*fields).iterator(chunk_size=chunk_size or default_chunk_size())
+
+
+def write_xlsx(rows, headers, title='Sheet1', text_columns=()):
+    """
+    Write `rows` to a temporary .xlsx file and return it, rewound.
+
+    The workbook is opened in write-only mode: openpyxl serializes each row as it is
+    appended instead of keeping a cell object per value, so memory stays flat however
+    many rows there are. Columns whose index is in `text_columns` are stored as text
+    (number format "@"), which keeps leading zeros in barcodes.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+    ws.append(headers)
+    for row in rows:
+        if text_columns:
+            row = [_text_cell(ws, value) if index in text_columns else value for index, value in enumerate(row)]
+        ws.append(row)
+
+    spool = tempfile.TemporaryFile()
+    wb.save(spool)
+    spool.seek(0)
+    return spool
+
+
+def _text_cell(ws, value):
+    cell = WriteOnlyCell(ws, value=None if value is None else str(value))
+    cell.number_format = '@'
+    return cell
+
+
+def xlsx_response(rows, headers, filename, title='Sheet1', text_columns=()):
+    """Return a `FileResponse` streaming `rows` as an .xlsx download named `filename`."""
+    spool = write_xlsx(rows, headers, title=title, text_columns=text_columns)
+    # FileResponse closes the temporary file, which deletes it, once it has been sent
+    return FileResponse(spool, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
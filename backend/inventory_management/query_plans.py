@@ -0,0 +1,60 @@
+"""
+SQLite query plans for the hot queries, so tests can fail when one stops using its index.
+
+`explain` returns the `EXPLAIN QUERY PLAN` lines of a queryset or SQL statement, and
+`captured_plans` those of every SELECT a block of code ran (its queries are captured with
+`CaptureQueriesContext`, so the plans are those of the SQL the code really sends).
+`plan_problems` picks out the lines that mean the query does not scale with the table:
+
+- `SCAN <table>`: the table (or all of one of its indexes) is read row by row,
+- `USE TEMP B-TREE`: rows are sorted or grouped in a temporary B-tree, instead of being
+  read in index order.
+
+Scans of FTS virtual tables (driven by MATCH) and of subqueries the plan materializes are
+not table scans and are not reported.
+
+Without `ANALYZE` statistics, which Django never collects, SQLite plans for large tables,
+so the plans do not depend on how many rows a test seeded.
+"""
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SORT = 'USE TEMP B-TREE'
+
+
+def explain(query, params=None, using=DEFAULT_DB_ALIAS):
+    """The plan lines for a queryset, or for `query` as SQL with `params`."""
+    if hasattr(query, 'query'):
+        query, params = query.query.sql_with_params()
+    with connections[using].cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + query, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def captured_plans(captured, tables=None, using=DEFAULT_DB_ALIAS):
+    """
+    (sql, plan) for each SELECT in `captured` (a `CaptureQueriesContext`), optionally only
+    those mentioning one of `tables`.
+    """
+    plans = []
+    for query in captured.captured_queries:
+        sql = query['sql']
+        if not sql.lstrip().upper().startswith('SELECT'):
+            continue
+        if tables is not None and not any(f'"{table}"' in sql or f' {table} ' in sql for table in tables):
+            continue
+        plans.append((sql, explain(sql, using=using)))
+    return plans
+
+
+def plan_problems(plan, sorts=True):
+    """The lines of `plan` that scan a table, or (with `sorts`) sort rows in a temporary B-tree."""
+    derived = {line.split()[-1] for line in plan if line.startswith(('MATERIALIZE ', 'CO-ROUTINE '))}
+    problems = []
+    for line in plan:
+        if line.startswith('SCAN '):
+            target = line.split()[1]
+            if 'VIRTUAL TABLE' not in line and target not in derived and target != 'CONSTANT':
+                problems.append(line)
+        elif sorts and line.startswith(SORT):
+            problems.append(line)
+    return problems
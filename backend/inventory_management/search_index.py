@@ -0,0 +1,160 @@
+"""
+SQLite FTS5 indexes behind the type-ahead searches.
+
+A `SearchIndex` is an external-content FTS5 table over some text columns of a model's table,
+tokenized into trigrams so substring (and so prefix) matches are answered from the index.
+Triggers on the model's table keep it in step with every write, bulk writes included.
+
+External content rows are found by `rowid`, which is only stable when the primary key is an
+integer (and so an alias for it). For other primary keys, pass `key`: the FTS table then
+keeps its own copy of the columns next to the key, stored UNINDEXED in `KEY_COLUMN`, and
+searches join back to the model's table on the key instead.
+
+SQLite drops a table's triggers whenever a migration rebuilds the table, so apps re-run
+`install` after every `migrate` as well as from the migration that first creates the index.
+Other database backends have no index; searches fall back to plain lookups there.
+"""
+from django.db import connection
+
+# Shortest term the trigram tokenizer can match
+MIN_TERM_LENGTH = 3
+# FTS column holding the model's key, for indexes created with `key`
+KEY_COLUMN = 'source_key'
+
+
+class SearchIndex:
+    def __init__(self, name, model, columns, key=None):
+        self.name = name
+        self.model = model
+        self.columns = list(columns)
+        self.key = key
+
+    @property
+    def table(self):
+        return self.model._meta.db_table
+
+    @property
+    def triggers(self):
+        return [f'{self.name}_ai', f'{self.name}_ad', f'{self.name}_au']
+
+    @property
+    def key_column(self):
+        """The FTS column identifying a hit's row: its `rowid`, or `KEY_COLUMN` when keyed."""
+        return KEY_COLUMN if self.key else 'rowid'
+
+    def supported(self, conn=None):
+        return (conn or connection).vendor == 'sqlite'
+
+    def statements(self):
+        if self.key:
+            return self._keyed_statements()
+        columns = ', '.join(self.columns)
+        new = ', '.join(f'new.{column}' for column in self.columns)
+        old = ', '.join(f'old.{column}' for column in self.columns)
+        insert = f"INSERT INTO {self.name}(rowid, {columns}) VALUES (new.rowid, {new});"
+        delete = f"INSERT INTO {self.name}({self.name}, rowid, {columns}) VALUES ('delete', old.rowid, {old});"
+        ai, ad, au = self.triggers
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.name} USING fts5("
+            f"{columns}, content='{self.table}', tokenize='trigram')",
+            f"CREATE TRIGGER IF NOT EXISTS {ai} AFTER INSERT ON {self.table} BEGIN {insert} END",
+            f"CREATE TRIGGER IF NOT EXISTS {ad} AFTER DELETE ON {self.table} BEGIN {delete} END",
+            f"CREATE TRIGGER IF NOT EXISTS {au} AFTER UPDATE OF {columns} ON {self.table} BEGIN {delete} {insert} END",
+        ]
+
+    def _keyed_statements(self):
+        columns = ', '.join(self.columns)
+        watched = ', '.join(dict.fromkeys(self.columns + [self.key]))
+        new = ', '.join(f'new.{column}' for column in [self.key] + self.columns)
+        insert = f"INSERT INTO {self.name}({KEY_COLUMN}, {columns}) VALUES ({new});"
+        # The key is UNINDEXED, so this reads the whole index; fine for the small tables keyed this way
+        delete = f"DELETE FROM {self.name} WHERE {KEY_COLUMN} = old.{self.key};"
+        ai, ad, au = self.triggers
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.name} USING fts5("
+            f"{KEY_COLUMN} UNINDEXED, {columns}, tokenize='trigram')",
+            f"CREATE TRIGGER IF NOT EXISTS {ai} AFTER INSERT ON {self.table} BEGIN {insert} END",
+            f"CREATE TRIGGER IF NOT EXISTS {ad} AFTER DELETE ON {self.table} BEGIN {delete} END",
+            f"CREATE TRIGGER IF NOT EXISTS {au} AFTER UPDATE OF {watched} ON {self.table} BEGIN {delete} {insert} END",
+        ]
+
+    def rebuild_statements(self):
+        if not self.key:
+            return [f"INSERT INTO {self.name}({self.name}) VALUES ('rebuild')"]
+        columns = ', '.join(self.columns)
+        return [
+            f"DELETE FROM {self.name}",
+            f"INSERT INTO {self.name}({KEY_COLUMN}, {columns}) SELECT {self.key}, {columns} FROM {self.table}",
+        ]
+
+    def install(self, conn=None):
+        """
+        Create the FTS table and its triggers if any are missing, and (re)build the index
+        when something was created. Returns True when it had to rebuild.
+        """
+        conn = conn or connection
+        if not self.supported(conn) or self.table not in conn.introspection.table_names():
+            return False
+        names = [self.name] + self.triggers
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE name IN (%s)" % ', '.join(['%s'] * len(names)), names,
+            )
+            if cursor.fetchone()[0] == len(names):
+                return False
+            for statement in self.statements() + self.rebuild_statements():
+                cursor.execute(statement)
+        return True
+
+    def drop(self, conn=None):
+        conn = conn or connection
+        if not self.supported(conn):
+            return
+        with conn.cursor() as cursor:
+            for trigger in self.triggers:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            cursor.execute(f"DROP TABLE IF EXISTS {self.name}")
+
+
+def normalize_query(query):
+    """Trim the query and collapse runs of whitespace, so equivalent input shares cache entries."""
+    return ' '.join(query.split())
+
+
+def search_terms(query):
+    """The whitespace-separated terms of `query` long enough for the index to match."""
+    return [term for term in query.split() if len(term) >= MIN_TERM_LENGTH]
+
+
+def match_expression(query):
+    """
+    Turn user input into an FTS5 MATCH expression: every term from `search_terms`, quoted,
+    must appear. Returns None when no term is long enough for the index.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return None
+    return ' '.join('"%s"' % term.replace('"', '""') for term in terms)
+
+
+def matches_terms(values, terms):
+    """
+    The in-memory equivalent of `match_expression`: whether every term appears, ignoring
+    case, within one of `values` (the indexed columns of a row).
+    """
+    values = [value.lower() for value in values if value]
+    return all(any(term.lower() in value for value in values) for term in terms)
+
+
+def like_prefix(query):
+    """A LIKE pattern (with ESCAPE '\\') matching values that start with `query`."""
+    return query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def prefix_upper_bound(prefix):
+    """The smallest string greater than every string starting with `prefix`, to range over an index."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def clamp_limit(limit, default, maximum):
+    return max(1, min(limit or default, maximum))
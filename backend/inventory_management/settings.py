@@ -191,10 +191,54 @@ USE_THOUSAND_SEPARATOR = False
 THOUSAND_SEPARATOR = ','
 CSRF_COOKIE_SAMESITE = 'None'
 CSRF_COOKIE_SECURE = True
-DATA_UPLOAD_MAX_NUMBER_FIELDS = 10000
 # settings.py
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # ✅ React app URL
     "http://localhost:5000",  # ✅ React app URL
 
 ]
+
+# Streaming CSV downloads: rows fetched from the database per round trip
+EXPORT_CHUNK_SIZE = 2000
+
+# Inventory spreadsheet uploads: rows per bulk_create/bulk_update statement
+INVENTORY_UPSERT_BATCH_SIZE = 1000
+# Rows read from an uploaded spreadsheet per streaming chunk
+INVENTORY_UPLOAD_CHUNK_SIZE = 5000
+# REST API CSV uploads: rows committed per transaction
+INVENTORY_API_CSV_CHUNK_SIZE = 1000
+# Incremental inventory sync API: items per page by default and at most
+INVENTORY_SYNC_PAGE_SIZE = 500
+INVENTORY_SYNC_MAX_PAGE_SIZE = 5000
+# Seconds a sync re-reads before the cursor ending the previous one, to pick up changes that
+# committed late; at least as long as the slowest write transaction (an import chunk)
+INVENTORY_SYNC_OVERLAP = 60
+# Register barcode scans: entries kept in each process's scan cache, and for how many seconds
+INVENTORY_SCAN_CACHE_SIZE = 50000
+INVENTORY_SCAN_CACHE_TTL = 60
+# Background inventory imports: worker threads per process and where uploads are spooled
+INVENTORY_IMPORT_WORKERS = 2
+INVENTORY_IMPORT_SPOOL_DIR = BASE_DIR / 'import_spool'
+# Item search type-ahead: results returned by default and at most
+INVENTORY_SEARCH_RESULTS = 20
+INVENTORY_SEARCH_MAX_RESULTS = 50
+# Vendor search type-ahead: results returned by default and at most
+VENDOR_SEARCH_RESULTS = 20
+VENDOR_SEARCH_MAX_RESULTS = 50
+# PO number autocomplete on the receiving lookup page: suggestions returned
+PO_AUTOCOMPLETE_RESULTS = 10
+# Type-ahead search result caches: entries kept per process, their lifetime in seconds, and
+# candidates fetched per query so longer queries can be answered from memory
+TYPEAHEAD_CACHE_SIZE = 1000
+TYPEAHEAD_CACHE_TTL = 30
+TYPEAHEAD_CACHE_ROWS = 200
+# Inventory valuation summary: seconds each process keeps it between item or batch writes
+INVENTORY_SUMMARY_CACHE_TTL = 300
+# Expiration alerts: horizons, in days from today, the batches expiring soon are bucketed by
+INVENTORY_EXPIRATION_HORIZONS = (0, 3, 7, 30)
+# Reorder-point scan (manage.py draft_reorders): rows per bulk insert of drafted POs and lines
+PO_REORDER_BATCH_SIZE = 1000
+# Batch backfill (manage.py backfill_batches): items given a batch per transaction
+INVENTORY_BACKFILL_CHUNK_SIZE = 1000
+# Stock ledger snapshots (manage.py snapshot_stock): snapshots written per bulk insert
+INVENTORY_SNAPSHOT_BATCH_SIZE = 1000
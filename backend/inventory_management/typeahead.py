@@ -0,0 +1,95 @@
+"""
+In-process result cache for the type-ahead searches.
+
+Each keystroke of a type-ahead box sends a query that extends the previous one, and every
+match for "coke" is also a match for "cok". So when the cached result for a shorter prefix
+of the query is complete (it holds every match, not just the first page), the longer
+query is answered by filtering and re-ranking those rows in memory, without a database
+round trip. Otherwise the query runs once, fetching up to `TYPEAHEAD_CACHE_ROWS`
+candidates so that its own result can serve the next keystrokes.
+
+Entries are kept in LRU order and expire after `TYPEAHEAD_CACHE_TTL` seconds. Each
+search module clears its cache from model signals when the rows it searches change, so
+staleness is bounded by the TTL only for writes that send no signal (queryset updates)
+and for writes made by other processes.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class TypeaheadCache:
+    def __init__(self, max_size=None, ttl=None, rows=None):
+        self.max_size = max_size or getattr(settings, 'TYPEAHEAD_CACHE_SIZE', 1000)
+        self.ttl = ttl if ttl is not None else getattr(settings, 'TYPEAHEAD_CACHE_TTL', 30)
+        self.rows = rows or getattr(settings, 'TYPEAHEAD_CACHE_ROWS', 200)
+        self._entries = OrderedDict()  # query -> (expires_at, rows, complete)
+        self._lock = threading.Lock()
+        # Bumped by every clear, so a search that raced one does not cache what it read
+        self.generation = 0
+        self.hits = 0
+        self.narrowed = 0
+        self.misses = 0
+
+    def _get(self, query):
+        cached = self._entries.get(query)
+        if cached is None or cached[0] < time.monotonic():
+            return None
+        self._entries.move_to_end(query)
+        return cached
+
+    def put(self, query, rows, complete, generation=None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[query] = (time.monotonic() + self.ttl, rows, complete)
+            self._entries.move_to_end(query)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def search(self, query, limit, fetch, narrow=None):
+        """
+        Return the first `limit` results for `query`.
+
+        `fetch(n)` runs the search and returns up to `n` rows, best first. `narrow(prefix,
+        rows)`, when given, returns the rows (from a complete result for `prefix`) that match
+        `query`, best first; it returns None when results for `prefix` cannot be narrowed to
+        `query`, e.g. because the two are matched differently.
+        """
+        with self._lock:
+            cached = self._get(query)
+            if cached is not None:
+                self.hits += 1
+                return cached[1][:limit]
+            generation = self.generation
+            # The longest prefix of the query with a complete cached result
+            prefix = None
+            if narrow is not None:
+                for end in range(len(query) - 1, 0, -1):
+                    cached = self._get(query[:end])
+                    if cached is not None and cached[2]:
+                        prefix = query[:end], cached[1]
+                        break
+
+        rows = narrow(*prefix) if prefix is not None else None
+        if rows is not None:
+            with self._lock:
+                self.narrowed += 1
+            self.put(query, rows, True, generation)
+            return rows[:limit]
+
+        with self._lock:
+            self.misses += 1
+        size = max(self.rows, limit)
+        rows = list(fetch(size + 1))
+        complete = len(rows) <= size
+        rows = rows[:size]
+        self.put(query, rows, complete, generation)
+        return rows[:limit]
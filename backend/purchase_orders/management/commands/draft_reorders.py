@@ -0,0 +1,33 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from purchase_orders.reorder import draft_reorder_purchase_orders
+
+
+class Command(BaseCommand):
+    help = "Draft one purchase order per vendor for every active item at or below its minimum stock level."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report what would be ordered without creating POs.")
+        parser.add_argument('--user', help="Username to record as the drafts' creator.")
+
+    def handle(self, *args, dry_run, user, **options):
+        if user:
+            try:
+                user = User.objects.get(username=user)
+            except User.DoesNotExist:
+                raise CommandError(f"No user '{user}'.")
+
+        report = draft_reorder_purchase_orders(user=user, dry_run=dry_run)
+        for order in report.orders:
+            self.stdout.write(f"{order.purchase_order_id or '(dry run)'}  {order.vendor_id}: "
+                              f"{order.items_count} unit(s), {order.total_cost:.2f}")
+        if report.no_vendor:
+            self.stdout.write(self.style.WARNING(
+                f"{len(report.no_vendor)} item(s) need reordering but have no vendor: "
+                + ', '.join(map(str, report.no_vendor[:20])) + (' ...' if len(report.no_vendor) > 20 else '')
+            ))
+        verb = "Would draft" if dry_run else "Drafted"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {len(report.orders)} purchase order(s) with {report.lines} line(s)."
+        ))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0024_query_plan_indexes'),
+        ('purchase_orders', '0012_alter_purchaseorder_created_by_and_more'),
+        ('vendors', '0002_vendor_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['vendor', 'order_date'], name='po_vendor_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorderitem',
+            index=models.Index(fields=['purchase_order', 'item'], name='po_item_order_item_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receivinglog',
+            index=models.Index(fields=['po_item', 'date_received'], name='po_receiving_item_date_idx'),
+        ),
+    ]
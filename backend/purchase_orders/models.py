@@ -1,6 +1,6 @@
 from datetime import date, datetime
 from django.db import models
-from django.db.models import Sum, F
+from django.db.models import Sum, F, Subquery
 from django.db import transaction
 from rest_framework.exceptions import ValidationError
 from vendors.models import Vendor
@@ -87,19 +87,25 @@ class PurchaseOrder(models.Model):
         self.total_cost = self.calculated_total_cost  # Update total cost
         if not self.purchase_order_id:
             with transaction.atomic ( ):
-                last_po = PurchaseOrder.objects.select_for_update ( ).order_by ('purchase_order_id').last ( )
-                if last_po:
-                    last_id = int (last_po.purchase_order_id.split ('-') [ -1 ])
-                    self.purchase_order_id = f"PO-{last_id + 1:04d}"
-                else:
-                    self.purchase_order_id = "PO-0001"
+                self.purchase_order_id = PurchaseOrder.next_ids (1) [ 0 ]
         super ( ).save (*args, **kwargs)
 
+    @classmethod
+    def next_ids (cls, count):
+        """The next `count` sequential PO ids ('PO-0001', ...). Call inside a transaction."""
+        last_po = cls.objects.select_for_update ( ).order_by ('purchase_order_id').last ( )
+        last_id = int (last_po.purchase_order_id.split ('-') [ -1 ]) if last_po else 0
+        return [ f"PO-{last_id + n:04d}" for n in range (1, count + 1) ]
+
     def __str__(self):
         return f"{self.purchase_order_id} - {self.vendor.company_name}"
 
     class Meta:
         ordering = ['-order_date']
+        indexes = [
+            # A vendor's orders newest first (see PurchaseOrderItem.fetch_unit_cost)
+            models.Index (fields = [ 'vendor', 'order_date' ], name = 'po_vendor_date_idx'),
+        ]
         verbose_name = "Purchase Order"
         verbose_name_plural = "Purchase Orders"
 
@@ -117,16 +123,26 @@ class PurchaseOrderItem(models.Model):
 
 
     def fetch_unit_cost(self, vendor):
+        # The vendor's latest order with the item, read newest first from (vendor, order_date),
+        # then the item's line on it: the item's whole order history is never sorted
+        latest_order = PurchaseOrder.objects.filter(
+            vendor=vendor,
+            items__item_id=self.item_id
+        ).order_by('-order_date').values('pk')[:1]
         recent_order = PurchaseOrderItem.objects.filter(
-            purchase_order__vendor=vendor,
-            item=self.item
-        ).order_by('-purchase_order__order_date').first()
+            purchase_order=Subquery(latest_order),
+            item_id=self.item_id
+        ).order_by('pk').first()
         return recent_order.unit_cost if recent_order else self.item.unit_cost
 
     def __str__(self):
         return f"{self.item.item_name} ({self.quantity})"
 
     class Meta:
+        indexes = [
+            # A PO's lines, and one item's line on a PO
+            models.Index (fields = [ 'purchase_order', 'item' ], name = 'po_item_order_item_idx'),
+        ]
         verbose_name = "Purchase Order Item"
         verbose_name_plural = "Purchase Order Items"
 
@@ -151,5 +167,9 @@ class ReceivingLog(models.Model):
         return f"{self.po_item.item.item_name} - {status}"
 
     class Meta:
+        indexes = [
+            # A PO line's receipts in date order
+            models.Index (fields = [ 'po_item', 'date_received' ], name = 'po_receiving_item_date_idx'),
+        ]
         verbose_name = "Receiving Log"
         verbose_name_plural = "Receiving Logs"
\ No newline at end of file
@@ -1,13 +1,39 @@
 from datetime import date
 
+from django.conf import settings
+from django.db import transaction
+from django.utils.dateparse import parse_date
 from django.contrib import messages
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from .forms import ReceivingLogForm
+from inventory.ledger import record_receipt
+from inventory_management.search_index import prefix_upper_bound
+from inventory.models import InventoryItem
 from .models import PurchaseOrderItem, PurchaseOrder, ReceivingLog
 from django.utils.timezone import now, timedelta
 
 
+# POs that can still be received at the dock
+RECEIVABLE_STATUSES = ('DRAFT', 'APPROVED', 'SUBMITTED')
+
+
+def normalize_po_number(value):
+    """Turn user input into a PO id: trimmed, upper-cased, and digit-only input as 'PO-NNNN'."""
+    value = value.strip().upper()
+    if value.isdigit():
+        return f"PO-{value.zfill(4)}"
+    return value
+
+
+def po_number_prefix(value):
+    """The PO id prefix that typed input stands for: digit-only input is a prefix of the number."""
+    value = value.strip().upper()
+    if value.isdigit():
+        return f"PO-{value}"
+    return value
+
+
 # Receiving logs
 
 def lookup_po(request):
@@ -18,14 +44,12 @@ def lookup_po(request):
 
 
 
+@transaction.atomic
 def receiving_page(request, po_item_id):
     try:
-        # Check if input is numeric-only (e.g., '0094') and prepend 'PO-' if necessary
-        if po_item_id.isdigit ( ):
-            po_item_id = f"PO-{po_item_id.zfill (4)}"  # Ensure proper format, e.g., 'PO-0094'
-
-        # Perform case-insensitive lookup
-        purchase_order = PurchaseOrder.objects.get (purchase_order_id__iexact = po_item_id)
+        # Numeric-only input (e.g., '94') means 'PO-0094'; PO ids are stored upper-case
+        po_item_id = normalize_po_number (po_item_id)
+        purchase_order = PurchaseOrder.objects.get (purchase_order_id = po_item_id)
     except PurchaseOrder.DoesNotExist:
         messages.error (request,
                         f"Purchase Order {po_item_id} does not exist. Please check the PO number and try again.")
@@ -46,7 +70,9 @@ def receiving_page(request, po_item_id):
         # Process the receiving form
         for item in purchase_order.items.all():
             received_quantity = int(request.POST.get(f'received_quantity_{item.id}', 0))
-            expiration_date = request.POST.get(f'expiration_date_{item.id}', default_expiration_date)
+            expiration_date = request.POST.get(f'expiration_date_{item.id}') or default_expiration_date
+            if isinstance(expiration_date, str):
+                expiration_date = parse_date(expiration_date) or default_expiration_date
             is_accepted = request.POST.get(f'is_accepted_{item.id}', False) == 'on'
             rejection_reason = request.POST.get(f'rejection_reason_{item.id}', "Accepted")
 
@@ -54,21 +80,14 @@ def receiving_page(request, po_item_id):
             if is_accepted:
                 rejection_reason = "Accepted"  # Ensure rejection reason is None if accepted
 
-                # Save the batch only if the item is accepted
+                # Receive into a new batch only if the item is accepted
                 if is_accepted and received_quantity > 0:
-                    Batch.objects.create (
-                        inventory_item = item.item,
-                        quantity = received_quantity,
-                        expiration_date = expiration_date,
-                        unit_cost = item.unit_cost,  # Pull from PO item
-                        unit_price = item.item.unit_price  # Use fixed unit price from InventoryItem
-                    )
-
-                    # Update the average unit cost in InventoryItem
-                    item.item.unit_cost = Batch.objects.filter (inventory_item = item.item).aggregate (
-                        avg_unit_cost = Sum (F ('unit_cost') * F ('quantity')) / Sum ('quantity')
-                    ) [ 'avg_unit_cost' ]
-                    item.item.save ( )
+                    record_receipt (item.item, received_quantity, item.unit_cost, expiration_date,
+                                    reference = f"po:{purchase_order.purchase_order_id}")
+
+                    # The item's unit cost follows the weighted average cost of its batches
+                    item.item.refresh_from_db (fields = [ 'average_batch_cost' ])
+                    InventoryItem.objects.filter (pk = item.item_id).update (unit_cost = item.item.average_batch_cost)
 
             # Save the receiving log
             ReceivingLog.objects.create(
@@ -101,9 +120,35 @@ def receiving_success(request):
     return render(request, 'purchase_orders/receiving_success.html')
 
 def autocomplete_po(request):
-    if 'term' in request.GET:
-        term = request.GET.get('term')
-        matching_pos = PurchaseOrder.objects.filter(purchase_order_id__icontains=term)[:10]
-        results = [{'id': po.id, 'value': po.purchase_order_id} for po in matching_pos]
-        return JsonResponse(results, safe=False)
-    return JsonResponse([], safe=False)
\ No newline at end of file
+    """
+    PO number suggestions for the lookup box, as jQuery UI autocomplete label/value pairs.
+
+    Matches are a range scan over the primary key (ids starting with the typed prefix), newest
+    first, so lookups stay index-only however much PO history there is. An exact match for
+    digit-only input ('94' for PO-0094) comes first. `?receivable=1` limits suggestions to
+    POs that can still be received.
+    """
+    term = request.GET.get('term', '')
+    prefix = po_number_prefix(term)
+    if not prefix:
+        return JsonResponse([], safe=False)
+    limit = getattr(settings, 'PO_AUTOCOMPLETE_RESULTS', 10)
+
+    orders = PurchaseOrder.objects.all()
+    if request.GET.get('receivable'):
+        orders = orders.filter(status__in=RECEIVABLE_STATUSES)
+    fields = ('purchase_order_id', 'status', 'vendor__company_name')
+    upper_bound = prefix_upper_bound(prefix)
+    exact = normalize_po_number(term)
+    matches = list(orders.filter(purchase_order_id=exact).values(*fields)) if exact != prefix else []
+    matches += orders.filter(
+        purchase_order_id__gte=prefix, purchase_order_id__lt=upper_bound,
+    ).exclude(purchase_order_id=exact).order_by('-purchase_order_id').values(*fields)[:limit - len(matches)]
+
+    return JsonResponse([
+        {
+            'label': f"{po['purchase_order_id']} - {po['vendor__company_name']} ({po['status']})",
+            'value': po['purchase_order_id'],
+        }
+        for po in matches
+    ], safe=False)
@@ -1,11 +1,13 @@
-from django.core.paginator import Paginator
 from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils.html import format_html
+from inventory_management.datatables import ServerSideDatatableView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from .models import PurchaseOrder, PurchaseOrderItem
 from .serializers import PurchaseOrderSerializer, PurchaseOrderItemSerializer
-from vendors.models import Vendor
+from vendors.search import search_vendors
 from vendors.serializers import VendorSerializer
 import logging
 
@@ -37,18 +39,12 @@ class PurchaseOrderViewSet(ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def search_vendors(self, request):
-        query = request.GET.get('q', '').strip()
-        if query:
-            vendors = Vendor.objects.filter(
-                company_name__icontains=query
-            ) | Vendor.objects.filter(
-                contact_name__icontains=query
-            ) | Vendor.objects.filter(
-                contact_number__icontains=query
-            )
-            serializer = VendorSerializer(vendors, many=True)
-            return Response(serializer.data)
-        return Response([])
+        try:
+            limit = int(request.GET.get('limit', ''))
+        except ValueError:
+            limit = None
+        vendors = search_vendors(request.GET.get('q', ''), limit)
+        return Response(VendorSerializer(vendors, many=True).data)
 
 
 class PurchaseOrderItemViewSet(ModelViewSet):
@@ -70,21 +66,36 @@ class PurchaseOrderItemViewSet(ModelViewSet):
 
 # P.O.'s list
 def purchase_order_list(request):
-    purchase_orders = PurchaseOrder.objects.all().order_by('-purchase_order_id')
-    paginator = Paginator(purchase_orders, 10)  # Show 10 orders per page
-    page = request.GET.get('page', 1)
-
-    try:
-        page_obj = paginator.page(page)
-    except PageNotAnInteger:
-        page_obj = paginator.page(1)
-    except EmptyPage:
-        page_obj = paginator.page(paginator.num_pages)
-
-    context = {
-        'purchase_orders': purchase_orders,
-        'page_obj': page_obj,
-        'is_paginated': page_obj.has_other_pages(),
-        'paginator': paginator,
-    }
-    return render(request, 'purchase_orders/purchase_order_list.html', context)
+    # Rows are loaded by the table from PurchaseOrderListData
+    return render(request, 'purchase_orders/purchase_order_list.html')
+
+
+class PurchaseOrderListData(ServerSideDatatableView):
+    """Server-side rows for the purchase order list table."""
+    model = PurchaseOrder
+    columns = [
+        'purchase_order_id', 'vendor.company_name', 'status', 'order_date', 'expected_date', 'received_date',
+        'terms', 'payment_method', 'items_count', 'total_cost', 'created_by', 'updated_by', '',
+    ]
+    order_columns = [
+        'purchase_order_id', 'vendor.company_name', 'status', 'order_date', 'expected_date', 'received_date',
+        'terms', 'payment_method', 'items_count', 'total_cost', 'created_by.username', 'updated_by.username', '',
+    ]
+    search_columns = ['purchase_order_id', 'vendor__company_name']
+    column_filters = {'status': 'exact'}
+    default_order = ['-purchase_order_id']
+
+    def get_initial_queryset(self):
+        return super().get_initial_queryset().select_related('vendor', 'created_by', 'updated_by')
+
+    def render_column(self, row, column):
+        if column == 'status':
+            return format_html('<span class="badge {}">{}</span>', row.get_status_class(), row.get_status_display())
+        if column in ('order_date', 'expected_date', 'received_date'):
+            value = getattr(row, column)
+            return value.strftime('%b %d, %Y') if value else 'N/A'
+        if column == 'total_cost':
+            return f"${row.total_cost}"
+        if column == '':
+            return render_to_string('purchase_orders/purchase_order_list_actions.html', {'purchase_order': row})
+        return super().render_column(row, column)
@@ -0,0 +1,132 @@
+"""
+Reorder-point scan: draft purchase orders for every active item that has run low.
+
+An item is reordered when its inventory position (`quantity` plus what open POs still have
+on order) is at or below `min_stock_level`; it is ordered back up to `max_stock_level`. The
+vendor and unit cost come from the cheapest `VendorItem` for the item, or else from the
+item's most recent PO line. Items with neither are skipped and reported.
+
+The scan is one SQL query over the catalog. The cheap `quantity <= min_stock_level` test
+comes first, so the on-order and vendor subqueries only run for items that are already
+low. The drafts are then written with two `bulk_create`s: one PO per vendor, then all
+their lines.
+"""
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from inventory.models import InventoryItem
+from vendors.models import VendorItem
+from .models import PurchaseOrder, PurchaseOrderItem
+from .po_receiving import RECEIVABLE_STATUSES
+
+
+@dataclass
+class ReorderLine:
+    item_id: int
+    item_name: str
+    vendor_id: str
+    quantity: int
+    unit_cost: object
+
+
+@dataclass
+class ReorderReport:
+    orders: list = field(default_factory=list)
+    lines: int = 0
+    # Items that need reordering but have no vendor to order them from
+    no_vendor: list = field(default_factory=list)
+
+
+def reorder_candidates():
+    """Rows for the active items at or below their reorder point, with on-order quantity and vendor options."""
+    on_order = (
+        PurchaseOrderItem.objects.filter(item=OuterRef('pk'), purchase_order__status__in=RECEIVABLE_STATUSES)
+        .order_by().values('item').annotate(total=Sum('quantity')).values('total')
+    )
+    vendor_items = VendorItem.objects.filter(item=OuterRef('pk')).order_by('cost_price', '-last_purchased_date', '-pk')
+    last_lines = PurchaseOrderItem.objects.filter(item=OuterRef('pk')).order_by('-purchase_order__order_date', '-pk')
+    return (
+        InventoryItem.objects.filter(status='ACTIVE', quantity__lte=F('min_stock_level'),
+                                     max_stock_level__gt=F('quantity'))
+        .order_by('pk')
+        .annotate(
+            on_order=Coalesce(Subquery(on_order), 0, output_field=IntegerField()),
+            vendor_item_vendor=Subquery(vendor_items.values('vendor_id')[:1]),
+            vendor_item_cost=Subquery(vendor_items.values('cost_price')[:1]),
+            last_po_vendor=Subquery(last_lines.values('purchase_order__vendor_id')[:1]),
+            last_po_cost=Subquery(last_lines.values('unit_cost')[:1]),
+        )
+        .values('pk', 'item_name', 'quantity', 'min_stock_level', 'max_stock_level', 'on_order',
+                'vendor_item_vendor', 'vendor_item_cost', 'last_po_vendor', 'last_po_cost')
+    )
+
+
+def plan_reorders(rows=None):
+    """Turn candidate rows into order lines. Returns (lines, ids of the items without a vendor)."""
+    lines, no_vendor = [], []
+    for row in reorder_candidates() if rows is None else rows:
+        position = row['quantity'] + row['on_order']
+        if position > row['min_stock_level']:
+            continue
+        quantity = math.ceil(row['max_stock_level'] - position)
+        if quantity <= 0:
+            continue
+        if row['vendor_item_vendor'] is not None:
+            vendor_id, unit_cost = row['vendor_item_vendor'], row['vendor_item_cost']
+        elif row['last_po_vendor'] is not None:
+            vendor_id, unit_cost = row['last_po_vendor'], row['last_po_cost']
+        else:
+            no_vendor.append(row['pk'])
+            continue
+        lines.append(ReorderLine(row['pk'], row['item_name'], vendor_id, quantity, unit_cost))
+    return lines, no_vendor
+
+
+def batch_size():
+    return getattr(settings, 'PO_REORDER_BATCH_SIZE', 1000)
+
+
+def draft_reorder_purchase_orders(user=None, dry_run=False):
+    """
+    Scan the catalog and create one DRAFT purchase order per vendor holding all of its
+    reorder lines. With `dry_run`, report what would be ordered without writing anything.
+    """
+    lines, no_vendor = plan_reorders()
+    report = ReorderReport(lines=len(lines), no_vendor=no_vendor)
+    by_vendor = defaultdict(list)
+    for line in lines:
+        by_vendor[line.vendor_id].append(line)
+    if dry_run or not by_vendor:
+        report.orders = [
+            PurchaseOrder(vendor_id=vendor_id, items_count=sum(line.quantity for line in vendor_lines),
+                          total_cost=sum(line.quantity * line.unit_cost for line in vendor_lines))
+            for vendor_id, vendor_lines in by_vendor.items()
+        ]
+        return report
+
+    today = timezone.localdate()
+    with transaction.atomic():
+        orders = [
+            PurchaseOrder(
+                purchase_order_id=po_id, vendor_id=vendor_id, status='DRAFT', order_date=today,
+                items_count=sum(line.quantity for line in vendor_lines),
+                total_cost=sum(line.quantity * line.unit_cost for line in vendor_lines),
+                notes="Drafted by the reorder-point scan.", created_by=user, updated_by=user,
+            )
+            for po_id, (vendor_id, vendor_lines) in zip(PurchaseOrder.next_ids(len(by_vendor)), by_vendor.items())
+        ]
+        PurchaseOrder.objects.bulk_create(orders, batch_size=batch_size())
+        PurchaseOrderItem.objects.bulk_create([
+            PurchaseOrderItem(purchase_order=order, item_id=line.item_id, item_desc=line.item_name,
+                              quantity=line.quantity, unit_cost=line.unit_cost)
+            for order in orders for line in by_vendor[order.vendor_id]
+        ], batch_size=batch_size())
+    report.orders = orders
+    return report
@@ -1,9 +1,20 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.utils import timezone
 from .forms import PurchaseOrderForm, PurchaseOrderItemForm
-from .models import PurchaseOrder, PurchaseOrderItem
-from vendors.models import Vendor
+from .models import PurchaseOrder, PurchaseOrderItem, ReceivingLog
+from .po_receiving import normalize_po_number
+from .reorder import draft_reorder_purchase_orders
+from vendors.models import Vendor, VendorItem
 from inventory.models import InventoryItem
+from inventory_management.query_plans import captured_plans, explain, plan_problems
 
 
 class PurchaseOrderFormTest (TestCase):
@@ -84,3 +95,182 @@ class TestAJAXSearch (TestCase):
         response = self.client.get ('/api/items/search/?q=Sample Item')
         self.assertEqual (response.status_code, 200)
         # Add assertions for JSON response content checking
+
+
+class PurchaseOrderAutocompleteTest (TestCase):
+
+    def setUp (self):
+        vendor = Vendor.objects.create (company_name = 'Acme Foods', address_line1 = '1 Main St', city = 'Springfield',
+                                        state = 'IL', zip_code = '62701')
+        # PurchaseOrder.save ( ) reads its items, which needs a saved row; bulk_create skips it
+        PurchaseOrder.objects.bulk_create ([
+            PurchaseOrder (purchase_order_id = po_id, vendor = vendor, status = status, order_date = timezone.now ( ).date ( ))
+            for po_id, status in [ ('PO-0094', 'SUBMITTED'), ('PO-0941', 'RECEIVED'), ('PO-0942', 'DRAFT'), ('PO-9400', 'APPROVED') ]
+        ])
+
+    def suggest (self, term, **params):
+        response = self.client.get (reverse ('autocomplete_po'), {'term': term, **params})
+        return [ suggestion [ 'value' ] for suggestion in response.json ( ) ]
+
+    def test_prefix_matches_newest_first (self):
+        self.assertEqual (self.suggest ('po-0'), [ 'PO-0942', 'PO-0941', 'PO-0094' ])
+        self.assertEqual (self.suggest ('PO-1'), [ ])
+
+    def test_digits_match_number_exactly_then_as_prefix (self):
+        self.assertEqual (self.suggest ('94'), [ 'PO-0094', 'PO-9400' ])
+
+    def test_receivable_filter_and_label (self):
+        self.assertEqual (self.suggest ('po-094', receivable = 1), [ 'PO-0942' ])
+        response = self.client.get (reverse ('autocomplete_po'), {'term': '94'})
+        self.assertEqual (response.json ( ) [ 0 ], {'label': 'PO-0094 - Acme Foods (SUBMITTED)', 'value': 'PO-0094'})
+
+    def test_normalize_po_number (self):
+        self.assertEqual (normalize_po_number (' 94 '), 'PO-0094')
+        self.assertEqual (normalize_po_number ('po-0094'), 'PO-0094')
+
+
+class PurchaseOrderListDataTest (TestCase):
+
+    def test_searches_vendor_and_renders_status_badge (self):
+        address = {'address_line1': '1 Main St', 'city': 'Springfield', 'state': 'IL', 'zip_code': '62701'}
+        acme = Vendor.objects.create (company_name = 'Acme Foods', **address)
+        best = Vendor.objects.create (company_name = 'Best Produce', **address)
+        PurchaseOrder.objects.bulk_create ([
+            PurchaseOrder (purchase_order_id = 'PO-0001', vendor = acme, status = 'SUBMITTED', order_date = date (2025, 1, 2)),
+            PurchaseOrder (purchase_order_id = 'PO-0002', vendor = best, status = 'DRAFT', order_date = date (2025, 1, 3)),
+        ])
+        self.client.force_login (User.objects.create_user ('clerk', password = 'x'))
+
+        response = self.client.get (reverse ('purchase_order_list_data'), {'draw': 1, 'search[value]': 'acme'}).json ( )
+
+        self.assertEqual (response [ 'recordsFiltered' ], 1)
+        row = response [ 'data' ] [ 0 ]
+        self.assertEqual (row [ :4 ], [ 'PO-0001', 'Acme Foods', '<span class="badge bg-primary">Submitted</span>', 'Jan 02, 2025' ])
+        self.assertIn ('Print', row [ 12 ])
+
+
+class ReorderScanTest (TestCase):
+
+    def setUp (self):
+        address = {'address_line1': '1 Main St', 'city': 'Springfield', 'state': 'IL', 'zip_code': '62701'}
+        self.acme = Vendor.objects.create (company_name = 'Acme Foods', **address)
+        self.best = Vendor.objects.create (company_name = 'Best Produce', **address)
+
+        def item (name, quantity, low, high, status = 'ACTIVE'):
+            return InventoryItem.objects.create (item_name = name, unit_cost = 1, unit_price = 2, quantity = quantity,
+                                                 min_stock_level = low, max_stock_level = high, status = status)
+
+        self.flour = item ('Flour', 2, 5, 20)  # priced by two vendors
+        self.salt = item ('Salt', 1, 5, 10)  # last bought from Best Produce
+        self.sugar = item ('Sugar', 3, 5, 10)  # low, but enough already on order
+        self.yeast = item ('Yeast', 0, 2, 6)  # no vendor
+        item ('Rice', 50, 5, 100)
+        item ('Oats', 0, 5, 10, status = 'INACTIVE')
+
+        VendorItem.objects.create (vendor = self.acme, item = self.flour, cost_price = Decimal ('1.50'))
+        VendorItem.objects.create (vendor = self.best, item = self.flour, cost_price = Decimal ('2.00'))
+        PurchaseOrder.objects.bulk_create ([
+            PurchaseOrder (purchase_order_id = 'PO-0001', vendor = self.best, status = 'RECEIVED', order_date = date (2025, 1, 2)),
+            PurchaseOrder (purchase_order_id = 'PO-0002', vendor = self.acme, status = 'DRAFT', order_date = date (2025, 1, 3)),
+        ])
+        PurchaseOrderItem.objects.bulk_create ([
+            PurchaseOrderItem (purchase_order_id = 'PO-0001', item = self.salt, quantity = 4, unit_cost = 3),
+            PurchaseOrderItem (purchase_order_id = 'PO-0002', item = self.sugar, quantity = 5, unit_cost = 2),
+        ])
+
+    def test_drafts_one_order_per_vendor_up_to_max_stock (self):
+        # The scan, the id lookup, two bulk inserts and the savepoint around them
+        with self.assertNumQueries (6):
+            report = draft_reorder_purchase_orders ( )
+
+        self.assertEqual (report.no_vendor, [ self.yeast.pk ])
+        self.assertEqual ([ (order.purchase_order_id, order.vendor_id) for order in report.orders ],
+                          [ ('PO-0003', self.acme.pk), ('PO-0004', self.best.pk) ])
+        lines = PurchaseOrderItem.objects.filter (purchase_order__status = 'DRAFT').exclude (purchase_order_id = 'PO-0002')
+        self.assertEqual (sorted ((line.purchase_order_id, line.item.item_name, line.quantity, line.unit_cost) for line in lines),
+                          [ ('PO-0003', 'FLOUR', 18, Decimal ('1.50')), ('PO-0004', 'SALT', 9, Decimal ('3.00')) ])
+        self.assertEqual (PurchaseOrder.objects.get (pk = 'PO-0004').total_cost, 27)
+
+        # The new drafts are on order, so the next run has nothing left to order
+        self.assertEqual (draft_reorder_purchase_orders ( ).lines, 0)
+
+    def test_command_dry_run_writes_nothing (self):
+        out = StringIO ( )
+        call_command ('draft_reorders', dry_run = True, stdout = out)
+        self.assertIn ('Would draft 2 purchase order(s) with 2 line(s).', out.getvalue ( ))
+        self.assertEqual (PurchaseOrder.objects.count ( ), 2)
+
+
+class PurchaseOrderReceiptTest (TestCase):
+
+    def test_marking_received_receives_once_into_batches_and_ledger (self):
+        vendor = Vendor.objects.create (company_name = 'Acme Foods', address_line1 = '1 Main St', city = 'Springfield',
+                                        state = 'IL', zip_code = '62701')
+        item = InventoryItem.objects.create (item_name = 'Flour', unit_cost = 1, unit_price = 2, quantity = 5)
+        PurchaseOrder.objects.bulk_create ([
+            PurchaseOrder (purchase_order_id = 'PO-0001', vendor = vendor, status = 'SUBMITTED', order_date = date (2025, 1, 2)),
+        ])
+        PurchaseOrderItem.objects.bulk_create ([
+            PurchaseOrderItem (purchase_order_id = 'PO-0001', item = item, quantity = 10, unit_cost = Decimal ('1.20')),
+        ])
+
+        order = PurchaseOrder.objects.get (pk = 'PO-0001')
+        order.status = 'RECEIVED'
+        order.save ( )
+        order.save ( )
+
+        item.refresh_from_db ( )
+        self.assertEqual ((item.quantity, item.on_hand_quantity, item.average_batch_cost), (15, 10, Decimal ('1.20')))
+        self.assertEqual (list (item.stock_movements.filter (reason = 'RECEIPT').values_list ('delta', 'reference')),
+                          [ (10, 'po:PO-0001') ])
+
+
+class PurchaseOrderQueryPlanTest (TestCase):
+    """The hot PO queries read through their indexes: no table scans, no sorts."""
+
+    @classmethod
+    def setUpTestData (cls):
+        address = {'address_line1': '1 Main St', 'city': 'Springfield', 'state': 'IL', 'zip_code': '62701'}
+        cls.vendors = [ Vendor.objects.create (company_name = f'Vendor {n}', **address) for n in range (3) ]
+        InventoryItem.objects.bulk_create ([
+            InventoryItem (item_name = f'Item {n:03d}', unit_cost = 1, unit_price = 2, quantity = 10) for n in range (50)
+        ])
+        items = list (InventoryItem.objects.order_by ('pk'))
+        PurchaseOrder.objects.bulk_create ([
+            PurchaseOrder (purchase_order_id = f'PO-{n:04d}', vendor = cls.vendors [ n % 3 ], status = 'RECEIVED',
+                           order_date = date (2024, 1, 1) + timezone.timedelta (days = n))
+            for n in range (1, 91)
+        ])
+        PurchaseOrderItem.objects.bulk_create ([
+            PurchaseOrderItem (purchase_order_id = f'PO-{n:04d}', item = items [ (n + k) % 50 ], quantity = 5,
+                               unit_cost = Decimal (n) / 10)
+            for n in range (1, 91) for k in range (5)
+        ])
+        ReceivingLog.objects.bulk_create ([
+            ReceivingLog (po_item = line, received_quantity = 5, rejection_reason = 'ACCEPTED')
+            for line in PurchaseOrderItem.objects.all ( )
+        ])
+        cls.item = items [ 7 ]
+        cls.order = PurchaseOrder.objects.get (pk = 'PO-0042')
+        cls.line = cls.order.items.order_by ('pk').first ( )
+
+    def assertIndexed (self, plans):
+        self.assertTrue (plans)
+        for sql, plan in plans:
+            self.assertEqual (plan_problems (plan), [ ], sql)
+
+    def test_lines_and_receipts_by_po (self):
+        self.assertIndexed ([ ('lines', explain (self.order.items.all ( ))) ])
+        self.assertIndexed ([ ('receipts', explain (self.line.receiving_logs.order_by ('-date_received'))) ])
+        self.assertIndexed ([ ('receipts since', explain (
+            self.line.receiving_logs.filter (date_received__gte = timezone.now ( ) - timezone.timedelta (days = 7))
+            .order_by ('date_received'))) ])
+        self.assertIndexed ([ ('po receipts', explain (ReceivingLog.objects.filter (po_item__purchase_order = self.order))) ])
+
+    def test_fetch_unit_cost_reads_the_latest_order_without_sorting (self):
+        line = PurchaseOrderItem (item = self.item)
+        with CaptureQueriesContext (connection) as captured:
+            cost = line.fetch_unit_cost (self.vendors [ 0 ])
+        self.assertIndexed (captured_plans (captured))
+        # Vendor 0 ordered the item on PO-0003, -0006, -0054 and -0057, the latest
+        self.assertEqual (cost, Decimal ('5.70'))
@@ -9,6 +9,7 @@ router.register('purchase_order_items', views.PurchaseOrderItemViewSet, basename
 urlpatterns = [
     path('api/', include(router.urls)),
     path ('purchase_orders/', views.purchase_order_list, name ='purchase_order_list'),
+    path ('purchase_orders/data/', views.PurchaseOrderListData.as_view ( ), name ='purchase_order_list_data'),
 
     path('purchase_orders/create-purchase-order/', views.create_purchase_order, name='create_purchase_order'),
     path('purchase-order/<str:purchase_order_id>/pdf/', views.po_generate_pdf, name='po_generate_pdf'),
@@ -1,3 +1,3 @@
-from  .po_views import PurchaseOrderViewSet, PurchaseOrderItemViewSet, purchase_order_list
+from  .po_views import PurchaseOrderViewSet, PurchaseOrderItemViewSet, purchase_order_list, PurchaseOrderListData
 from .po_create_and_update import create_purchase_order, po_generate_pdf, edit_purchase_order, delete_purchase_order
 from .po_receiving import  receiving_page, lookup_po, receiving_success, autocomplete_po
@@ -20,6 +20,13 @@ class SaleItemForm(forms.ModelForm):
             'unit_price': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
         }
 
+    def clean_quantity(self):
+        # A completed sale draws every line from stock, which only takes positive quantities
+        quantity = self.cleaned_data['quantity']
+        if not quantity:
+            raise forms.ValidationError("Quantity must be at least 1.")
+        return quantity
+
 SaleItemFormSet = inlineformset_factory(
     Sale, SaleItem,
     form=SaleItemForm,
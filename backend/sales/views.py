@@ -1,5 +1,7 @@
 from django.views.generic import ListView, DetailView, CreateView
+from django.db import transaction
 from django.shortcuts import redirect
+from inventory.depletion import deplete
 from .models import Sale, Customer
 from .forms import SaleForm, SaleItemFormSet
 
@@ -35,10 +37,21 @@ class SaleCreateView(CreateView):
         context = self.get_context_data()
         formset = context['formset']
         if formset.is_valid():
-            obj = form.save()
-            formset.instance = obj
-            formset.save()
-            return redirect('sales_list')
+            try:
+                with transaction.atomic():
+                    obj = form.save()
+                    formset.instance = obj
+                    formset.save()
+                    if obj.status == 'completed':
+                        # Draw the sold quantities from the items' batches, first expiring first
+                        deplete([(line.product_id, line.quantity) for line in obj.items.all()],
+                                reason='SALE', reference=f'sale:{obj.pk}')
+            except ValueError as e:
+                # Stock the sale cannot draw (InsufficientStock is a ValueError too); nothing was saved
+                form.instance.pk = None
+                form.add_error(None, str(e))
+            else:
+                return redirect('sales_list')
         return self.render_to_response(self.get_context_data(form=form))
 
 class CustomerListView(ListView):
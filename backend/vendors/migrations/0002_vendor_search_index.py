@@ -0,0 +1,43 @@
+from django.db import migrations
+
+# Frozen copy of the index as first created: external content, keyed on the vendor table's rowid
+# (0003 replaces it with one keyed on vendor_id)
+COLUMNS = 'company_name, contact_name, phone_number, vendor_id'
+NEW = 'new.company_name, new.contact_name, new.phone_number, new.vendor_id'
+OLD = 'old.company_name, old.contact_name, old.phone_number, old.vendor_id'
+INSERT = f"INSERT INTO vendors_vendor_fts(rowid, {COLUMNS}) VALUES (new.rowid, {NEW});"
+DELETE = f"INSERT INTO vendors_vendor_fts(vendors_vendor_fts, rowid, {COLUMNS}) VALUES ('delete', old.rowid, {OLD});"
+INSTALL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS vendors_vendor_fts USING fts5({COLUMNS}, content='vendors_vendor', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS vendors_vendor_fts_ai AFTER INSERT ON vendors_vendor BEGIN {INSERT} END",
+    f"CREATE TRIGGER IF NOT EXISTS vendors_vendor_fts_ad AFTER DELETE ON vendors_vendor BEGIN {DELETE} END",
+    f"CREATE TRIGGER IF NOT EXISTS vendors_vendor_fts_au AFTER UPDATE OF {COLUMNS} ON vendors_vendor BEGIN {DELETE} {INSERT} END",
+    "INSERT INTO vendors_vendor_fts(vendors_vendor_fts) VALUES ('rebuild')",
+]
+DROP = [
+    "DROP TRIGGER IF EXISTS vendors_vendor_fts_ai",
+    "DROP TRIGGER IF EXISTS vendors_vendor_fts_ad",
+    "DROP TRIGGER IF EXISTS vendors_vendor_fts_au",
+    "DROP TABLE IF EXISTS vendors_vendor_fts",
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+# Trigram full-text index over vendor names, phone numbers and IDs for vendor search (SQLite only)
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(INSTALL), run(DROP)),
+    ]
@@ -0,0 +1,56 @@
+from django.db import migrations
+
+# The rowid of vendors_vendor is implicit (vendor_id is a text primary key), so VACUUM or a
+# table rebuild can renumber it under the index. Frozen copy of the index keyed on vendor_id.
+COLUMNS = 'company_name, contact_name, phone_number, vendor_id'
+NEW = 'new.company_name, new.contact_name, new.phone_number, new.vendor_id'
+OLD = 'old.company_name, old.contact_name, old.phone_number, old.vendor_id'
+INSERT = f"INSERT INTO vendors_vendor_fts(source_key, {COLUMNS}) VALUES (new.vendor_id, {NEW});"
+DELETE = "DELETE FROM vendors_vendor_fts WHERE source_key = old.vendor_id;"
+DROP = [
+    "DROP TRIGGER IF EXISTS vendors_vendor_fts_ai",
+    "DROP TRIGGER IF EXISTS vendors_vendor_fts_ad",
+    "DROP TRIGGER IF EXISTS vendors_vendor_fts_au",
+    "DROP TABLE IF EXISTS vendors_vendor_fts",
+]
+INSTALL = DROP + [
+    f"CREATE VIRTUAL TABLE vendors_vendor_fts USING fts5(source_key UNINDEXED, {COLUMNS}, tokenize='trigram')",
+    f"CREATE TRIGGER vendors_vendor_fts_ai AFTER INSERT ON vendors_vendor BEGIN {INSERT} END",
+    f"CREATE TRIGGER vendors_vendor_fts_ad AFTER DELETE ON vendors_vendor BEGIN {DELETE} END",
+    f"CREATE TRIGGER vendors_vendor_fts_au AFTER UPDATE OF {COLUMNS} ON vendors_vendor BEGIN {DELETE} {INSERT} END",
+    f"INSERT INTO vendors_vendor_fts(source_key, {COLUMNS}) SELECT vendor_id, {COLUMNS} FROM vendors_vendor",
+]
+# Reversing restores the rowid-keyed index of 0002
+ROWID_INSERT = f"INSERT INTO vendors_vendor_fts(rowid, {COLUMNS}) VALUES (new.rowid, {NEW});"
+ROWID_DELETE = (
+    f"INSERT INTO vendors_vendor_fts(vendors_vendor_fts, rowid, {COLUMNS}) VALUES ('delete', old.rowid, {OLD});"
+)
+UNINSTALL = DROP + [
+    f"CREATE VIRTUAL TABLE vendors_vendor_fts USING fts5({COLUMNS}, content='vendors_vendor', tokenize='trigram')",
+    f"CREATE TRIGGER vendors_vendor_fts_ai AFTER INSERT ON vendors_vendor BEGIN {ROWID_INSERT} END",
+    f"CREATE TRIGGER vendors_vendor_fts_ad AFTER DELETE ON vendors_vendor BEGIN {ROWID_DELETE} END",
+    f"CREATE TRIGGER vendors_vendor_fts_au AFTER UPDATE OF {COLUMNS} ON vendors_vendor "
+    f"BEGIN {ROWID_DELETE} {ROWID_INSERT} END",
+    "INSERT INTO vendors_vendor_fts(vendors_vendor_fts) VALUES ('rebuild')",
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+# Re-key the vendor search index on vendor_id instead of the implicit rowid (SQLite only)
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0002_vendor_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(INSTALL), run(UNINSTALL)),
+    ]
@@ -0,0 +1,132 @@
+"""
+Ranked vendor search, shared by the vendor type-ahead (`vendors.views.search_vendors`) and
+the purchase order API (`PurchaseOrderViewSet.search_vendors`).
+
+On SQLite, company name, contact name, phone number and vendor ID are kept in a trigram
+FTS5 index (`VENDOR_INDEX`, see `inventory_management.search_index`). Every term of the
+query must appear somewhere in those fields, as a whole word or part of one. Queries that
+look like phone numbers are matched on their digits, so '(217) 555-0100' finds 2175550100.
+Results are ranked:
+
+1. exact vendor ID or phone number matches,
+2. company names starting with the query,
+3. contact names, vendor IDs or phone numbers starting with the query,
+4. any other match, best FTS rank first,
+
+and never exceed a hard limit. Queries too short for the index, and other database
+backends, fall back to exact and prefix lookups with the same ranking and limit.
+Results go through a prefix-narrowing `TypeaheadCache`.
+"""
+import re
+from functools import partial
+
+from django.conf import settings
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from inventory_management.search_index import (
+    SearchIndex, clamp_limit, like_prefix, match_expression, matches_terms, normalize_query, search_terms,
+)
+from inventory_management.typeahead import TypeaheadCache
+from .models import Vendor
+
+# Vendor IDs are text primary keys, so the index is keyed on them rather than on the table's rowid
+VENDOR_INDEX = SearchIndex(
+    'vendors_vendor_fts', Vendor, ['company_name', 'contact_name', 'phone_number', 'vendor_id'], key='vendor_id',
+)
+PHONE_QUERY = re.compile(r'^\+?[\d\s().-]+$')
+# Cleared by vendors.signals whenever vendors are written
+search_cache = TypeaheadCache()
+
+
+def default_limit():
+    return getattr(settings, 'VENDOR_SEARCH_RESULTS', 20)
+
+
+def max_limit():
+    return getattr(settings, 'VENDOR_SEARCH_MAX_RESULTS', 50)
+
+
+def normalize_vendor_query(query):
+    """Normalize whitespace, and reduce a phone-number-looking query to its digits."""
+    query = normalize_query(query)
+    if PHONE_QUERY.match(query):
+        query = re.sub(r'\D', '', query)
+    return query
+
+
+def search_vendors(query, limit=None):
+    """Return up to `limit` vendors matching `query`, best first."""
+    query = normalize_vendor_query(query)
+    limit = clamp_limit(limit, default_limit(), max_limit())
+    if not query:
+        return []
+    match = match_expression(query)
+    if match is not None and VENDOR_INDEX.supported():
+        fetch = partial(_search_fts, query, match)
+    else:
+        fetch = partial(_search_prefix, query)
+    return search_cache.search(query, limit, fetch, partial(_narrow, query=query))
+
+
+def _narrow(prefix, rows, query):
+    """Filter the complete result for `prefix` down to `query`, re-ranked as `_search_fts` would."""
+    if not VENDOR_INDEX.supported() or match_expression(prefix) is None:
+        return None
+    terms = search_terms(query)
+    matches = [
+        vendor for vendor in rows
+        if _rank(vendor, query) == 0 or matches_terms([getattr(vendor, column) for column in VENDOR_INDEX.columns], terms)
+    ]
+    # A stable sort keeps the index's relevance order within each rank
+    return sorted(matches, key=lambda vendor: _rank(vendor, query))
+
+
+def _rank(vendor, query):
+    if vendor.vendor_id == query.upper() or vendor.phone_number == query:
+        return 0
+    lowered = query.lower()
+    if vendor.company_name.lower().startswith(lowered):
+        return 1
+    if any((value or '').lower().startswith(lowered) for value in (vendor.contact_name, vendor.vendor_id, vendor.phone_number)):
+        return 2
+    return 3
+
+
+def _search_fts(query, match, limit):
+    prefix = like_prefix(query)
+    sql = f"""
+        SELECT v.* FROM (
+            SELECT {VENDOR_INDEX.key_column} AS vendor_id, rank FROM {VENDOR_INDEX.name} WHERE {VENDOR_INDEX.name} MATCH %s
+            UNION ALL
+            SELECT vendor_id, 0 FROM {VENDOR_INDEX.table} WHERE vendor_id = %s OR phone_number = %s
+        ) AS hits
+        JOIN {VENDOR_INDEX.table} AS v ON v.vendor_id = hits.vendor_id
+        GROUP BY v.vendor_id
+        ORDER BY
+            CASE
+                WHEN v.vendor_id = %s OR v.phone_number = %s THEN 0
+                WHEN v.company_name LIKE %s ESCAPE '\\' THEN 1
+                WHEN v.contact_name LIKE %s ESCAPE '\\' OR v.vendor_id LIKE %s ESCAPE '\\'
+                    OR v.phone_number LIKE %s ESCAPE '\\' THEN 2
+                ELSE 3
+            END,
+            min(hits.rank), v.company_name
+        LIMIT %s
+    """
+    vendor_id = query.upper()
+    params = [match, vendor_id, query, vendor_id, query, prefix, prefix, prefix, prefix, limit]
+    return list(Vendor.objects.raw(sql, params))
+
+
+def _search_prefix(query, limit):
+    exact = Q(vendor_id=query.upper()) | Q(phone_number=query)
+    company = Q(company_name__istartswith=query)
+    other = Q(contact_name__istartswith=query) | Q(vendor_id__istartswith=query) | Q(phone_number__startswith=query)
+    return list(
+        Vendor.objects.filter(exact | company | other)
+        .annotate(search_rank=Case(
+            When(exact, then=Value(0)), When(company, then=Value(1)), default=Value(2),
+            output_field=IntegerField(),
+        ))
+        .order_by('search_rank', 'company_name')[:limit]
+    )
@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Vendor
+from .search import search_cache
+
+
+@receiver(post_save, sender=Vendor)
+@receiver(post_delete, sender=Vendor)
+def clear_vendor_search_cache(sender, **kwargs):
+    search_cache.clear()
+    # Again once the change is visible to other connections, in case a search re-cached
+    # the old row while the transaction was still open
+    transaction.on_commit(search_cache.clear)
@@ -1,3 +1,94 @@
+import csv
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.urls import reverse
+from .models import Vendor
+from .search import search_cache as vendor_search_cache, search_vendors
 
-# Create your tests here.
+
+class VendorDownloadTests(TestCase):
+    def test_download_vendors_streams_csv(self):
+        Vendor.objects.create(company_name='Acme Foods', address_line1='1 Main St', city='Springfield', state='IL', zip_code='62701')
+        self.client.force_login(User.objects.create_user('clerk', password='x'))
+
+        response = self.client.get(reverse('download_vendors'))
+
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(b''.join(response.streaming_content).decode('utf-8').splitlines()))
+        self.assertEqual(rows[0][:2], ['Vendor ID', 'Company Name'])
+        self.assertEqual(rows[1][:2], ['VEN-0001', 'Acme Foods'])
+
+
+class VendorSearchTests(TestCase):
+    def setUp(self):
+        address = {'address_line1': '1 Main St', 'city': 'Springfield', 'state': 'IL', 'zip_code': '62701'}
+        self.fresh = Vendor.objects.create(company_name='Fresh Farms', contact_name='Ann Baker', phone_number='2175550100', **address)
+        self.bakery = Vendor.objects.create(company_name='Baker Street Bakery', contact_name='Tom Fresh', phone_number='2175550200', **address)
+        self.supply = Vendor.objects.create(company_name='Metro Supply', contact_name='Lee Wong', phone_number='2175550300', **address)
+
+    def names(self, query, limit=None):
+        return [vendor.company_name for vendor in search_vendors(query, limit)]
+
+    def test_ranks_exact_then_company_prefix_then_other_fields(self):
+        self.assertEqual(self.names('baker'), ['Baker Street Bakery', 'Fresh Farms'])
+        self.assertEqual(self.names('fresh'), ['Fresh Farms', 'Baker Street Bakery'])
+        self.assertEqual(self.names('ven-0003'), ['Metro Supply'])
+        self.assertEqual(self.names('(217) 555-0200'), ['Baker Street Bakery'])
+        self.assertEqual(self.names('metro wong'), ['Metro Supply'])
+        self.assertEqual(self.names('nowhere'), [])
+
+    def test_short_queries_and_limit(self):
+        self.assertEqual(self.names('me'), ['Metro Supply'])
+        self.assertEqual(len(search_vendors('217', 2)), 2)
+
+    def test_index_follows_updates(self):
+        Vendor.objects.filter(pk=self.supply.pk).update(company_name='Harbor Goods')
+        self.assertEqual(self.names('harbor'), ['Harbor Goods'])
+        self.assertEqual(self.names('metro'), [])
+
+    def test_index_is_keyed_on_vendor_id_not_rowid(self):
+        # VACUUM and table rebuilds may renumber the implicit rowid of a text-keyed table
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE vendors_vendor SET rowid = rowid + 100')
+        self.assertEqual(self.names('metro wong'), ['Metro Supply'])
+        self.supply.delete()
+        self.assertEqual(self.names('metro wong'), [])
+
+    def test_both_endpoints_use_the_search(self):
+        response = self.client.get(reverse('search_vendors'), {'q': 'fresh', 'limit': 1})
+        self.assertEqual(response.json(), [{
+            'vendor_id': 'VEN-0001', 'company_name': 'Fresh Farms', 'contact_name': 'Ann Baker', 'phone_number': '2175550100',
+        }])
+        response = self.client.get(reverse('purchase_order-search-vendors'), {'q': 'fresh'})
+        self.assertEqual([vendor['vendor_id'] for vendor in response.json()], ['VEN-0001', 'VEN-0002'])
+
+
+class VendorListDataTests(TestCase):
+    def test_filters_by_status_and_search(self):
+        address = {'address_line1': '1 Main St', 'city': 'Springfield', 'state': 'IL', 'zip_code': '62701'}
+        Vendor.objects.create(company_name='Acme Foods', **address)
+        Vendor.objects.create(company_name='Best Produce', status='Inactive', **address)
+        self.client.force_login(User.objects.create_user('clerk', password='x'))
+
+        response = self.client.get(reverse('vendor_list_data'), {'draw': 1, 'columns[7][search][value]': 'Inactive'}).json()
+        self.assertEqual([row[:2] for row in response['data']], [['VEN-0002', 'Best Produce']])
+        response = self.client.get(reverse('vendor_list_data'), {'draw': 1, 'search[value]': 'acme'}).json()
+        self.assertEqual((response['recordsTotal'], response['recordsFiltered']), (2, 1))
+        self.assertEqual(self.client.get(reverse('vendor_list_view')).status_code, 200)
+
+
+class VendorSearchCacheTests(TestCase):
+    def test_keystrokes_are_answered_from_the_cache_until_a_vendor_changes(self):
+        vendor_search_cache.clear()
+        address = {'address_line1': '1 Main St', 'city': 'Springfield', 'state': 'IL', 'zip_code': '62701'}
+        vendor = Vendor.objects.create(company_name='Fresh Farms', **address)
+        Vendor.objects.create(company_name='Freight Supply', **address)
+
+        self.assertEqual(len(search_vendors('fre')), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual([v.company_name for v in search_vendors('fres')], ['Fresh Farms'])
+
+        vendor.company_name = 'Fresher Farms'
+        vendor.save()
+        self.assertEqual([v.company_name for v in search_vendors('fres')], ['Fresher Farms'])
@@ -1,12 +1,14 @@
 from django.urls import path
 from .views import (
     vendor_list_view, vendor_create_view, download_vendors,
-    VendorAPIListCreateView, search_vendors, vendor_detail
+    VendorAPIListCreateView, search_vendors, vendor_detail, VendorListData
 )
 
 
 urlpatterns = [
     # Frontend views (if still used)
+    path('vendors/list/', vendor_list_view, name='vendor_list_view'),
+    path('vendors/list/data/', VendorListData.as_view(), name='vendor_list_data'),
     path('vendors/add/', vendor_create_view, name='vendor_create_view'),
     path('vendors/download/', download_vendors, name='download_vendors'),
 
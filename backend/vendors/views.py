@@ -1,6 +1,5 @@
-import csv
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse, JsonResponse
+from django.http import JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from .forms import VendorForm
@@ -8,6 +7,9 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
+from inventory_management.datatables import ServerSideDatatableView
+from inventory_management.exports import stream_csv_response
+from . import search
 from .models import Vendor
 from .serializers import VendorSerializer
 
@@ -15,8 +17,18 @@ from .serializers import VendorSerializer
 # Web views (require login)
 @login_required
 def vendor_list_view(request):
-    vendors = Vendor.objects.all()
-    return render(request, 'vendors/vendor_list.html', {'vendors': vendors})
+    # Rows are loaded by the table from VendorListData
+    return render(request, 'vendors/vendor_list.html')
+
+
+class VendorListData(ServerSideDatatableView):
+    """Server-side rows for the vendor list table."""
+    model = Vendor
+    columns = ['vendor_id', 'company_name', 'contact_name', 'phone_number', 'email', 'terms', 'payment_method', 'status']
+    order_columns = columns
+    search_columns = ['vendor_id', 'company_name', 'contact_name', 'phone_number']
+    column_filters = {'status': 'exact'}
+    default_order = ['vendor_id']
 
 
 @login_required
@@ -31,26 +43,18 @@ def vendor_create_view(request):
     return render(request, 'vendors/vendor_form.html', {'form': form})
 
 
-@login_required
-def download_vendors(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="vendors.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow([
-        'Vendor ID', 'Company Name', 'Contact Name', 'Address Line 1',
-        'Address Line 2', 'City', 'State', 'Zip Code', 'Phone Number',
-        'Email', 'Terms', 'Payment Method', 'Website', 'Status', 'Notes'
-    ])
+VENDOR_EXPORT_COLUMNS = [
+    ('Vendor ID', 'vendor_id'), ('Company Name', 'company_name'), ('Contact Name', 'contact_name'),
+    ('Address Line 1', 'address_line1'), ('Address Line 2', 'address_line2'), ('City', 'city'),
+    ('State', 'state'), ('Zip Code', 'zip_code'), ('Phone Number', 'phone_number'), ('Email', 'email'),
+    ('Terms', 'terms'), ('Payment Method', 'payment_method'), ('Website', 'website'),
+    ('Status', 'status'), ('Notes', 'notes'),
+]
 
-    for item in Vendor.objects.all():
-        writer.writerow([
-            item.vendor_id, item.company_name, item.contact_name, item.address_line1,
-            item.address_line2, item.city, item.state, item.zip_code, item.phone_number,
-            item.email, item.terms, item.payment_method, item.website, item.status, item.notes
-        ])
 
-    return response
+@login_required
+def download_vendors(request):
+    return stream_csv_response(Vendor.objects.order_by('pk'), VENDOR_EXPORT_COLUMNS, 'vendors.csv')
 
 
 # API view (open/public)
@@ -72,11 +76,15 @@ class VendorAPIListCreateView(APIView):
 
 # AJAX search API
 def search_vendors(request):
-    query = request.GET.get('q', '').strip()
-    vendors = Vendor.objects.filter(
-        company_name__icontains=query
-    ).values('vendor_id', 'company_name', 'contact_name', 'phone_number')
-    return JsonResponse(list(vendors), safe=False)
+    try:
+        limit = int(request.GET.get('limit', ''))
+    except ValueError:
+        limit = None
+    vendors = search.search_vendors(request.GET.get('q', ''), limit)
+    return JsonResponse([
+        {field: getattr(vendor, field) for field in ('vendor_id', 'company_name', 'contact_name', 'phone_number')}
+        for vendor in vendors
+    ], safe=False)
 
 
 # AJAX vendor detail